@@ -2,10 +2,16 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import celeryd_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MutualFundBroker.settings')
 
+# Celery runs Django's system checks before importing the task modules. The URL
+# and template checks import every view, DRF included, which no task needs;
+# deploys run `manage.py check` instead. Export CELERY_SKIP_CHECKS= to run them.
+os.environ.setdefault('CELERY_SKIP_CHECKS', '1')
+
 app = Celery('MutualFundBroker')
 
 app.config_from_object('django.conf:settings', namespace='CELERY')
@@ -13,6 +19,53 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
 
+
+# Worker tuning per queue, picked with CELERY_WORKER_PROFILE (see README).
+# Ingest runs one long task at a time and must not hoard messages; valuation
+# chunks are CPU bound and acknowledged late, so each process takes one at a
+# time; notifications are short I/O bound sends.
+WORKER_PROFILES = {
+    'ingest': {'queues': ['ingest'], 'concurrency': 1, 'prefetch_multiplier': 1},
+    'valuation': {'queues': ['valuation'], 'concurrency': os.cpu_count() or 2, 'prefetch_multiplier': 1},
+    'notifications': {'queues': ['notifications'], 'concurrency': 8, 'prefetch_multiplier': 4},
+    'default': {'queues': ['default'], 'concurrency': 4, 'prefetch_multiplier': 4},
+}
+
+
+@app.on_after_finalize.connect
+def setup_query_inspector(sender, **kwargs):
+    # Imported late: the inspector needs Django settings to be configured.
+    from core.query_inspector import connect_celery_signals
+    connect_celery_signals()
+
+
+@app.on_after_finalize.connect
+def setup_task_metrics(sender, **kwargs):
+    from core.metrics import connect_celery_signals
+    connect_celery_signals()
+
+
+def worker_profile():
+    name = os.getenv('CELERY_WORKER_PROFILE')
+    return WORKER_PROFILES[name] if name else None
+
+
+@app.on_after_configure.connect
+def apply_worker_profile(sender, **kwargs):
+    # Runs before the worker reads its defaults, so -c and --prefetch-multiplier still win
+    profile = worker_profile()
+    if profile is not None:
+        sender.conf.worker_concurrency = profile['concurrency']
+        sender.conf.worker_prefetch_multiplier = profile['prefetch_multiplier']
+
+
+@celeryd_init.connect
+def select_profile_queues(sender=None, instance=None, options=None, **kwargs):
+    profile = worker_profile()
+    if profile is not None and not (options or {}).get('queues'):
+        instance.app.amqp.queues.select(profile['queues'])
+
+
 @app.task(bind=True)
 def debug_task(self):
     print('Request: {0!r}'.format(self.request))
@@ -1,5 +1,8 @@
 from datetime import timedelta
+from celery.schedules import crontab
+from kombu import Queue
 import os
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -59,6 +62,8 @@ INSTALLED_APPS += PROJECTS_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.query_inspector.QueryInspectorMiddleware',  # no-op unless QUERY_INSPECTOR is enabled
+    'core.compression.CompressionMiddleware',  # gzip/brotli, negotiated per request
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,11 +73,24 @@ MIDDLEWARE = [
 ]
 
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'accounts.hashing.TunableArgon2PasswordHasher',  # Argon2 with the costs below
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',  
     'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
 ]
 
+# Argon2 costs; hashes made with other values are upgraded on the next login
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', '2'))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv('PASSWORD_ARGON2_MEMORY_COST', '102400'))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', '8'))
+
+# Passwords are hashed in a process pool per web process (accounts/hashing.py).
+# Requests beyond MAX_PENDING running or queued hashes get a 503 right away.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', '2'))  # 0 hashes on the request thread
+PASSWORD_HASHING_MAX_PENDING = int(os.getenv('PASSWORD_HASHING_MAX_PENDING', '16'))
+PASSWORD_HASHING_TIMEOUT = float(os.getenv('PASSWORD_HASHING_TIMEOUT', '5'))  # seconds
+# Hashing processes started by each bulk import through the API (accounts/onboarding.py)
+USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', '1'))
+
 ROOT_URLCONF = 'MutualFundBroker.urls'
 
 TEMPLATES = [
@@ -97,27 +115,59 @@ WSGI_APPLICATION = 'MutualFundBroker.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE selects the backend: 'sqlite' (default, single node) or 'postgresql'.
+# DB_CONN_MAX_AGE defaults to 0, one connection per request: under ASGI (the async
+# views and the NAV stream) persistent connections are kept per thread and pile up.
+# Raise it under WSGI workers, or behind a pooler such as PgBouncer, to keep
+# connections open for that many seconds; they are health-checked before reuse.
+# Setting DB_REPLICA_HOST (postgres) or SQLITE_REPLICA_PATH adds a
+# 'replica' alias, read by the read-only catalogue endpoints (core.db.catalogue_db).
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '0'))
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'default_db_name'),  # Default value if env variable is not set
+            'USER': os.getenv('DB_USER', 'default_user'),    # Default value if env variable is not set
+            'PASSWORD': os.getenv('DB_PASSWORD', 'default_password'),  # Default value if env variable is not set
+            'HOST': os.getenv('DB_HOST', 'localhost'),  # Default to localhost
+            'PORT': os.getenv('DB_PORT', '5432'),  # Default PostgreSQL port
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
-}
-
+    if os.getenv('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.getenv('DB_REPLICA_HOST'),
+            'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': int(os.getenv('SQLITE_TIMEOUT', '20')),  # seconds to wait on a locked database
+            },
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if os.getenv('SQLITE_REPLICA_PATH'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'NAME': os.getenv('SQLITE_REPLICA_PATH'),
+            'TEST': {'MIRROR': 'default'},
+        }
 
-# if you want to use postgres
-# Fetching environment variables
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.postgresql',
-#         'NAME': os.getenv('DB_NAME', 'default_db_name'),  # Default value if env variable is not set
-#         'USER': os.getenv('DB_USER', 'default_user'),    # Default value if env variable is not set
-#         'PASSWORD': os.getenv('DB_PASSWORD', 'default_password'),  # Default value if env variable is not set
-#         'HOST': os.getenv('DB_HOST', 'localhost'),  # Default to localhost
-#         'PORT': os.getenv('DB_PORT', '5432'),  # Default PostgreSQL port
-#     }
-# }
+# SQLite runs in WAL mode so readers do not block the writer (see core/db.py)
+SQLITE_WAL = os.getenv('SQLITE_WAL', 'True') == 'True'
 
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
 
 
 # Password validation
@@ -170,15 +220,25 @@ REST_FRAMEWORK = {
 
     ),
     'EXCEPTION_HANDLER': 'core.exception_handler.custom_exception_handler', # project level exception handling
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',  # same bytes as JSONRenderer, encoded with orjson when available
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Token buckets shared by all processes through Redis (core/throttling.py)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        'core.throttling.ScopedTokenBucketThrottle',
+        'core.throttling.UserTokenBucketThrottle',
+        'core.throttling.AnonTokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'user': '50/day',
         'anon': '50/day',
+        # Per-endpoint scopes, set with throttle_scope on the views
+        'read': os.getenv('THROTTLE_READ_RATE', '120/min'),
+        'purchase': os.getenv('THROTTLE_PURCHASE_RATE', '10/min'),
+        'login': os.getenv('THROTTLE_LOGIN_RATE', '5/min'),
     },
 
 }
@@ -190,6 +250,9 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=2),
 }
 
+# Verified access tokens kept per process (accounts/token_cache.py); 0 turns the cache off
+JWT_CACHE_SIZE = int(os.getenv('JWT_CACHE_SIZE', 10000))
+
 
 # User models
 AUTH_USER_MODEL = 'accounts.User'  
@@ -199,36 +262,189 @@ AUTH_USER_MODEL = 'accounts.User'
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')  # Redis URL 
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND')
-CELERY_ACCEPT_CONTENT = ['json'] 
-CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'  
 
+# msgpack payloads are smaller and faster to decode than JSON for the report
+# chunks; they are only accepted when the msgpack package is installed.
+CELERY_ACCEPT_CONTENT = ['json', 'msgpack'] if find_spec('msgpack') else ['json']
+CELERY_TASK_SERIALIZER = os.getenv('CELERY_TASK_SERIALIZER', 'json')
+CELERY_RESULT_SERIALIZER = os.getenv('CELERY_RESULT_SERIALIZER', 'json')
+CELERY_RESULT_COMPRESSION = os.getenv('CELERY_RESULT_COMPRESSION')  # e.g. zlib; shard results are the large ones
+TASK_CHUNK_COMPRESSION = os.getenv('TASK_CHUNK_COMPRESSION', 'zlib')  # messages carrying report chunks
+
+# Named queues, so a long ingest never sits in front of user-triggered work.
+# Workers pick their queues and tuning with CELERY_WORKER_PROFILE (MutualFundBroker/celery.py).
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = tuple(
+    Queue(name, routing_key=name) for name in ('default', 'ingest', 'valuation', 'notifications')
+)
+CELERY_TASK_ROUTES = {
+    'funds.tasks.fetch_and_save_funds': {'queue': 'ingest'},
+    'funds.tasks.refresh_portfolio_valuations': {'queue': 'valuation'},
+    'funds.tasks.build_aum_report': {'queue': 'valuation'},
+    'funds.tasks.aum_report_shard': {'queue': 'valuation'},
+    'funds.tasks.save_aum_report': {'queue': 'valuation', 'compression': TASK_CHUNK_COMPRESSION},
+    'funds.tasks.sip_mandate_shard': {'queue': 'default', 'compression': TASK_CHUNK_COMPRESSION},  # carries the day's NAVs
+    'notification.tasks.*': {'queue': 'notifications'},
+}
+
 
 
 # log settings
+# Records are queued by the request threads and written as JSON lines by a
+# background listener (see core/logging_pipeline.py), so logging never blocks
+# on disk I/O. High-volume DEBUG messages such as SQL traces are sampled.
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.logging_pipeline.JSONFormatter',
+        },
+    },
+    'filters': {
+        'sample_debug': {
+            '()': 'core.logging_pipeline.SamplingFilter',
+            'rate': int(os.getenv('LOG_SAMPLE_RATE', '100')),  # keep 1 in N DEBUG records per message
+            'level': 'INFO',
+        },
+    },
     'handlers': {
         'file': {
+            '()': 'core.logging_pipeline.QueueFileHandler',
             'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': 'myapp.log',  # This is the file where logs will be written
+            'formatter': 'json',
+            'filename': os.getenv('LOG_FILE', 'myapp.log'),  # This is the file where logs will be written
+            'max_bytes': int(os.getenv('LOG_MAX_BYTES', str(50 * 1024 * 1024))),  # rotate at 50 MB
+            'backup_count': int(os.getenv('LOG_BACKUP_COUNT', '5')),
+            'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),  # records beyond this are dropped
         },
     },
     'loggers': {
         'django': {
             'handlers': ['file'],
-            'level': 'DEBUG',
+            'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
             'propagate': True,
         },
+        'django.db.backends': {
+            'handlers': ['file'],
+            'level': os.getenv('SQL_LOG_LEVEL', 'INFO'),
+            'filters': ['sample_debug'],
+            'propagate': False,
+        },
+        'funds': {
+            'handlers': ['file'],
+            'level': os.getenv('FUNDS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'accounts': {
+            'handlers': ['file'],
+            'level': os.getenv('ACCOUNTS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['file'],
+            'level': os.getenv('CORE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
     },
 }
 
 
+# Response compression (core/compression.py). Brotli is used when the
+# optional `brotli` package is installed and the client accepts it.
+RESPONSE_COMPRESSION = {
+    'GZIP_LEVEL': int(os.getenv('GZIP_LEVEL', '5')),
+    'BROTLI_QUALITY': int(os.getenv('BROTLI_QUALITY', '4')),
+    'MIN_LENGTH': int(os.getenv('COMPRESSION_MIN_LENGTH', '1024')),  # smaller bodies are sent as they are
+}
+
+
+# Query inspection (N+1 and slow query detection) for development and staging
+QUERY_INSPECTOR = {
+    'ENABLED': os.getenv('QUERY_INSPECTOR_ENABLED', 'False') == 'True',
+    'THRESHOLD': int(os.getenv('QUERY_INSPECTOR_THRESHOLD', '5')),  # allowed repeats of one query shape
+    'SLOW_QUERY_MS': int(os.getenv('QUERY_INSPECTOR_SLOW_QUERY_MS', '200')),
+}
+
+
+# Shared cache. Without CACHE_URL every process keeps its own in-memory cache,
+# which is fine for development and tests but not for several web workers.
+if os.getenv('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('CACHE_URL'),  # e.g. redis://localhost:6379/1
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Family/category stats are cached until the ingest changes the catalogue; purchases and
+# redemptions reach the AUM figures when the entry expires
+FUND_STATS_CACHE_TIMEOUT = int(os.getenv('FUND_STATS_CACHE_TIMEOUT', '300'))  # seconds
+
+
+# Memory-mapped scheme master written after every ingest (funds/snapshot.py)
+SCHEME_SNAPSHOT_PATH = os.getenv('SCHEME_SNAPSHOT_PATH', BASE_DIR / 'scheme_master.snapshot')
+SCHEME_SNAPSHOT_CHECK_INTERVAL = float(os.getenv('SCHEME_SNAPSHOT_CHECK_INTERVAL', '1'))  # seconds between checks for a new file
+
+
+# Throttle buckets live in Redis when THROTTLE_REDIS_URL (or CACHE_URL) is set,
+# otherwise in the default cache of each process
+THROTTLE_REDIS_URL = os.getenv('THROTTLE_REDIS_URL', os.getenv('CACHE_URL'))
+
+
+# Ingest single-flight (funds/ingest.py). Leases live in Redis when LOCK_REDIS_URL
+# is set and in the TaskLease table otherwise.
+LOCK_REDIS_URL = os.getenv('LOCK_REDIS_URL')
+INGEST_LEASE_TTL_MS = int(os.getenv('INGEST_LEASE_TTL_MS', str(15 * 60 * 1000)))  # renewed after the fetch and per load batch
+INGEST_FETCH_TIMEOUT = int(os.getenv('INGEST_FETCH_TIMEOUT', '120'))  # seconds; must stay well below the lease TTL
+INGEST_RUN_TIMEOUT = int(os.getenv('INGEST_RUN_TIMEOUT', '3600'))  # seconds before an unfinished run is abandoned
+INGEST_RETRY_DELAY = int(os.getenv('INGEST_RETRY_DELAY', '30'))  # seconds between attempts while the lease is taken
+# NAVs quarantined by the ingest (funds/anomalies.py): relative change from the stored NAV,
+# and days a NAV date may lag the newest date in the feed
+NAV_MAX_CHANGE = float(os.getenv('NAV_MAX_CHANGE', '0.25'))
+NAV_STALE_DAYS = int(os.getenv('NAV_STALE_DAYS', '7'))
+
+
+# Server-sent NAV updates (funds/nav_stream.py). The ingest publishes through Redis
+# pub/sub when NAV_STREAM_REDIS_URL (or CACHE_URL) is set, in process otherwise.
+NAV_STREAM_REDIS_URL = os.getenv('NAV_STREAM_REDIS_URL', os.getenv('CACHE_URL'))
+NAV_STREAM_CHANNEL = os.getenv('NAV_STREAM_CHANNEL', 'funds:nav-updates')
+NAV_STREAM_HEARTBEAT = float(os.getenv('NAV_STREAM_HEARTBEAT', '15'))  # seconds between keep-alive comments
+NAV_STREAM_MAX_SCHEMES = int(os.getenv('NAV_STREAM_MAX_SCHEMES', '200'))  # codes a client may watch besides its holdings
+
+
+# Redemptions (funds/lots.py): realized gains on units held at least this long are long term
+LONG_TERM_HOLDING_DAYS = int(os.getenv('LONG_TERM_HOLDING_DAYS', '365'))
+
+
+# Daily AUM report (funds/reports.py): number of user_id range shards run in parallel
+AUM_REPORT_SHARDS = int(os.getenv('AUM_REPORT_SHARDS', '4'))
+
+
+# SIP scheduler (funds/sip.py): user_id range shards per daily run, and seconds
+# before a shard that hit a database error is retried
+SIP_SHARDS = int(os.getenv('SIP_SHARDS', '32'))
+SIP_RETRY_DELAY = int(os.getenv('SIP_RETRY_DELAY', '60'))
+
+
 CELERY_BEAT_SCHEDULE = {
     'send-notifications': {
         'task': 'notification.tasks.send_notifications',
         'schedule': timedelta(hours=1),  # 🔥 Run every 1 hour
     },
+    'daily-aum-report': {
+        'task': 'funds.tasks.build_aum_report',
+        'schedule': crontab(hour=1, minute=30),  # After the evening NAV ingest has settled
+    },
+    'daily-sip-mandates': {
+        'task': 'funds.tasks.run_sip_mandates',
+        'schedule': crontab(hour=2, minute=0),  # Priced at the NAVs of the evening ingest
+    },
 }
@@ -17,9 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 from django.conf.urls import include
+from core.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('funds/', include('funds.urls')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
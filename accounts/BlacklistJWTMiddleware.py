@@ -1,18 +1,77 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 from .models import BlacklistedToken
+from .token_cache import verified_tokens
 from rest_framework.exceptions import AuthenticationFailed
 
 
 class BlacklistJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
-        # Call the base class to perform the usual authentication process
-        user_auth_tuple = super().authenticate(request)
+        header = self.get_header(request)
+        if header is None:
+            return None
 
-        if user_auth_tuple is not None:
-            user, auth_token = user_auth_tuple
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
 
-            # Check if the token is blacklisted
-            if BlacklistedToken.objects.filter(token=auth_token).exists():
-                raise AuthenticationFailed('Token is blacklisted. Please log in again.')
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
 
-        return user_auth_tuple
+        # Check if the token is blacklisted. Compare the raw token as sent: turning the
+        # validated token back into a string would sign its payload all over again.
+        if BlacklistedToken.objects.filter(token=raw_token.decode()).exists():
+            raise AuthenticationFailed('Token is blacklisted. Please log in again.')
+
+        return user, validated_token
+
+    def get_validated_token(self, raw_token):
+        """
+        Verify ``raw_token`` once, then serve it from the verified-token cache
+        until it expires, skipping decoding and the signature check.
+        """
+        validated_token = verified_tokens.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            verified_tokens.put(raw_token, validated_token)
+        return validated_token
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of ``authenticate`` for plain Django async views.
+        Token parsing is pure CPU work; the user lookup and the blacklist
+        check go through the async ORM so the event loop is never blocked.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user = await self.aget_user(validated_token)
+
+        # Check if the token is blacklisted
+        if await BlacklistedToken.objects.filter(token=raw_token.decode()).aexists():
+            raise AuthenticationFailed('Token is blacklisted. Please log in again.')
+
+        return user, validated_token
+
+    async def aget_user(self, validated_token):
+        """Async version of ``get_user`` using ``afirst`` for the lookup."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        user = await self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).afirst()
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        return user
@@ -0,0 +1,182 @@
+"""
+Password hashing off the request threads.
+
+Argon2 deliberately burns tens of milliseconds of CPU per hash. Run on the
+request threads, a burst of logins or signups takes every core and the read
+endpoints queue behind it. ``hash_password`` and ``verify_password`` instead
+run the hasher in a small process pool, so at most ``PASSWORD_HASHING_WORKERS``
+cores ever hash at once. At most ``PASSWORD_HASHING_MAX_PENDING`` hashes may be
+running or queued per web process; beyond that, callers are turned away at once
+with ``PasswordHashingBusy`` (503 with Retry-After) instead of piling up.
+``PASSWORD_HASHING_WORKERS = 0`` hashes inline, still behind the pending limit.
+Bulk imports use ``hash_passwords`` with a pool of their own from
+``bulk_hashing_pool``, so they never queue ahead of logins.
+
+Argon2 costs come from the ``PASSWORD_ARGON2_*`` settings. Hashes made with
+other costs (or by another hasher) are rehashed on the next successful login.
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, get_hasher, get_hashers, get_hashers_by_algorithm, identify_hasher, is_password_usable,
+    make_password,
+)
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class TunableArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2 with its cost parameters read from settings."""
+
+    def __init__(self):
+        self.time_cost = settings.PASSWORD_ARGON2_TIME_COST
+        self.memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST  # KiB
+        self.parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+@receiver(setting_changed)
+def reset_hashers(*, setting, **kwargs):
+    if setting.startswith('PASSWORD_ARGON2_'):
+        get_hashers.cache_clear()
+        get_hashers_by_algorithm.cache_clear()
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins in progress. Please try again shortly.'
+    default_code = 'password_hashing_busy'
+    wait = 1  # Sent as Retry-After by DRF's exception handler
+
+
+def bulk_hashing_pool(workers):
+    """A process pool ready to run the password hashers."""
+    # Spawned, not forked, as the web process runs logging and cache threads. Workers
+    # set Django up before unpickling any hasher, since importing this module needs it.
+    return ProcessPoolExecutor(workers, mp_context=get_context('spawn'), initializer=django.setup)
+
+
+class HashingPool:
+    """Process pool plus the semaphore bounding hashes running or queued in it."""
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.executor = bulk_hashing_pool(workers) if workers else None
+
+    def run(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            logger.warning("Password hashing saturated, rejecting the request")
+            raise PasswordHashingBusy()
+        if self.executor is None:
+            try:
+                return function(*args)
+            finally:
+                self.slots.release()
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        # The slot is freed when the hash is done or cancelled, not when the caller gives up,
+        # so hashes still running after a timeout count against the limit
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+        except TimeoutError:
+            future.cancel()  # Still queued: it never runs
+            raise PasswordHashingBusy()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The hashing pool of this process, recreated after a fork or a settings change."""
+    global _pool, _pool_key
+    key = (os.getpid(), settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_MAX_PENDING)
+    with _pool_lock:
+        if _pool_key != key:
+            if _pool is not None and _pool_key[0] == key[0]:
+                _pool.shutdown()
+            _pool, _pool_key = HashingPool(*key[1:]), key
+        return _pool
+
+
+def _run(function, *args):
+    global _pool, _pool_key
+    pool = get_pool()
+    try:
+        return pool.run(function, *args)
+    except BrokenProcessPool as error:
+        logger.error("Password hashing pool died, starting a new one: %s", error)
+        with _pool_lock:
+            if _pool is pool:
+                _pool = _pool_key = None
+        raise PasswordHashingBusy()
+
+
+def hash_password(password):
+    """``make_password`` with the default hasher, computed in the pool."""
+    if password is None:
+        return make_password(None)  # Unusable password: nothing to hash
+    hasher = get_hasher()
+    return _run(hasher.encode, password, hasher.salt())
+
+
+def hash_passwords(passwords, executor=None):
+    """
+    ``make_password`` for many passwords, spread over ``executor`` (one from
+    ``bulk_hashing_pool``) or computed inline when it is None. None entries
+    get unusable passwords.
+    """
+    hasher = get_hasher()
+    usable = [(index, password) for index, password in enumerate(passwords) if password is not None]
+    encoded = [make_password(None) if password is None else None for password in passwords]
+    if not usable:
+        return encoded
+    indexes, plain = zip(*usable)
+    salts = [hasher.salt() for _ in plain]
+    if executor is None:
+        hashes = map(hasher.encode, plain, salts)
+    else:
+        # Each hash takes tens of milliseconds: small batches keep every worker busy to the end
+        hashes = executor.map(hasher.encode, plain, salts, chunksize=8)
+    for index, value in zip(indexes, hashes):
+        encoded[index] = value
+    return encoded
+
+
+def verify_password(password, encoded):
+    """
+    Check ``password`` against ``encoded`` in the pool.
+    Returns ``(valid, must_update)``; ``must_update`` is True when the hash
+    should be replaced because the default hasher or its costs changed.
+    """
+    if password is None or not is_password_usable(encoded):
+        return False, False
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False, False
+    valid = _run(hasher.verify, password, encoded)
+    preferred = get_hasher()
+    must_update = valid and (hasher.algorithm != preferred.algorithm or preferred.must_update(encoded))
+    return valid, must_update
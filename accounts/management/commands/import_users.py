@@ -0,0 +1,43 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.onboarding import IMPORT_CHUNK_SIZE, INPUT_FORMATS, import_users, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk import users (and their profiles) from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, or - for stdin.')
+        parser.add_argument('--format', choices=INPUT_FORMATS, dest='input_format',
+                            help='Input format (default: from the file extension).')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help='Rows checked, hashed and inserted together.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Password hashing processes (0 hashes in this process).')
+
+    def handle(self, *args, path, input_format, chunk_size, workers, **options):
+        if input_format is None:
+            input_format = os.path.splitext(path)[1].lstrip('.').lower()
+            if input_format not in INPUT_FORMATS:
+                raise CommandError('Cannot tell the format from the file name, pass --format.')
+
+        def progress(report):
+            self.stderr.write(f'{report.rows} rows, {report.created} created, {report.existing} existing, '
+                              f'{report.duplicates} duplicates, {report.invalid} invalid '
+                              f'({report.created / report.seconds:.0f} users/s)')
+
+        source = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        try:
+            report = import_users(read_rows(source, input_format), chunk_size, workers, progress)
+        finally:
+            if path != '-':
+                source.close()
+
+        for number, message in report.errors:
+            self.stderr.write(f'Row {number}: {message}')
+        summary = report.as_dict()
+        self.stdout.write(f"Created {summary['created']} of {summary['rows']} users in {summary['seconds']}s "
+                          f"({summary['users_per_second']} users/s).")
@@ -52,7 +52,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     It uses email as the unique identifier for authentication (instead of the default username).
     """
     
-    email = models.EmailField(unique=True)  # Unique email field
+    email = models.EmailField(unique=True)  # Unique email field (the unique constraint is its index)
     username = models.CharField(max_length=150, null=True, blank=True)  # Username is optional
     is_active = models.BooleanField(default=True)  # User's active status
     is_staff = models.BooleanField(default=False)  # Staff flag, determines if the user can access the admin site
@@ -66,15 +66,23 @@ class User(AbstractBaseUser, PermissionsMixin):
     # Attach the custom user manager
     objects = UserManager()
 
-    class Meta:
-        # Add an index on the 'email' field for faster lookups
-        indexes = [
-            models.Index(fields=['email']),  
-        ]
-        # Define the set of fields that should be used for a multi-field index
-        index_together = [
-            ('email',),
-        ]
+    def set_password(self, raw_password):
+        """Hash the password in the password hashing pool (accounts/hashing.py)"""
+        from .hashing import hash_password  # accounts.hashing imports DRF, which loads the auth classes
+
+        self.password = hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Verify in the hashing pool, rehashing when the stored hash uses outdated costs"""
+        from .hashing import verify_password
+
+        valid, must_update = verify_password(raw_password, self.password)
+        if must_update:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        return valid
 
     def __str__(self):
         """Return the user's email when the user is printed"""
@@ -109,6 +117,12 @@ class BlacklistedToken(models.Model):
     token = models.TextField()  # Store the entire JWT token as text
     created_at = models.DateTimeField(auto_now_add=True)  # Timestamp for when the token was blacklisted
 
+    class Meta:
+        indexes = [
+            # Looked up on every authenticated request
+            models.Index(fields=['token'], name='blacklistedtoken_token_idx'),
+        ]
+
     def __str__(self):
         """Return a string representation of the blacklisted token, showing its creation time"""
         return f"Blacklisted Token created at {self.created_at}"
@@ -0,0 +1,218 @@
+"""
+Bulk user onboarding from CSV or NDJSON.
+
+Registering users one by one costs an ``exists()`` query, an Argon2 hash and
+an INSERT each, which is far too slow for partner migrations of 100k users.
+``import_users`` streams the rows and works on chunks of ``chunk_size``:
+
+* rows are validated like ``RegisterSerializer`` does, and emails seen
+  earlier in the same file are skipped;
+* emails already registered are found with one ``in_bulk`` query per chunk
+  and skipped with set lookups;
+* passwords are hashed across a process pool (``accounts.hashing``);
+* users and their ``UserProfile`` rows are written with ``bulk_create`` in
+  one transaction per chunk.
+
+Columns (CSV header or NDJSON keys): ``email`` (required), ``username``,
+``password`` (optional, users without one get an unusable password until they
+reset it), ``address``, ``zipcode`` and ``phone_number``.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator
+from django.db import IntegrityError, transaction
+
+from core.utils import get_logger
+
+from .hashing import bulk_hashing_pool, hash_passwords
+from .models import UserProfile
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+logger = get_logger(__name__)
+User = get_user_model()
+
+INPUT_FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+PROFILE_FIELDS = {'address': 255, 'zipcode': 16, 'phone_number': 20}  # Field -> max length
+
+validate_email = EmailValidator()
+
+
+def read_rows(lines, input_format):
+    """
+    Parse an iterable of byte lines (a file opened in binary mode, or a
+    request body) into one dict per row, lazily.
+    Malformed NDJSON lines come out as ``ValueError`` instances, so they are
+    reported with the other invalid rows instead of stopping the import.
+    """
+    if input_format == 'csv':
+        yield from csv.DictReader(line.decode('utf-8-sig') for line in lines)
+        return
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError as error:
+            yield ValueError(f'Invalid JSON: {error}')
+
+
+class ImportReport:
+    """Running totals of an import, updated after every chunk."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = self.created = self.existing = self.duplicates = self.invalid = 0
+        self.errors = []  # (row number, message), the first MAX_REPORTED_ERRORS only
+
+    def reject(self, number, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((number, message))
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        seconds = self.seconds
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'existing': self.existing,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'errors': [{'row': number, 'error': message} for number, message in self.errors],
+            'seconds': round(seconds, 3),
+            'users_per_second': round(self.created / seconds, 1) if seconds else 0.0,
+        }
+
+
+def clean_row(row):
+    """Validated and normalized copy of one input row; raises ``ValueError``."""
+    if isinstance(row, Exception):
+        raise row
+    if not isinstance(row, dict):
+        raise ValueError('Row must be an object.')
+
+    email = (row.get('email') or '').strip()
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ValueError('Invalid email format.')
+
+    username = (row.get('username') or '').strip()
+    if len(username) > 150:
+        raise ValueError('Username is longer than 150 characters.')
+
+    password = row.get('password') or None
+    if password is not None:
+        password = str(password)
+        if len(password) < 6:
+            raise ValueError('Password must be at least 6 characters long.')
+        if not any(char.isdigit() for char in password) or not any(char.isalpha() for char in password):
+            raise ValueError('Password must contain both letters and numbers.')
+
+    cleaned = {'email': User.objects.normalize_email(email), 'username': username, 'password': password}
+    for field, max_length in PROFILE_FIELDS.items():
+        value = (str(row.get(field) or '')).strip() or None
+        if value is not None and len(value) > max_length:
+            raise ValueError(f'{field} is longer than {max_length} characters.')
+        cleaned[field] = value
+    return cleaned
+
+
+def clean_rows(rows, report):
+    """Valid rows whose email has not appeared earlier in the input."""
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        report.rows += 1
+        try:
+            cleaned = clean_row(row)
+        except ValueError as error:
+            report.reject(number, str(error))
+            continue
+        if cleaned['email'] in seen:
+            report.duplicates += 1
+            continue
+        seen.add(cleaned['email'])
+        yield cleaned
+
+
+def existing_emails(emails):
+    return User.objects.in_bulk(emails, field_name='email').keys()
+
+
+def insert_chunk(rows, passwords):
+    """Create the users of one chunk and their profiles in a single transaction."""
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(email=row['email'], username=row['username'], password=password)
+            for row, password in zip(rows, passwords)
+        ])
+        if users and users[0].pk is None:
+            # Backends that cannot return ids from a bulk insert: read them back
+            ids = User.objects.in_bulk([user.email for user in users], field_name='email')
+            for user in users:
+                user.pk = ids[user.email].pk
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, **{field: row[field] for field in PROFILE_FIELDS})
+            for user, row in zip(users, rows)
+        ])
+
+
+def import_chunk(rows, executor, report):
+    taken = existing_emails([row['email'] for row in rows])
+    fresh = [row for row in rows if row['email'] not in taken]
+    report.existing += len(rows) - len(fresh)
+    passwords = hash_passwords([row['password'] for row in fresh], executor)
+
+    while fresh:
+        try:
+            insert_chunk(fresh, passwords)
+        except IntegrityError:
+            # Someone registered one of these emails since the check: skip it and retry
+            taken = existing_emails([row['email'] for row in fresh])
+            if not taken:
+                raise
+            kept = [(row, password) for row, password in zip(fresh, passwords) if row['email'] not in taken]
+            report.existing += len(fresh) - len(kept)
+            fresh, passwords = [row for row, _ in kept], [password for _, password in kept]
+        else:
+            report.created += len(fresh)
+            break
+
+
+def import_users(rows, chunk_size=IMPORT_CHUNK_SIZE, workers=0, progress=None):
+    """
+    Import ``rows`` (dicts, e.g. from ``read_rows``) and return the
+    ``ImportReport``. Passwords are hashed over ``workers`` processes started
+    for this import (0 hashes in this process). ``progress`` is called with
+    the report after every chunk.
+    """
+    report = ImportReport()
+    executor = bulk_hashing_pool(workers) if workers else None
+    try:
+        cleaned = clean_rows(rows, report)
+        while chunk := list(islice(cleaned, chunk_size)):
+            import_chunk(chunk, executor, report)
+            if progress is not None:
+                progress(report)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    logger.info("Imported %s users from %s rows in %.1fs (%s existing, %s duplicates, %s invalid)",
+                report.created, report.rows, report.seconds, report.existing, report.duplicates, report.invalid)
+    return report
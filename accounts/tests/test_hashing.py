@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from accounts.hashing import HashingPool, PasswordHashingBusy, get_pool, hash_password, verify_password
+import logging
+
+User = get_user_model()
+
+# Cheap Argon2 costs keep the tests fast; the pool is exercised all the same
+FAST_ARGON2 = {'PASSWORD_ARGON2_TIME_COST': 1, 'PASSWORD_ARGON2_MEMORY_COST': 8192, 'PASSWORD_ARGON2_PARALLELISM': 1}
+
+
+@override_settings(**FAST_ARGON2)
+class PasswordHashingTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.login_url = reverse('accounts:login')
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+
+    def test_pool_hashes_with_configured_costs(self):
+        """Hashes made in the pool carry the Argon2 costs from settings."""
+        encoded = hash_password('Test1234')
+        self.assertTrue(encoded.startswith('argon2$argon2id$v=19$m=8192,t=1,p=1$'))
+        self.assertEqual(verify_password('Test1234', encoded), (True, False))
+        self.assertEqual(verify_password('wrong', encoded), (False, False))
+        self.assertEqual(verify_password('Test1234', '!unusable'), (False, False))
+
+    def test_login_upgrades_outdated_hashes(self):
+        """A successful login rehashes a password stored with older costs."""
+        with override_settings(PASSWORD_ARGON2_MEMORY_COST=16384):
+            response = self.client.post(self.login_url, {'email': 'investor@example.com', 'password': 'Test1234'},
+                                        format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertIn('$m=16384,t=1,p=1$', self.user.password)
+            self.assertTrue(self.user.check_password('Test1234'))
+
+    def test_failed_login_keeps_the_hash(self):
+        """Wrong passwords never trigger a rehash."""
+        before = self.user.password
+        with override_settings(PASSWORD_ARGON2_MEMORY_COST=16384):
+            response = self.client.post(self.login_url, {'email': 'investor@example.com', 'password': 'wrong1'},
+                                        format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, before)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_MAX_PENDING=1)
+    def test_saturated_pool_rejects_fast(self):
+        """With every hashing slot taken, logins and signups get a 503 with Retry-After."""
+        pool = get_pool()
+        pool.slots.acquire()  # A hash already in flight
+        try:
+            response = self.client.post(self.login_url, {'email': 'investor@example.com', 'password': 'Test1234'},
+                                        format='json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '1')
+
+            response = self.client.post(reverse('accounts:register_user'), {
+                'email': 'new@example.com', 'username': 'new', 'password1': 'Test1234', 'password2': 'Test1234',
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertFalse(User.objects.filter(email='new@example.com').exists())
+        finally:
+            pool.slots.release()
+
+        response = self.client.post(self.login_url, {'email': 'investor@example.com', 'password': 'Test1234'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_HASHING_TIMEOUT=0.05)
+    def test_timed_out_hashes_keep_their_slot_or_never_run(self):
+        """A hash still queued at the timeout is cancelled; one already running holds its slot until done."""
+        pool = HashingPool(0, 2)
+        pool.executor = ThreadPoolExecutor(1)  # One busy worker, without spawning processes
+        release, hashed = threading.Event(), []
+        try:
+            with self.assertRaises(PasswordHashingBusy):
+                pool.run(release.wait)
+            with self.assertRaises(PasswordHashingBusy):
+                pool.run(hashed.append, 'queued')
+            self.assertTrue(pool.slots.acquire(blocking=False))  # The cancelled hash gave its slot back
+            self.assertFalse(pool.slots.acquire(blocking=False))  # The running one still holds its own
+            pool.slots.release()
+        finally:
+            release.set()
+            pool.executor.shutdown(wait=True)
+        self.assertEqual(hashed, [])
+        self.assertTrue(pool.slots.acquire(blocking=False) and pool.slots.acquire(blocking=False))
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,116 @@
+import io
+import os
+import tempfile
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from accounts import onboarding
+from accounts.models import UserProfile
+from accounts.onboarding import import_users, read_rows
+import logging
+
+User = get_user_model()
+
+FAST_ARGON2 = {'PASSWORD_ARGON2_TIME_COST': 1, 'PASSWORD_ARGON2_MEMORY_COST': 8192, 'PASSWORD_ARGON2_PARALLELISM': 1}
+
+CSV = b"""\xef\xbb\xbfemail,username,password,address,zipcode,phone_number
+new1@example.com,new1,Secret123,1 Main St,560001,9999999999
+existing@example.com,dup,Secret123,,,
+new2@EXAMPLE.com,,,,,
+new1@example.com,again,Secret123,,,
+not-an-email,bad,Secret123,,,
+new3@example.com,weak,password,,,
+"""
+
+
+@override_settings(**FAST_ARGON2)
+class ImportUsersTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        User.objects.create_user(email='existing@example.com', username='existing', password='Test1234')
+        self.admin = User.objects.create_user(email='admin@example.com', username='admin', password='Test1234',
+                                              is_staff=True)
+        self.url = reverse('accounts:import_users')
+
+    def import_csv(self, workers=0):
+        with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as source:
+            source.write(CSV)
+        self.addCleanup(os.remove, source.name)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_users', source.name, workers=workers, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_command_skips_existing_duplicate_and_invalid_rows(self):
+        """Only new, valid, first-seen emails are created, each with a profile."""
+        stdout, stderr = self.import_csv()
+        self.assertIn('Created 2 of 6 users', stdout)
+        self.assertIn('Row 5: Invalid email format.', stderr)
+        self.assertIn('Row 6: Password must contain both letters and numbers.', stderr)
+
+        user = User.objects.get(email='new1@example.com')
+        self.assertTrue(user.check_password('Secret123'))
+        self.assertEqual(user.userprofile_user.zipcode, '560001')
+        # Domain normalized; no password given means an unusable one
+        self.assertFalse(User.objects.get(email='new2@example.com').has_usable_password())
+        self.assertEqual(User.objects.get(email='existing@example.com').username, 'existing')
+        self.assertEqual(UserProfile.objects.count(), 2)
+
+    def test_command_hashes_in_worker_processes(self):
+        """The process pool produces hashes that verify in the web process."""
+        self.import_csv(workers=1)
+        self.assertTrue(User.objects.get(email='new1@example.com').check_password('Secret123'))
+
+    def test_queries_do_not_grow_with_rows(self):
+        """A chunk costs one collision query and a few multi-row inserts, not queries per user."""
+        rows = [{'email': f'user{index}@example.com'} for index in range(200)]
+        with CaptureQueriesContext(connection) as queries:
+            report = import_users(rows, chunk_size=200)
+        self.assertEqual(report.created, 200)
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('SELECT'), 1)
+        self.assertLessEqual(statements.count('INSERT'), 4)  # SQLite caps the parameters per statement
+
+    def test_emails_taken_during_the_import_are_skipped(self):
+        """An email registered between the check and the insert is counted as existing."""
+        rows = [{'email': 'existing@example.com'}, {'email': 'late@example.com'}]
+        real = onboarding.existing_emails
+        with mock.patch.object(onboarding, 'existing_emails', side_effect=[set(), real(['existing@example.com'])]):
+            report = import_users(rows)
+        self.assertEqual((report.created, report.existing), (1, 1))
+        self.assertTrue(User.objects.filter(email='late@example.com').exists())
+
+    def test_api_imports_ndjson(self):
+        """Staff users can stream NDJSON to the import endpoint and get the report back."""
+        self.client.force_authenticate(self.admin)
+        body = b'{"email": "api1@example.com", "password": "Secret123"}\n\n{"email": "api2@example.com"}\n{oops\n'
+        response = self.client.generic('POST', self.url, body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()['data']
+        self.assertEqual((data['rows'], data['created'], data['invalid']), (3, 2, 1))
+        self.assertTrue(data['errors'][0]['error'].startswith('Invalid JSON'))
+
+    def test_api_requires_staff_and_a_known_format(self):
+        """Regular users are refused and unknown content types get a 400."""
+        self.client.force_authenticate(User.objects.get(email='existing@example.com'))
+        response = self.client.generic('POST', self.url, CSV, content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.generic('POST', self.url, CSV, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_read_rows_streams_csv(self):
+        """CSV rows are parsed line by line, with the byte order mark dropped."""
+        rows = read_rows(iter(CSV.splitlines(keepends=True)), 'csv')
+        self.assertEqual(next(rows)['email'], 'new1@example.com')
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,75 @@
+import time
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts import token_cache
+from accounts.token_cache import verified_tokens
+import logging
+
+User = get_user_model()
+
+
+class VerifiedTokenCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        verified_tokens.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.url = reverse('funds:user_portfolio')
+
+    def test_repeat_requests_skip_verification(self):
+        """The token is decoded and its signature checked once, then served from the cache."""
+        with mock.patch.object(TokenBackend, 'decode', autospec=True, side_effect=TokenBackend.decode) as decode:
+            codes = [self.client.get(self.url).status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 200])
+        self.assertEqual(decode.call_count, 1)
+
+        stats = verified_tokens.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (2, 1, 1))
+        self.assertIn('jwt_cache_lookups_total{result="hit"} 2', token_cache.render())
+
+    def test_logout_evicts_and_rejects_the_token(self):
+        """A blacklisted token is dropped from the cache and refused from then on."""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('accounts:logout_user'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(verified_tokens.stats()['size'], 0)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_entries_expire_with_the_token(self):
+        """Past its exp, a cached token is verified again and rejected."""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        with mock.patch.object(token_cache.time, 'time', return_value=time.time() + 2 * 86400):
+            self.assertIsNone(verified_tokens.get(self.token.encode()))
+        self.assertEqual(verified_tokens.stats()['size'], 0)
+
+    def test_tampered_tokens_are_not_served_from_the_cache(self):
+        """Only the exact bytes that were verified hit the cache."""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        # A character inside the signature: the last one carries padding bits that may not change the bytes
+        flipped = 'B' if self.token[-10] == 'A' else 'A'
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token[:-10]}{flipped}{self.token[-9:]}')
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_CACHE_SIZE=2)
+    def test_cache_is_bounded(self):
+        """Beyond JWT_CACHE_SIZE, the least recently used token is dropped."""
+        tokens = [str(AccessToken.for_user(self.user)).encode() for _ in range(3)]  # Distinct jti each
+        for token in tokens:
+            verified_tokens.put(token, AccessToken(token))
+        stats = verified_tokens.stats()
+        self.assertEqual((stats['size'], stats['evictions']), (2, 1))
+        self.assertIsNone(verified_tokens.get(tokens[0]))
+        self.assertIsNotNone(verified_tokens.get(tokens[2]))
+
+    def tearDown(self):
+        verified_tokens.clear()
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,107 @@
+"""
+Per-process cache of verified access tokens.
+
+Access tokens live for a day and chatty clients send the same one on every
+request, so verifying it again each time (base64 decoding, JSON parsing and
+the HMAC check) is wasted work. ``get`` returns the token validated earlier
+for the same raw bytes, until its ``exp``; ``put`` stores a freshly validated
+one. The cache is keyed by the SHA-256 digest of the raw token and holds at
+most ``JWT_CACHE_SIZE`` entries, dropping the least recently used first.
+``JWT_CACHE_SIZE = 0`` turns it off.
+
+Only the signature and claims checks are skipped: the user lookup and the
+blacklist query still run on every request, so a token revoked by another
+process is rejected all the same. ``evict`` drops a revoked token here too.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class VerifiedTokenCache:
+    """Thread-safe LRU of validated tokens, with hit and miss counters."""
+
+    def __init__(self):
+        self.entries = OrderedDict()  # digest -> (validated token, exp)
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def digest(raw_token):
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        """The validated token cached for ``raw_token``, or None."""
+        key = self.digest(raw_token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self.entries[key]  # Expired: verifying again raises the proper error
+            self.misses += 1
+            return None
+
+    def put(self, raw_token, validated_token):
+        size = settings.JWT_CACHE_SIZE
+        exp = validated_token.get('exp')
+        if size <= 0 or exp is None:
+            return
+        key = self.digest(raw_token)
+        with self.lock:
+            self.entries[key] = (validated_token, exp)
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def evict(self, raw_token):
+        with self.lock:
+            self.entries.pop(self.digest(raw_token), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+@receiver(setting_changed)
+def reset_token_cache(*, setting, **kwargs):
+    # Tokens verified under other signing settings must be checked again
+    if setting in ('SIMPLE_JWT', 'SECRET_KEY', 'JWT_CACHE_SIZE'):
+        verified_tokens.clear()
+
+
+def render():
+    """Cache counters of this process as Prometheus exposition text."""
+    stats = verified_tokens.stats()
+    return '\n'.join([
+        '# TYPE jwt_cache_lookups_total counter',
+        f'jwt_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'jwt_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+        '# TYPE jwt_cache_evictions_total counter',
+        f'jwt_cache_evictions_total {stats["evictions"]}',
+        '# TYPE jwt_cache_entries gauge',
+        f'jwt_cache_entries {stats["size"]}',
+    ]) + '\n'
@@ -1,11 +1,16 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import RegisterSerializer
 from rest_framework.serializers import ValidationError
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework_simplejwt.views import TokenObtainPairView
 from accounts.models import BlacklistedToken
+from accounts.hashing import PasswordHashingBusy
+from accounts.token_cache import verified_tokens
+from accounts.onboarding import CONTENT_TYPES, import_users, read_rows
 from core.utils import get_logger
 logger = get_logger(__name__)
 User = get_user_model()
@@ -21,7 +26,7 @@ class RegisterView(APIView):
             if serializer.is_valid():
                 user = serializer.save()  # Save the validated user data
 
-                logger.info(f"user logged in!")
+                logger.info("user logged in!")
                 # Success response with user details
                 return Response({
                     "user": {
@@ -44,9 +49,12 @@ class RegisterView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        except PasswordHashingBusy:
+            raise  # 503 with Retry-After from the exception handler
+
         except Exception as error:
             # Log any other unexpected exceptions
-            logger.exception(f"Exception is :  {error}")
+            logger.exception("Exception is :  %s", error)
             return Response({
                 'error': f"{error}",
                 'success': False},
@@ -54,6 +62,14 @@ class RegisterView(APIView):
             )
 
 
+class LoginView(TokenObtainPairView):
+    """
+    Token login with its own throttle bucket, so password guessing is capped
+    per client independently of the general anonymous quota.
+    """
+    throttle_scope = 'login'
+
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
 
@@ -71,6 +87,7 @@ class LogoutView(APIView):
 
             # Blacklist the token by storing it in the database
             BlacklistedToken.objects.create(token=token)
+            verified_tokens.evict(token.encode())
 
             # Return success message
             return Response({
@@ -84,3 +101,44 @@ class LogoutView(APIView):
                 'error': str(error),
                 'success': False
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+class UserImportView(APIView):
+    """
+    API view for bulk onboarding, the HTTP counterpart of `manage.py import_users`.
+    Restricted to staff users. The request body is read as a stream, so uploads
+    are not held in memory; very large migrations are better run with the command.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        """
+        Handle POST request with users as CSV (`text/csv`) or NDJSON
+        (`application/x-ndjson`) in the body. See `accounts.onboarding` for the columns.
+
+        Response:
+            - `200 OK` with the import report (counts, first row errors, throughput).
+            - `400 Bad Request` for another content type or an empty body.
+        """
+        input_format = CONTENT_TYPES.get(request.content_type.split(';')[0].strip())
+        if input_format is None or request.stream is None:
+            return Response({
+                'error': f"Send the users as {' or '.join(CONTENT_TYPES)}.",
+                'success': False
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            logger.info("User import (%s) started by user %s", input_format, request.user.id)
+            report = import_users(read_rows(request.stream, input_format), workers=settings.USER_IMPORT_WORKERS)
+            return Response({
+                'data': report.as_dict(),
+                'success': True
+            }, status=status.HTTP_200_OK)
+
+        except Exception as error:
+            logger.exception("Exception is :  %s", error)
+            return Response({
+                'error': f"{error}",
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
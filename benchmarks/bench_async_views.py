@@ -0,0 +1,102 @@
+"""
+Sync (WSGI, thread per request) vs async (ASGI) read endpoints.
+
+    python -m benchmarks.bench_async_views [--requests 2000] [--concurrency 200]
+
+The sync path is driven through the WSGI test client from a thread pool, the
+async path through the ASGI test client with that many requests in flight on
+one event loop. Both go through the full middleware stack. For a run against
+real servers, start for example
+
+    gunicorn MutualFundBroker.wsgi -w 4 --threads 8
+    uvicorn MutualFundBroker.asgi:application --workers 4
+
+and point a load generator (wrk, hey) at ``funds/api/v1/user-portfolio`` and
+``funds/api/v1/async/user-portfolio``.
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def seed(holdings):
+    from django.contrib.auth import get_user_model
+    from funds.models import FundFamily, MutualFund, Portfolio
+
+    user = get_user_model().objects.create_user(
+        email='bench@example.com', username='bench', password='Bench1234',
+    )
+    family = FundFamily.objects.create(name='Bench Mutual Fund')
+    funds = MutualFund.objects.bulk_create(
+        MutualFund(
+            scheme_code=code, scheme_name=f'Scheme {code}', nav=10.0 + code,
+            nav_date=date(2025, 4, 1), scheme_type='Open Ended Schemes',
+            scheme_category='Equity', fund_family=family,
+        )
+        for code in range(holdings)
+    )
+    Portfolio.objects.bulk_create(
+        Portfolio(user=user, mutual_fund=fund, units=1.5, invested_amount=15) for fund in funds
+    )
+    return user
+
+
+def run_sync(url, headers, requests, concurrency):
+    from django.test import Client
+
+    def fetch(_):
+        return Client().get(url, headers=headers).status_code
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(fetch, range(requests)))
+
+
+async def run_async(url, headers, requests, concurrency):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def fetch():
+        async with limit:
+            return (await client.get(url, headers=headers)).status_code
+
+    return await asyncio.gather(*(fetch() for _ in range(requests)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--holdings', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    # Benchmark the views, not the throttles.
+    rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+    with test_database(), override_settings(REST_FRAMEWORK=rest_framework):
+        user = seed(args.holdings)
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+        for label, sync_url, async_url in (
+            ('user-portfolio', '/funds/api/v1/user-portfolio', '/funds/api/v1/async/user-portfolio'),
+            ('list-fund-families', '/funds/api/v1/list-fund-families',
+             '/funds/api/v1/async/list-fund-families'),
+        ):
+            with timed(f"sync  {label} ({args.concurrency} threads)", args.requests):
+                codes = run_sync(sync_url, headers, args.requests, args.concurrency)
+            assert set(codes) == {200}, set(codes)
+            with timed(f"async {label} ({args.concurrency} in flight)", args.requests):
+                codes = asyncio.run(run_async(async_url, headers, args.requests, args.concurrency))
+            assert set(codes) == {200}, set(codes)
+
+
+if __name__ == '__main__':
+    main()
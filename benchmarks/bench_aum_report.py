@@ -0,0 +1,88 @@
+"""
+AUM report: streamed NumPy aggregation vs grouped ORM queries.
+
+    python -m benchmarks.bench_aum_report [--holdings 200000] [--chunk-size 10000]
+
+Holdings are bulk-inserted into a throwaway database. The report is built in
+one process. Peak Python memory is measured with tracemalloc in a second run
+and is bounded by --chunk-size, not by --holdings.
+"""
+import argparse
+import random
+import tracemalloc
+from datetime import date
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def populate(holdings, schemes=2000, users_per_scheme=None):
+    from django.contrib.auth import get_user_model
+    from funds.models import FundFamily, MutualFund, Portfolio
+
+    User = get_user_model()
+    rng = random.Random(42)
+    families = FundFamily.objects.bulk_create(FundFamily(name=f'Family {index}') for index in range(40))
+    funds = MutualFund.objects.bulk_create(
+        MutualFund(
+            scheme_code=index, scheme_name=f'Scheme {index}', nav=rng.uniform(10, 500), nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=families[index % len(families)],
+        )
+        for index in range(schemes)
+    )
+    users = User.objects.bulk_create(
+        User(email=f'user{index}@example.com', username=f'user{index}') for index in range(max(holdings // 5, 1))
+    )
+    batch = []
+    for _ in range(holdings):
+        batch.append(Portfolio(user=rng.choice(users), mutual_fund=rng.choice(funds),
+                               units=rng.uniform(1, 500), invested_amount=rng.uniform(500, 50000)))
+        if len(batch) == 10000:
+            Portfolio.objects.bulk_create(batch)
+            batch = []
+    Portfolio.objects.bulk_create(batch)
+
+
+def orm_report():
+    from django.db.models import Count, F, Sum
+    from funds.models import Portfolio
+
+    by_scheme = list(Portfolio.objects.values('mutual_fund__scheme_code').annotate(
+        holders=Count('user', distinct=True), invested=Sum('invested_amount'),
+        aum=Sum(F('units') * F('mutual_fund__nav'))))
+    by_family = list(Portfolio.objects.values('mutual_fund__fund_family__name').annotate(
+        holders=Count('user', distinct=True), invested=Sum('invested_amount'),
+        aum=Sum(F('units') * F('mutual_fund__nav'))))
+    by_user = list(Portfolio.objects.values('user_id').annotate(aum=Sum(F('units') * F('mutual_fund__nav'))))
+    return len(by_scheme) + len(by_family) + len(by_user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--holdings', type=int, default=200000)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--shards', type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from funds.reports import build_report
+
+        with timed(f'populate {args.holdings} holdings'):
+            populate(args.holdings)
+
+        with timed('ORM grouped queries (rows kept in memory)', args.holdings):
+            orm_report()
+
+        with timed(f'NumPy report, {args.shards} shards', args.holdings):
+            build_report(date(2025, 4, 2), args.shards, args.chunk_size)
+
+        # Separate run: tracing allocations slows the report down several times
+        tracemalloc.start()
+        build_report(date(2025, 4, 2), args.shards, args.chunk_size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'peak traced memory of the report: {peak / 2 ** 20:.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
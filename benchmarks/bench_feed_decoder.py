@@ -0,0 +1,84 @@
+"""
+Feed decoding throughput: the per-item path vs the column-wise decoder.
+
+    python -m benchmarks.bench_feed_decoder [--items 200000] [--serializer-items 2000] [--repeat 5]
+
+The per-item path is what the ingest did before ``funds.feed``: ``float()``
+and ``parse_date`` for every item, then a ``MutualFundSerializer`` to
+validate it. It is timed on fewer items (its cost is linear) and reported
+as a rate. ``decode_feed`` runs ``--repeat`` times and the best run is
+checked against the 500k records/s target.
+"""
+import argparse
+import random
+import time
+
+from benchmarks.common import setup_django, test_database, timed
+
+FAMILIES = [f'Family {index} Mutual Fund' for index in range(45)]
+CATEGORIES = ['Equity Scheme - Large Cap Fund', 'Debt Scheme - Liquid Fund', 'Hybrid Scheme - Arbitrage Fund']
+DATES = ['28-Mar-2025', '01-Apr-2025', '02-Apr-2025']
+TARGET_RATE = 500000  # records/s
+
+
+def make_feed(count):
+    return [{
+        'Scheme_Code': 100000 + index,
+        'ISIN_Div_Payout_ISIN_Growth': f'INF{index:09d}',
+        'ISIN_Div_Reinvestment': '-',
+        'Scheme_Name': f'Scheme {index} - Direct Plan - Growth',
+        'Net_Asset_Value': f'{random.uniform(10, 500):.4f}',
+        'Date': random.choice(DATES),
+        'Scheme_Type': 'Open Ended Schemes',
+        'Scheme_Category': random.choice(CATEGORIES),
+        'Mutual_Fund_Family': random.choice(FAMILIES),
+    } for index in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=200000)
+    parser.add_argument('--serializer-items', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from core.utils import parse_date
+    from funds.feed import decode_feed
+    from funds.serializers import MutualFundSerializer
+
+    feed = make_feed(args.items)
+    with test_database():
+        with timed(f'float + parse_date + serializer, {args.serializer_items:,}', args.serializer_items):
+            for item in feed[:args.serializer_items]:
+                MutualFundSerializer(data={
+                    'scheme_code': item['Scheme_Code'],
+                    'isin_growth': item.get('ISIN_Div_Payout_ISIN_Growth'),
+                    'isin_reinvestment': item.get('ISIN_Div_Reinvestment'),
+                    'scheme_name': item['Scheme_Name'],
+                    'nav': float(item['Net_Asset_Value']),
+                    'nav_date': parse_date(item['Date']),
+                    'scheme_type': item['Scheme_Type'],
+                    'scheme_category': item['Scheme_Category'],
+                    'fund_family_name': item['Mutual_Fund_Family'],
+                }).is_valid()
+
+    with timed(f'float + parse_date only, {args.items:,}', args.items):
+        for item in feed:
+            float(item['Net_Asset_Value']), parse_date(item['Date'])
+
+    best = None
+    for attempt in range(1, args.repeat + 1):
+        start = time.perf_counter()
+        with timed(f'decode_feed, {args.items:,}, run {attempt}', args.items):
+            records, failures = decode_feed(feed)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        assert len(records) == args.items and not failures
+        del records, failures
+    rate = args.items / best
+    print(f"{'decode_feed, best run':<45} {rate:26,.0f} ops/s  (target {TARGET_RATE:,})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Onboarding throughput: registering users one by one vs the bulk import.
+
+    python -m benchmarks.bench_import_users [--users 200] [--workers N]
+
+The one-by-one path runs ``RegisterSerializer`` per user (an ``exists()``
+check, a hash and an INSERT each) with hashing inline; the bulk path runs
+``import_users`` with a hashing pool of ``--workers`` processes. Both use the
+Argon2 costs from settings.
+"""
+import argparse
+import os
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from accounts.onboarding import import_users
+    from accounts.serializers import RegisterSerializer
+
+    with test_database(), override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_MAX_PENDING=1):
+        with timed(f'RegisterSerializer, {args.users} users', args.users):
+            for index in range(args.users):
+                serializer = RegisterSerializer(data={
+                    'email': f'one{index}@example.com', 'username': f'one{index}',
+                    'password1': 'Secret123', 'password2': 'Secret123',
+                })
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+
+        rows = ({'email': f'bulk{index}@example.com', 'password': 'Secret123'} for index in range(args.users))
+        with timed(f'import_users, {args.workers} workers', args.users):
+            report = import_users(rows, workers=args.workers)
+        assert report.created == args.users
+        print(f"{'  users in the database':<45} {get_user_model().objects.count():10,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Token authentication cost per request, with and without the verified-token cache.
+
+    python -m benchmarks.bench_jwt_cache [--requests 20000]
+
+Times ``BlacklistJWTAuthentication.get_validated_token`` for one client
+resending the same access token, which is what every authenticated request
+pays before the user lookup and blacklist query.
+"""
+import argparse
+
+from benchmarks.common import setup_django, timed
+
+
+def run(authenticator, raw_token, requests):
+    for _ in range(requests):
+        authenticator.get_validated_token(raw_token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from accounts.BlacklistJWTMiddleware import BlacklistJWTAuthentication
+    from accounts.token_cache import verified_tokens
+
+    raw_token = str(AccessToken.for_user(get_user_model()(id=1))).encode()
+    authenticator = BlacklistJWTAuthentication()
+
+    with override_settings(JWT_CACHE_SIZE=0), timed('verify on every request', args.requests):
+        run(authenticator, raw_token, args.requests)
+
+    verified_tokens.clear()
+    with timed('verified-token cache', args.requests):
+        run(authenticator, raw_token, args.requests)
+    print(f"{'  hit rate':<45} {verified_tokens.stats()['hit_rate']:10.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+FIFO redemptions and the realized-gains report on an account with many lots.
+
+    python -m benchmarks.bench_lots [--lots 5000] [--sales 200]
+
+Gives one user ``--lots`` purchases of one scheme, a day apart, then sells
+them off in ``--sales`` equal redemptions and times them, and times
+``LotBook.consume`` on its own over the same lots. Finally times the tax
+report over all the realized lots.
+"""
+import argparse
+from datetime import date, timedelta
+
+from benchmarks.common import setup_django, test_database, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lots', type=int, default=5000)
+    parser.add_argument('--sales', type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.contrib.auth import get_user_model
+        from django.utils import timezone
+        from funds.holdings import add_holding
+        from funds.lots import LotBook, realized_gains, redeem
+        from funds.models import FundFamily, MutualFund, Portfolio, RealizedLot
+
+        user = get_user_model().objects.create_user(email='bench@example.com', username='bench', password='Bench1234')
+        family = FundFamily.objects.create(name='Bench Mutual Fund')
+        fund = MutualFund.objects.create(
+            scheme_code=101, scheme_name='Bench Scheme', nav=25.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+        )
+        now = timezone.now()
+        Portfolio.objects.bulk_create(
+            Portfolio(user=user, mutual_fund=fund, units=1.5, invested_amount=15 + index % 10)
+            for index in range(args.lots)
+        )
+        for index, lot_id in enumerate(Portfolio.objects.order_by('id').values_list('id', flat=True)):
+            Portfolio.objects.filter(pk=lot_id).update(purchase_date=now - timedelta(days=args.lots - index))
+        add_holding(user.id, fund.id, 1.5 * args.lots, sum(15 + index % 10 for index in range(args.lots)))
+
+        lots = [(index, now - timedelta(days=args.lots - index), 1.5, 15.0) for index in range(args.lots)]
+        with timed(f'LotBook.consume, {args.lots:,} lots', args.lots):
+            book = LotBook(lots)
+            for _ in range(args.sales):
+                book.consume(1.5 * args.lots / args.sales)
+
+        with timed(f'{args.sales} redemptions over {args.lots:,} lots', args.sales):
+            for _ in range(args.sales):
+                redeem(user.id, fund, 1.5 * args.lots / args.sales)
+
+        realized = RealizedLot.objects.count()
+        with timed(f'realized_gains over {realized:,} realized lots'):
+            report = realized_gains(user.id)
+        print(f"{'total gain':<45} {report['total_gain']:13,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Cost of the NAV anomaly screen added to every ingest.
+
+    python -m benchmarks.bench_nav_anomalies [--schemes 50000] [--repeat 5]
+
+Builds a catalogue and a feed of ``--schemes`` schemes in memory, every NAV
+moved a little, decodes the feed with ``decode_feed`` (not timed) and times
+``screen_navs`` (array building plus the checks) and ``find_anomalies`` (the
+checks alone). No NAV is flagged, so nothing is written to the database.
+The best ``screen_navs`` run must stay within the 50 ms budget for 50,000
+schemes.
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import setup_django, timed
+
+BUDGET_MS = 50  # per 50,000 schemes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--schemes', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    import numpy as np
+    from funds.anomalies import find_anomalies, screen_navs
+    from funds.feed import decode_feed
+
+    today = date.today()
+    codes = random.sample(range(100000, 100000 + args.schemes * 4), args.schemes)
+    catalogue = [(index, code, random.uniform(10, 500), today - timedelta(days=1)) for index, code in enumerate(codes)]
+    random.shuffle(codes)
+    navs = {code: nav for _, code, nav, _ in catalogue}
+    records, failures = decode_feed([{
+        'Scheme_Code': code, 'Scheme_Name': f'Scheme {code}', 'Date': today.strftime('%d-%b-%Y'),
+        'Net_Asset_Value': f'{navs[code] * random.uniform(0.98, 1.02):.4f}', 'Scheme_Type': 'Open Ended Schemes',
+        'Scheme_Category': 'Equity', 'Mutual_Fund_Family': 'Axis Mutual Fund',
+    } for code in codes])
+    assert len(records) == args.schemes and not failures
+
+    best = None
+    for attempt in range(1, args.repeat + 1):
+        start = time.perf_counter()
+        with timed(f'screen_navs, {args.schemes:,} schemes, run {attempt}'):
+            assert len(screen_navs(records, catalogue)) == args.schemes
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+
+    arrays = (
+        np.array([record.scheme_code for record in records]), np.array([record.nav for record in records]),
+        np.full(args.schemes, today.toordinal()), np.array([row[1] for row in catalogue]),
+        np.array([row[2] for row in catalogue]), np.full(args.schemes, today.toordinal() - 1), today.toordinal(),
+    )
+    with timed(f'find_anomalies alone, {args.schemes:,} schemes'):
+        find_anomalies(*arrays)
+
+    budget = BUDGET_MS * args.schemes / 50000
+    assert best < budget, f'screen_navs took {best:.1f} ms, over the {budget:.0f} ms budget'
+
+
+if __name__ == '__main__':
+    main()
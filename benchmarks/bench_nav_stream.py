@@ -0,0 +1,71 @@
+"""
+Cost of idle NAV streams and of pushing an ingest's changes to them.
+
+    python -m benchmarks.bench_nav_stream [--streams 10000] [--watched 5] [--changes 500]
+
+Opens ``--streams`` event streams on one event loop, each watching
+``--watched`` of 2,000 schemes, and reads their first event so they sit idle
+the way connected clients do. Reports the memory held per idle stream, then
+publishes ``--changes`` NAV changes and times the hand-off to the hub and the
+round until every affected stream has produced its event. The scheme table is
+empty, so the first events are empty lists.
+"""
+import argparse
+import asyncio
+import gc
+import random
+import tracemalloc
+from datetime import date
+
+from benchmarks.common import setup_django, test_database, timed
+
+SCHEMES = 2000
+
+
+async def run(args):
+    from funds.nav_stream import NavEventStream, hub, nav_update, publish
+
+    tracemalloc.start()
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    streams = [NavEventStream(random.sample(range(SCHEMES), args.watched)) for _ in range(args.streams)]
+    events = [aiter(stream) for stream in streams]
+    with timed(f'open {args.streams:,} streams', args.streams):
+        for stream_events in events:
+            await anext(stream_events)
+    gc.collect()
+    per_stream = (tracemalloc.get_traced_memory()[0] - before) / args.streams
+    tracemalloc.stop()
+    print(f"{'memory per idle stream':<45} {per_stream:10,.0f} bytes")
+
+    updates = [nav_update(code, 11.0, date(2025, 4, 2)) for code in random.sample(range(SCHEMES), args.changes)]
+    changed = {update['scheme_code'] for update in updates}
+    affected = [
+        stream_events for stream, stream_events in zip(streams, events)
+        if stream.subscription.scheme_codes & changed
+    ]
+
+    with timed(f'publish {args.changes} changes', args.changes):
+        publish(updates)
+    with timed(f'write events of {len(affected):,} affected streams', len(affected)):
+        await asyncio.gather(*(anext(stream_events) for stream_events in affected))
+
+    for stream_events in events:
+        await stream_events.aclose()
+    assert hub.count() == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--streams', type=int, default=10000)
+    parser.add_argument('--watched', type=int, default=5)
+    parser.add_argument('--changes', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Login throughput and read latency under a login burst, inline vs pooled hashing.
+
+    python -m benchmarks.bench_password_hashing [--seconds 5] [--login-threads 16] [--read-threads 4]
+
+Login threads post to the login endpoint while read threads fetch the fund
+family list. It runs once with Argon2 on the request threads
+(PASSWORD_HASHING_WORKERS=0) and once with the hashing pool. Throttles are
+disabled so every request reaches the view.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.common import setup_django, test_database
+
+
+def load(seconds, login_threads, read_threads, token):
+    from django.test import Client
+
+    stop = time.perf_counter() + seconds
+    logins, rejected, latencies = [], [], []
+
+    def login():
+        client = Client()
+        while time.perf_counter() < stop:
+            code = client.post('/accounts/api/v1/login', {'email': 'bench@example.com', 'password': 'Bench1234'},
+                               content_type='application/json').status_code
+            (logins if code == 200 else rejected).append(code)  # 503 once the pool is saturated
+
+    def read():
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            assert client.get('/funds/api/v1/list-fund-families').status_code == 200
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=login) for _ in range(login_threads)]
+    threads += [threading.Thread(target=read) for _ in range(read_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return len(logins) / seconds, len(rejected), statistics.median(latencies), latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--login-threads', type=int, default=16)
+    parser.add_argument('--read-threads', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=max((os.cpu_count() or 2) // 2, 1))
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from funds.models import FundFamily
+
+    rest_framework = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_CLASSES': []}
+    with test_database(), override_settings(REST_FRAMEWORK=rest_framework):
+        from accounts.hashing import hash_password  # Imports the DRF views: only once throttles are off
+
+        FundFamily.objects.bulk_create(FundFamily(name=f'Family {index}') for index in range(50))
+        user = get_user_model().objects.create_user(email='bench@example.com', username='bench', password='Bench1234')
+        token = AccessToken.for_user(user)
+        print(f"{os.cpu_count()} CPUs, {args.login_threads} login threads, {args.read_threads} read threads")
+        for label, workers in (('inline hashing', 0), (f'hashing pool, {args.workers} workers', args.workers)):
+            pending = workers * 4 if workers else 1000  # Inline: no limit, like before
+            with override_settings(PASSWORD_HASHING_WORKERS=workers, PASSWORD_HASHING_MAX_PENDING=pending):
+                hash_password('warm up the pool')
+                rate, rejected, p50, p99 = load(args.seconds, args.login_threads, args.read_threads, token)
+            print(f"{label:<28} logins {rate:7.1f}/s  rejected {rejected:5}  reads p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
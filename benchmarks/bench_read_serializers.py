@@ -0,0 +1,73 @@
+"""
+ModelSerializer + JSONRenderer vs the values_list read serializers + FastJSONRenderer.
+
+    python -m benchmarks.bench_read_serializers [--rows 10000] [--repeat 5]
+
+Rows are built in memory, so only serialization and rendering are measured:
+model instances for the DRF path, ``values_list`` tuples for the fast path.
+"""
+import argparse
+import time
+from datetime import date
+
+from benchmarks.common import setup_django
+
+
+def best_of(repeat, function):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from core.renderers import FastJSONRenderer
+    from funds.models import FundFamily, MutualFund, Portfolio
+    from funds.serializers import (
+        FundFamilySerializer, PortfolioSerializer, FundFamilyReadSerializer, PortfolioReadSerializer,
+    )
+
+    families = [FundFamily(id=index, name=f'Fund Family {index}') for index in range(args.rows)]
+    family_rows = [(family.id, family.name) for family in families]
+
+    holdings = []
+    holding_rows = []
+    for index in range(args.rows):
+        fund = MutualFund(
+            id=index, scheme_code=100000 + index, scheme_name=f'Scheme {index} - Direct Growth',
+            nav=10 + index / 7, nav_date=date(2025, 4, 1),
+        )
+        holding = Portfolio(units=index / 3 + 1, invested_amount=1000.0 + index)
+        holding.mutual_fund = fund
+        holdings.append(holding)
+        holding_rows.append((fund.scheme_name, holding.units, holding.invested_amount, fund.nav))
+
+    cases = (
+        ('list-fund-families', FundFamilySerializer, families, FundFamilyReadSerializer, family_rows),
+        ('user-portfolio', PortfolioSerializer, holdings, PortfolioReadSerializer, holding_rows),
+    )
+    for label, drf_serializer, instances, read_serializer, rows in cases:
+        drf_time, drf_bytes = best_of(args.repeat, lambda: JSONRenderer().render(
+            {'data': drf_serializer(instances, many=True).data, 'success': True}
+        ))
+        fast_time, fast_bytes = best_of(args.repeat, lambda: FastJSONRenderer().render(
+            {'data': read_serializer(rows).data, 'success': True}
+        ))
+        assert drf_bytes == fast_bytes, f'{label}: outputs differ'
+        print(
+            f"{label:<20} {args.rows} rows  ModelSerializer {drf_time * 1000:8.1f} ms   "
+            f"read serializer {fast_time * 1000:7.1f} ms   speedup {drf_time / fast_time:5.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+SIP scheduler: sharded bulk execution vs one purchase per mandate.
+
+    python -m benchmarks.bench_sip [--mandates 100000] [--shards 8] [--baseline 2000]
+
+Bulk-inserts ``--mandates`` mandates due on one day, two per user over 2,000
+schemes, and runs the day's shards one after the other in this process.
+Each shard is one Celery task in production, so with several workers the
+wall time divides by the number running at once. For comparison, the first
+``--baseline`` mandates are also bought the way a client calling the
+purchase API would: one transaction per mandate.
+"""
+import argparse
+import random
+from datetime import date
+
+from benchmarks.common import setup_django, test_database, timed
+
+RUN_DATE = date(2025, 4, 5)
+
+
+def populate(mandates, schemes=2000):
+    from django.contrib.auth import get_user_model
+    from funds.models import FundFamily, MutualFund, SipMandate
+
+    User = get_user_model()
+    rng = random.Random(42)
+    family = FundFamily.objects.create(name='Bench Mutual Fund')
+    funds = MutualFund.objects.bulk_create(
+        MutualFund(
+            scheme_code=index, scheme_name=f'Scheme {index}', nav=rng.uniform(10, 500), nav_date=date(2025, 4, 4),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+        )
+        for index in range(schemes)
+    )
+    users = User.objects.bulk_create(
+        User(email=f'user{index}@example.com', username=f'user{index}') for index in range(max(mandates // 2, 1))
+    )
+    SipMandate.objects.bulk_create(
+        (
+            SipMandate(user=users[index // 2], mutual_fund=rng.choice(funds), amount=rng.choice((500, 1000, 5000)),
+                       day_of_month=RUN_DATE.day, next_run_date=RUN_DATE)
+            for index in range(mandates)
+        ),
+        batch_size=10000,
+    )
+
+
+def buy_one_by_one(mandates):
+    """What clients do today: one purchase transaction per instalment."""
+    from django.db import transaction
+    from funds.holdings import add_holding
+    from funds.models import Portfolio
+    from funds.valuation import record_purchase
+
+    for mandate in mandates:
+        fund = mandate.mutual_fund
+        units = round(mandate.amount / fund.nav, 3)
+        with transaction.atomic():
+            Portfolio.objects.create(user_id=mandate.user_id, mutual_fund=fund, units=units,
+                                     invested_amount=mandate.amount)
+            add_holding(mandate.user_id, fund.id, units, mandate.amount)
+            record_purchase(mandate.user_id, fund, units, mandate.amount)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mandates', type=int, default=100000)
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--baseline', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.db import transaction
+        from funds.models import Portfolio, SipMandate
+        from funds.sip import execute_shard, price_snapshot, shard_bounds
+
+        with timed(f'populate {args.mandates:,} mandates'):
+            populate(args.mandates)
+
+        baseline = list(SipMandate.objects.select_related('mutual_fund').order_by('id')[:args.baseline])
+        with timed(f'one transaction per mandate, {len(baseline):,}', len(baseline)):
+            with transaction.atomic():
+                buy_one_by_one(baseline)
+                transaction.set_rollback(True)
+
+        with timed('trigger: shard bounds and NAV snapshot'):
+            bounds = shard_bounds(RUN_DATE, args.shards)
+            prices = price_snapshot(RUN_DATE)
+        with timed(f'{len(bounds)} shards, {args.mandates:,} mandates', args.mandates):
+            for start, stop in bounds:
+                execute_shard(start, stop, RUN_DATE, prices)
+        assert Portfolio.objects.count() == args.mandates
+
+
+if __name__ == '__main__':
+    main()
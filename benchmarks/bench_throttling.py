@@ -0,0 +1,57 @@
+"""
+Per-request throttle cost: DRF's timestamp-history throttle vs the token bucket.
+
+    python -m benchmarks.bench_throttling [--checks 20000]
+
+Both throttles check one authenticated client against a quota it never
+exhausts, so every request is allowed and the history throttle's list keeps
+growing. Set THROTTLE_REDIS_URL to also time the shared Redis bucket.
+"""
+import argparse
+import os
+from unittest import mock
+
+from benchmarks.common import setup_django, timed
+
+RATES = {'user': '1000000/day', 'read': '1000000/day'}
+
+
+def run(throttle_class, request, checks):
+    view = mock.Mock(throttle_scope='read')
+    for _ in range(checks):
+        assert throttle_class().allow_request(request, view)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--checks', type=int, default=20000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.test import RequestFactory, override_settings
+    from rest_framework.throttling import UserRateThrottle
+    from core.throttling import UserTokenBucketThrottle
+
+    request = RequestFactory().get('/funds/api/v1/user-portfolio')
+    request.user = mock.Mock(is_authenticated=True, pk=1)
+
+    with mock.patch.object(UserRateThrottle, 'THROTTLE_RATES', RATES), \
+            mock.patch.object(UserTokenBucketThrottle, 'THROTTLE_RATES', RATES):
+        cache.clear()
+        with timed('DRF UserRateThrottle, local-memory cache', args.checks):
+            run(UserRateThrottle, request, args.checks)
+        print(f"{'  history kept for the client':<45} {len(cache.get('throttle_user_1')):10,} timestamps")
+
+        cache.clear()
+        with override_settings(THROTTLE_REDIS_URL=None), timed('token bucket, local-memory cache', args.checks):
+            run(UserTokenBucketThrottle, request, args.checks)
+        print(f"{'  state kept for the client':<45} {len(cache.get('throttle_user_1')):10,} numbers")
+
+        if os.getenv('THROTTLE_REDIS_URL'):
+            with timed('token bucket, Redis script', args.checks):
+                run(UserTokenBucketThrottle, request, args.checks)
+
+
+if __name__ == '__main__':
+    main()
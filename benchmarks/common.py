@@ -0,0 +1,45 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks are plain scripts, run from the project root with for example
+``python -m benchmarks.bench_async_views``. They build a throwaway test
+database, so they never touch ``db.sqlite3``.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MutualFundBroker.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create the test database (and test environment) for the duration of the block."""
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0, interactive=False)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+@contextmanager
+def timed(label, operations=None):
+    """Print the wall time of the block, and the rate when ``operations`` is given."""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if operations:
+        print(f"{label:<45} {elapsed * 1000:10.1f} ms  {operations / elapsed:12,.0f} ops/s")
+    else:
+        print(f"{label:<45} {elapsed * 1000:10.1f} ms")
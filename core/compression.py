@@ -0,0 +1,168 @@
+"""
+Response compression with content negotiation.
+
+``CompressionMiddleware`` picks brotli (when the ``brotli`` package is
+installed) or gzip from the request's ``Accept-Encoding``, honouring q-values.
+Regular responses below ``MIN_LENGTH`` bytes are sent as they are. Streaming
+responses are compressed chunk by chunk with a flush after each chunk, so
+they stay incremental and memory stays bounded. Levels are tuned for API
+payloads: most of the size reduction for a fraction of the CPU cost of the
+maximum levels.
+
+The middleware is sync and async capable. Under ASGI it awaits the view
+directly, so async views and event streams are not moved onto the single
+thread that sync middleware would run on, and async streaming content is
+wrapped without being consumed.
+"""
+import re
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULTS = {
+    'GZIP_LEVEL': 5,
+    'BROTLI_QUALITY': 4,
+    'MIN_LENGTH': 1024,
+    # Prefixes of compressible content types. Event streams are left alone.
+    'CONTENT_TYPES': ('application/json', 'application/x-ndjson', 'text/csv', 'text/html', 'text/plain'),
+}
+
+_ACCEPT_ENCODING = re.compile(r'\s*([\w*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'RESPONSE_COMPRESSION', {}))
+    return config
+
+
+def negotiate_encoding(accept_encoding, brotli_available=None):
+    """Return ``'br'``, ``'gzip'`` or ``None`` for an ``Accept-Encoding`` header."""
+    if brotli_available is None:
+        brotli_available = brotli is not None
+    weights = {}
+    for part in accept_encoding.split(','):
+        match = _ACCEPT_ENCODING.fullmatch(part)
+        if match:
+            try:
+                weights[match[1].lower()] = float(match[2]) if match[2] else 1.0
+            except ValueError:
+                continue
+    wildcard = weights.get('*', 0.0)
+    candidates = ['br', 'gzip'] if brotli_available else ['gzip']
+    best, best_weight = None, 0.0
+    for encoding in candidates:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class GzipStream:
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliStream:
+    def __init__(self, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_config()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        # process_response only wraps streams and compresses small bodies, so it
+        # runs on the event loop
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def make_stream(self, encoding):
+        if encoding == 'br':
+            return BrotliStream(self.config['BROTLI_QUALITY'])
+        return GzipStream(self.config['GZIP_LEVEL'])
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(tuple(self.config['CONTENT_TYPES'])):
+            return response
+        if not response.streaming and len(response.content) < self.config['MIN_LENGTH']:
+            return response
+
+        # The representation now depends on Accept-Encoding, compressed or not.
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        stream = self.make_stream(encoding)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async(stream, response.streaming_content)
+            else:
+                response.streaming_content = self.compress_sequence(stream, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = stream.compress(response.content) + stream.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # A strong ETag no longer matches the bytes on the wire.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compress_sequence(stream, chunks):
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
+
+    @staticmethod
+    async def compress_async(stream, chunks):
+        async for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.finish()
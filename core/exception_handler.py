@@ -28,13 +28,13 @@ def custom_exception_handler(exc, context):
         # Modify response if it was already handled by DRF's default handler
         response.data['success'] = False
         response.data['status_code'] = response.status_code
-        logger.error(f"Handled Exception: {exc}")
+        logger.error("Handled Exception: %s", exc)
     else:
         # If exception wasn't handled by DRF, handle specific known exceptions
 
         # Handle ObjectDoesNotExist (404 error)
         if isinstance(exc, (ObjectDoesNotExist, DRFObjectDoesNotExist)):
-            logger.warning(f"Object Not Found: {exc}")
+            logger.warning("Object Not Found: %s", exc)
             return Response({
                 'success': False,
                 'error': 'Resource not found.',
@@ -43,7 +43,7 @@ def custom_exception_handler(exc, context):
 
         # Handle ValidationError (400 error)
         if isinstance(exc, ValidationError):
-            logger.warning(f"Validation Error: {exc}")
+            logger.warning("Validation Error: %s", exc)
             return Response({
                 'success': False,
                 'error': str(exc),
@@ -52,7 +52,7 @@ def custom_exception_handler(exc, context):
 
         # Handle AuthenticationFailed (401 error)
         if isinstance(exc, AuthenticationFailed):
-            logger.warning(f"Authentication Failed: {exc}")
+            logger.warning("Authentication Failed: %s", exc)
             return Response({
                 'success': False,
                 'error': 'Authentication credentials were not provided.',
@@ -61,7 +61,7 @@ def custom_exception_handler(exc, context):
 
         # Handle PermissionDenied (403 error)
         if isinstance(exc, PermissionDenied):
-            logger.warning(f"Permission Denied: {exc}")
+            logger.warning("Permission Denied: %s", exc)
             return Response({
                 'success': False,
                 'error': 'You do not have permission to perform this action.',
@@ -69,7 +69,7 @@ def custom_exception_handler(exc, context):
             }, status=status.HTTP_403_FORBIDDEN)
 
         # If the exception is not caught, return a 500 server error
-        logger.exception(f"Unhandled server error: {exc}")
+        logger.exception("Unhandled server error: %s", exc)
         return Response({
             'success': False,
             'error': 'Internal server error. Please try again later.',
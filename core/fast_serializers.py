@@ -0,0 +1,79 @@
+"""
+Read-only serializers for high-volume list endpoints.
+
+A ``ValuesSerializer`` works from ``values_list()`` tuples instead of model
+instances and DRF fields. Each subclass declares its output in ``fields`` and
+gets a generated ``to_representation(row)`` that builds the dict with one
+literal expression, so serializing a row costs about as much as a dict display.
+The output matches the equivalent ``ModelSerializer`` field for field.
+"""
+from django.db.models import QuerySet
+
+
+class Computed:
+    """A field computed from one or more source columns."""
+
+    def __init__(self, function, *sources):
+        self.function = function
+        self.sources = sources
+
+
+def iso_date(value):
+    """Same representation as DRF's ``DateField`` with the default format."""
+    return value.isoformat() if value is not None else None
+
+
+class ValuesSerializer:
+    """
+    Subclasses set ``fields``: a dict of output key to either a
+    ``values_list`` lookup (``'mutual_fund__nav'``) or a ``Computed``.
+
+    ``Serializer(queryset_or_rows).data`` returns a list of dicts. A queryset is
+    narrowed with ``values_list(*columns)``; anything else must already be an
+    iterable of tuples in ``columns`` order (e.g. a paginated page).
+    """
+
+    fields = {}
+    columns = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.columns, cls.to_representation = cls.compile(cls.fields)
+
+    @staticmethod
+    def compile(fields):
+        columns = []
+        namespace = {}
+        items = []
+
+        def column(source):
+            if source not in columns:
+                columns.append(source)
+            return f'row[{columns.index(source)}]'
+
+        for index, (name, source) in enumerate(fields.items()):
+            if isinstance(source, Computed):
+                namespace[f'_f{index}'] = source.function
+                arguments = ', '.join(column(column_name) for column_name in source.sources)
+                items.append(f'{name!r}: _f{index}({arguments})')
+            else:
+                items.append(f'{name!r}: {column(source)}')
+
+        code = 'def to_representation(row):\n    return {%s}\n' % ', '.join(items)
+        exec(code, namespace)
+        return tuple(columns), staticmethod(namespace['to_representation'])
+
+    @classmethod
+    def queryset(cls, queryset):
+        """Narrow ``queryset`` to the tuples this serializer reads."""
+        return queryset.values_list(*cls.columns)
+
+    def __init__(self, instance):
+        self.instance = instance
+
+    @property
+    def data(self):
+        rows = self.instance
+        if isinstance(rows, QuerySet):
+            rows = self.queryset(rows)
+        return list(map(self.to_representation, rows))
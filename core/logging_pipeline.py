@@ -0,0 +1,146 @@
+"""
+Non-blocking logging pipeline.
+
+Request threads only format the message and push the record onto a bounded
+in-memory queue; a background ``QueueListener`` thread serializes it as one
+line of compact JSON and writes it to a size-rotated file. When the queue is
+full the record is dropped (and counted) instead of blocking the caller.
+"""
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import weakref
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class JSONFormatter(logging.Formatter):
+    """Render a record as a single compact JSON object."""
+
+    def format(self, record):
+        payload = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc'] = record.exc_text
+        if record.stack_info:
+            payload['stack'] = record.stack_info
+        return json.dumps(payload, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in ``rate`` records below ``level`` for each message template.
+    Records at or above ``level`` always pass.
+    """
+
+    def __init__(self, rate=100, level='INFO'):
+        super().__init__()
+        self.rate = max(int(rate), 1)
+        self.level = logging._checkLevel(level)
+        self._counters = {}
+
+    def filter(self, record):
+        if record.levelno >= self.level or self.rate == 1:
+            return True
+        key = (record.name, record.msg)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, count())
+        return next(counter) % self.rate == 0
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    ``QueueHandler`` that owns its ``RotatingFileHandler`` and listener thread.
+
+    Usable straight from ``LOGGING`` through the ``()`` factory key; the
+    formatter configured for the handler is applied on the listener thread.
+    """
+
+    def __init__(self, filename, max_bytes=50 * 1024 * 1024, backup_count=5, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.target = RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True,
+        )
+        self._listener_lock = threading.Lock()
+        self._closed = False
+        self._start_listener()
+        _open_handlers.add(self)
+
+    def _start_listener(self):
+        self.listener = QueueListener(self.queue, self.target)
+        self.listener.start()
+
+    def _stop_listener(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def _restart_after_fork(self):
+        self._listener_lock = threading.Lock()
+        self.queue = queue.Queue(self.queue_size)
+        self._start_listener()
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Merge the arguments now, since they may be mutated once the caller
+        # moves on, and keep the traceback as text for the formatter.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until every queued record has been written."""
+        with self._listener_lock:
+            if not self._closed:
+                self._stop_listener()
+                self.target.flush()
+                self._start_listener()
+
+    def close(self):
+        with self._listener_lock:
+            self._closed = True
+            _open_handlers.discard(self)
+            self._stop_listener()
+            self.target.close()
+        super().close()
+
+
+# Forked children (Celery prefork, process pools) do not inherit listener
+# threads, so each open handler gets a new queue and listener in the child.
+# One hook for the module: handlers are only weakly referenced, so closed or
+# dropped ones are neither kept alive nor restarted.
+_open_handlers = weakref.WeakSet()
+
+
+def _restart_listeners_after_fork():
+    for handler in list(_open_handlers):
+        if not handler._closed:
+            handler._restart_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listeners_after_fork)
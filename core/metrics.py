@@ -0,0 +1,139 @@
+"""
+Celery queue depth and task latency metrics in the Prometheus text format.
+
+Workers record, per task, how long messages waited in the queue (from the
+``published_at`` header stamped when the task is sent to run start) and how
+long the task ran, as fixed-bucket histograms, plus a count per final state.
+Everything is a cache counter, so with ``CACHE_URL`` pointing at Redis every
+web and worker process adds to the same series. Series are keyed by task name
+only, which keeps their number bounded by the registered tasks. Queue depth is
+read from the broker when ``/metrics/`` is scraped (``core.views.MetricsView``).
+Workers import this module at startup, so it stays free of the view layer.
+"""
+import time
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bounds in seconds; ingest runs sit in the last buckets, user-facing tasks in the first
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800)
+HISTOGRAMS = ('queue_wait', 'runtime')
+STATES = ('SUCCESS', 'FAILURE', 'RETRY')
+PREFIX = 'metrics:celery'
+
+
+def _incr(key, amount=1):
+    if not cache.add(key, amount, timeout=None):
+        try:
+            cache.incr(key, amount)
+        except ValueError:  # Expired or evicted between add and incr
+            cache.add(key, amount, timeout=None)
+
+
+def observe(histogram, task_name, seconds):
+    """Record one observation; sums are kept in whole milliseconds so Redis can INCRBY them."""
+    seconds = max(seconds, 0.0)
+    bucket = bisect_left(LATENCY_BUCKETS, seconds)  # len(LATENCY_BUCKETS) is +Inf
+    _incr(f'{PREFIX}:{histogram}:{task_name}:{bucket}')
+    _incr(f'{PREFIX}:{histogram}:{task_name}:sum_ms', round(seconds * 1000))
+
+
+def count_state(task_name, state):
+    if state in STATES:
+        _incr(f'{PREFIX}:state:{task_name}:{state}')
+
+
+def connect_celery_signals():
+    """Stamp published tasks and time task runs in the worker."""
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    started = {}
+
+    @before_task_publish.connect(weak=False, dispatch_uid='core.metrics.stamp')
+    def stamp(headers=None, **kwargs):
+        if headers is not None:
+            headers.setdefault('published_at', time.time())
+
+    @task_prerun.connect(weak=False, dispatch_uid='core.metrics.start')
+    def start(task_id=None, task=None, **kwargs):
+        started[task_id] = time.monotonic()
+        published_at = getattr(task.request, 'published_at', None)
+        if published_at is not None:
+            observe('queue_wait', task.name, time.time() - published_at)
+
+    @task_postrun.connect(weak=False, dispatch_uid='core.metrics.finish')
+    def finish(task_id=None, task=None, state=None, **kwargs):
+        began = started.pop(task_id, None)
+        if began is not None:
+            observe('runtime', task.name, time.monotonic() - began)
+        count_state(task.name, state)
+
+
+def task_names(app):
+    app.loader.import_default_modules()  # Web processes import task modules lazily
+    return sorted(name for name in app.tasks if not name.startswith('celery.'))
+
+
+def queue_depths(app):
+    """Messages waiting in each configured queue, or ``None`` when the broker is unreachable."""
+    depths = {}
+    try:
+        with app.connection_for_read() as connection:
+            connection.ensure_connection(max_retries=1)
+            for name in app.amqp.queues:
+                # A fresh channel per queue: a failed passive declare closes it on AMQP
+                with connection.channel() as channel:
+                    try:
+                        depths[name] = channel.queue_declare(name, passive=True).message_count
+                    except connection.channel_errors:
+                        depths[name] = 0  # Not declared yet, so nothing was published to it
+    except Exception as error:
+        logger.warning("Could not read Celery queue depths: %s", error)
+        return None
+    return depths
+
+
+def render(app):
+    """All metrics as Prometheus exposition text."""
+    names = task_names(app)
+    keys = [
+        f'{PREFIX}:{histogram}:{name}:{suffix}'
+        for histogram in HISTOGRAMS for name in names
+        for suffix in (*range(len(LATENCY_BUCKETS) + 1), 'sum_ms')
+    ]
+    keys += [f'{PREFIX}:state:{name}:{state}' for name in names for state in STATES]
+    values = cache.get_many(keys)
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        metric = f'celery_task_{histogram}_seconds'
+        lines.append(f'# TYPE {metric} histogram')
+        for name in names:
+            key = f'{PREFIX}:{histogram}:{name}'
+            queue = app.amqp.router.route({}, name)['queue'].name
+            labels = f'task="{name}",queue="{queue}"'
+            total = 0
+            for bucket, bound in enumerate((*LATENCY_BUCKETS, '+Inf')):
+                total += values.get(f'{key}:{bucket}', 0)
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {total}')
+            lines.append(f'{metric}_sum{{{labels}}} {values.get(f"{key}:sum_ms", 0) / 1000}')
+            lines.append(f'{metric}_count{{{labels}}} {total}')
+
+    lines.append('# TYPE celery_tasks_total counter')
+    for name in names:
+        for state in STATES:
+            count = values.get(f'{PREFIX}:state:{name}:{state}', 0)
+            lines.append(f'celery_tasks_total{{task="{name}",state="{state}"}} {count}')
+
+    depths = queue_depths(app)
+    lines.append('# TYPE celery_broker_up gauge')
+    lines.append(f'celery_broker_up {int(depths is not None)}')
+    lines.append('# TYPE celery_queue_depth gauge')
+    for queue, depth in (depths or {}).items():
+        lines.append(f'celery_queue_depth{{queue="{queue}"}} {depth}')
+    return '\n'.join(lines) + '\n'
+
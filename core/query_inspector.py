@@ -0,0 +1,213 @@
+"""
+Opt-in query inspection for development and staging.
+
+Every statement sent through the database connections is passed through an
+``execute_wrapper`` and grouped by its normalized SQL, so repeated identical
+query shapes (the usual N+1 signature) and slow statements can be reported
+together with the line of project code that issued them.
+
+Enable it with ``QUERY_INSPECTOR_ENABLED=True`` in the environment. Requests
+are inspected by ``QueryInspectorMiddleware`` and Celery tasks through
+``connect_celery_signals``. Tests can use ``assert_no_n_plus_one``.
+"""
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from contextlib import ExitStack, contextmanager
+
+import django
+import rest_framework
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_THRESHOLD = 5
+DEFAULT_SLOW_QUERY_MS = 200
+
+# Frames from these packages are never reported as the offending call site.
+_IGNORED_PATHS = tuple(
+    os.path.dirname(package.__file__) for package in (django, rest_framework)
+)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+QueryShape = namedtuple('QueryShape', ['sql', 'count', 'duration_ms', 'call_site'])
+
+
+def get_config():
+    """Return the ``QUERY_INSPECTOR`` settings merged with the defaults."""
+    config = {
+        'ENABLED': False,
+        'THRESHOLD': DEFAULT_THRESHOLD,
+        'SLOW_QUERY_MS': DEFAULT_SLOW_QUERY_MS,
+    }
+    config.update(getattr(settings, 'QUERY_INSPECTOR', {}))
+    return config
+
+
+def normalize_sql(sql):
+    """
+    Reduce a statement to its shape: literals and placeholders become ``?``,
+    ``IN`` lists collapse to a single marker and whitespace is squashed.
+    """
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def find_call_site():
+    """Return ``path:line in function`` for the innermost project frame."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename != __file__
+            and not filename.startswith(_IGNORED_PATHS)
+            and 'site-packages' not in filename
+            and not filename.startswith('<')
+        ):
+            return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryInspector:
+    """
+    Collects query statistics for one unit of work (a request or a task).
+
+    Use it as a context manager; the wrapper is installed on every configured
+    database alias for the current thread and removed again on exit.
+    """
+
+    def __init__(self, label, threshold=None, slow_query_ms=None):
+        config = get_config()
+        self.label = label
+        self.threshold = config['THRESHOLD'] if threshold is None else threshold
+        self.slow_query_ms = config['SLOW_QUERY_MS'] if slow_query_ms is None else slow_query_ms
+        self.shapes = {}
+        self.slow_queries = []
+        self.total = 0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.record(sql, duration_ms)
+
+    def record(self, sql, duration_ms):
+        self.total += 1
+        shape = normalize_sql(sql)
+        stats = self.shapes.get(shape)
+        if stats is None:
+            stats = self.shapes[shape] = [0, 0.0, None]
+        stats[0] += 1
+        stats[1] += duration_ms
+
+        # Walking the stack is expensive, so only do it once per shape, at
+        # the moment it crosses the threshold, or for slow statements.
+        if stats[0] == self.threshold + 1:
+            stats[2] = find_call_site()
+        if duration_ms >= self.slow_query_ms:
+            self.slow_queries.append(QueryShape(shape, 1, duration_ms, find_call_site()))
+
+    @property
+    def offenders(self):
+        """Query shapes repeated more than ``threshold`` times, worst first."""
+        found = [
+            QueryShape(sql, count, duration_ms, call_site)
+            for sql, (count, duration_ms, call_site) in self.shapes.items()
+            if count > self.threshold
+        ]
+        return sorted(found, key=lambda shape: shape.count, reverse=True)
+
+    def report(self):
+        """Log repeated shapes and slow statements; return the offenders."""
+        offenders = self.offenders
+        for shape in offenders:
+            logger.warning(
+                "Possible N+1 in %s: %d identical queries (%.1fms) from %s: %s",
+                self.label, shape.count, shape.duration_ms, shape.call_site, shape.sql,
+            )
+        for shape in self.slow_queries:
+            logger.warning(
+                "Slow query in %s: %.1fms from %s: %s",
+                self.label, shape.duration_ms, shape.call_site, shape.sql,
+            )
+        return offenders
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._stack.close()
+        self._stack = None
+        return False
+
+
+class QueryInspectorMiddleware:
+    """Inspect the queries of every request when the inspector is enabled."""
+
+    def __init__(self, get_response):
+        if not get_config()['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryInspector(f"{request.method} {request.path}") as inspector:
+            response = self.get_response(request)
+        inspector.report()
+        return response
+
+
+def connect_celery_signals():
+    """Inspect each Celery task run in a worker when the inspector is enabled."""
+    from celery.signals import task_postrun, task_prerun
+
+    running = {}
+
+    @task_prerun.connect(weak=False)
+    def start_inspection(task_id=None, task=None, **kwargs):
+        if get_config()['ENABLED']:
+            inspector = QueryInspector(f"task {task.name}")
+            inspector.__enter__()
+            running[task_id] = inspector
+
+    @task_postrun.connect(weak=False)
+    def finish_inspection(task_id=None, **kwargs):
+        inspector = running.pop(task_id, None)
+        if inspector is not None:
+            inspector.__exit__(None, None, None)
+            inspector.report()
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold=DEFAULT_THRESHOLD):
+    """
+    Test helper: fail when any query shape inside the block repeats more than
+    ``threshold`` times.
+    """
+    with QueryInspector('test', threshold=threshold, slow_query_ms=float('inf')) as inspector:
+        yield inspector
+    offenders = inspector.offenders
+    if offenders:
+        details = '\n'.join(
+            f"  {shape.count}x from {shape.call_site}: {shape.sql}" for shape in offenders
+        )
+        raise AssertionError(f"Repeated queries detected (N+1):\n{details}")
@@ -0,0 +1,68 @@
+"""
+Fast JSON rendering for DRF responses.
+
+``FastJSONRenderer`` is a drop-in replacement for DRF's ``JSONRenderer`` that
+encodes with orjson when it is installed and falls back to the stdlib
+otherwise. The output is byte-identical to ``JSONRenderer`` with the default
+(compact, unicode, strict) settings. The only exception is non-finite floats:
+DRF rejects them and orjson writes ``null``.
+"""
+import re
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+# orjson and repr() disagree on floats below 1e-4 and from 1e16 upwards
+# (0.00001 vs 1e-05, 1e16 vs 1e+16). Output that contains such a number is
+# re-rendered by the stdlib encoder. Both patterns start with a literal so the
+# scan stays cheap; the preceding byte tells numbers from text in strings.
+_EXPONENT = re.compile(rb'e[-\d]')
+_SMALL_FLOAT = re.compile(rb'0\.0000')
+
+
+def has_divergent_float(ret):
+    for match in _EXPONENT.finditer(ret):
+        if ret[match.start() - 1:match.start()].isdigit():
+            return True
+    for match in _SMALL_FLOAT.finditer(ret):
+        if ret[match.start() - 1:match.start()] in (b':', b',', b'[', b'-'):
+            return True
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.uses_default_format(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # Non-string keys, integers beyond 64 bits and the like.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if has_divergent_float(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer, see its render() for the rationale.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def uses_default_format(self, accepted_media_type, renderer_context):
+        """True when DRF would render compact, non-ASCII-escaped JSON."""
+        return (
+            self.get_indent(accepted_media_type, renderer_context) is None
+            and self.compact and not self.ensure_ascii and self.strict
+            and api_settings.COMPACT_JSON and api_settings.UNICODE_JSON
+        )
@@ -0,0 +1,75 @@
+"""
+Incrementally rendered JSON responses.
+
+``StreamingJSONResponse`` writes ``{"data":[...],"success":true}`` while
+iterating rows, one rendered chunk of ``chunk_size`` rows at a time, so the
+memory held per request is bounded by the chunk instead of the whole result.
+The bytes are identical to rendering the complete structure with
+``FastJSONRenderer`` (and therefore with DRF's ``JSONRenderer``).
+
+The status line goes out with the first chunk. Views should run their query
+and read the first rows before building the response, so that an early
+database error still gets a proper error response. An error after that point
+can no longer change the status. It is logged and re-raised, so the server
+aborts the response and the client gets a truncated body, which is invalid
+JSON, rather than a well-formed partial list.
+"""
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+
+from core.renderers import FastJSONRenderer
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def iter_json_array(rows, to_representation, chunk_size=DEFAULT_CHUNK_SIZE, renderer=None):
+    """Yield the JSON encoding of ``[to_representation(row) for row in rows]`` in chunks."""
+    renderer = renderer or FastJSONRenderer()
+    rows = iter(rows)
+    yield b'['
+    separator = b''
+    while True:
+        chunk = list(map(to_representation, islice(rows, chunk_size)))
+        if not chunk:
+            break
+        # Render the chunk as an array and drop its brackets.
+        yield separator + renderer.render(chunk)[1:-1]
+        separator = b','
+    yield b']'
+
+
+def iter_json_envelope(rows, to_representation, key='data', extra=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield ``{key: [...], **extra}`` with the array streamed from ``rows``."""
+    renderer = FastJSONRenderer()
+    yield renderer.render({key: []})[:-3]  # '{"key":'
+    yield from iter_json_array(rows, to_representation, chunk_size, renderer)
+    if extra:
+        yield b',' + renderer.render(extra)[1:]  # ',"success":true}'
+    else:
+        yield b'}'
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Stream ``rows`` (ideally a ``QuerySet.iterator(chunk_size=...)``) as the
+    ``key`` array of a JSON object, followed by the ``extra`` members.
+    """
+
+    def __init__(self, rows, to_representation, key='data', extra=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(
+            self.abort_on_error(iter_json_envelope(rows, to_representation, key, extra, chunk_size)), **kwargs
+        )
+
+    @staticmethod
+    def abort_on_error(chunks):
+        try:
+            yield from chunks
+        except Exception as error:
+            logger.exception("Streaming response failed after it started: %s", error)
+            raise
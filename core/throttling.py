@@ -0,0 +1,149 @@
+"""
+Token bucket throttles shared by every web process.
+
+DRF's ``SimpleRateThrottle`` keeps a list of request timestamps per client in
+the default cache, rewrites it on every request, and with the local-memory
+cache enforces each limit per process. Here a client's state is a bucket of
+two numbers (tokens left and the time of the last refill) whatever the rate,
+refilled continuously at ``num_requests / duration`` tokens per second.
+
+With ``THROTTLE_REDIS_URL`` set (it defaults to ``CACHE_URL``) each check is
+one ``EVALSHA`` of a Lua script that refills, takes a token and sets the key's
+expiry atomically on the Redis clock, so all processes share one bucket per
+client. Without Redis, or when it cannot be reached, buckets live in the
+default Django cache behind a process-wide lock.
+
+Rates come from ``DEFAULT_THROTTLE_RATES`` as usual; views choose a per-endpoint
+bucket with ``throttle_scope`` (``read``, ``purchase``, ``login``) on top of the
+``user``/``anon`` quotas.
+"""
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is a Celery broker dependency
+    redis = None
+
+# Not core.utils.get_logger: core.utils imports DRF views, which load the throttle classes
+logger = logging.getLogger(__name__)
+
+# KEYS[1] bucket; ARGV[1] capacity, ARGV[2] refill rate in tokens per millisecond.
+# Returns {allowed, milliseconds until the next token}.
+TAKE_TOKEN = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(bucket[1]) or capacity
+local stamp = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - stamp, 0) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1000)
+if allowed == 1 then
+    return {1, 0}
+end
+return {0, math.ceil((1 - tokens) / rate)}
+"""
+
+# After a Redis error, checks use the local buckets for this many seconds
+REDIS_RETRY_INTERVAL = 5
+
+_clients = {}
+_redis_down_until = 0.0
+_local_lock = threading.Lock()
+
+
+def get_redis():
+    """``(client, take-token script)`` for the buckets, or ``None`` when not configured."""
+    url = getattr(settings, 'THROTTLE_REDIS_URL', None)
+    if not url or redis is None:
+        return None
+    if url not in _clients:
+        client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        _clients[url] = client, client.register_script(TAKE_TOKEN)
+    return _clients[url]
+
+
+def _take_redis(script, key, capacity, duration):
+    allowed, wait_ms = script(keys=[key], args=[capacity, capacity / (duration * 1000)])
+    return bool(allowed), wait_ms / 1000
+
+
+def _take_local(key, capacity, duration):
+    rate = capacity / duration
+    now = time.time()
+    with _local_lock:
+        tokens, stamp = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(now - stamp, 0) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / rate) + 1)
+    return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+def take_token(key, capacity, duration):
+    """
+    Take one token from the bucket ``key`` holding up to ``capacity`` tokens
+    refilled over ``duration`` seconds. Returns ``(allowed, seconds to wait)``.
+    """
+    global _redis_down_until
+    redis_client = get_redis()
+    if redis_client is not None and time.monotonic() >= _redis_down_until:
+        try:
+            return _take_redis(redis_client[1], key, capacity, duration)
+        except redis.RedisError as error:
+            _redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+            logger.warning("Redis unavailable for throttling, using the local cache: %s", error)
+    return _take_local(key, capacity, duration)
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """``SimpleRateThrottle`` rates and cache keys over a token bucket."""
+
+    retry_after = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.retry_after = take_token(self.key, self.num_requests, self.duration)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle, UserRateThrottle):
+    """Per-user quota (per IP for anonymous requests), scope ``user``."""
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle, AnonRateThrottle):
+    """Per-IP quota of anonymous requests, scope ``anon``."""
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle, ScopedRateThrottle):
+    """Per-endpoint quota chosen by the view's ``throttle_scope``."""
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -1,12 +1,8 @@
 
 
-from rest_framework.views import exception_handler
-from rest_framework.response import Response
-from rest_framework import status
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from datetime import datetime
 import logging
-from rest_framework.serializers import ValidationError as DRFValidationError
 def get_logger(name):
     return logging.getLogger(name)
 
@@ -20,6 +16,13 @@ def parse_date(date_str):
 
 # utils/exception_handler.py
 def custom_exception_handler(exc, context):
+    # DRF is imported here rather than at the top: every module logs through
+    # get_logger, and Celery workers should not load the view layer for it
+    from rest_framework import status
+    from rest_framework.response import Response
+    from rest_framework.serializers import ValidationError as DRFValidationError
+    from rest_framework.views import exception_handler
+
     # Call DRF default exception handler first
     response = exception_handler(exc, context)
 
@@ -27,23 +30,23 @@ def custom_exception_handler(exc, context):
         # You can add success: False always
         response.data['success'] = False
         response.data['status_code'] = response.status_code
-        logger.error(f"Handled Exception: {exc}")
+        logger.error("Handled Exception: %s", exc)
     else:
         if isinstance(exc, ObjectDoesNotExist):
-            logger.warning(f"Object Not Found: {exc}")
+            logger.warning("Object Not Found: %s", exc)
             return Response({
                 'success': False,
                 'error': 'Resource not found.',
             }, status=status.HTTP_404_NOT_FOUND)
 
         if isinstance(exc, (ValidationError, DRFValidationError)):
-            logger.warning(f"Validation Error: {exc}")
+            logger.warning("Validation Error: %s", exc)
             return Response({
                 'success': False,
                 'error': str(exc),
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        logger.exception(f"Unhandled server error: {exc}")
+        logger.exception("Unhandled server error: %s", exc)
         return Response({
             'success': False,
             'error': 'Internal server error. Please try again later.',
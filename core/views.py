@@ -0,0 +1,22 @@
+"""
+Project-level API views that do not belong to an app.
+"""
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from core.metrics import render
+
+
+class MetricsView(APIView):
+    """
+    API view exposing Celery metrics, plus the verified-token cache counters
+    of the serving process, to Prometheus. Restricted to staff users.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from MutualFundBroker.celery import app
+        from accounts import token_cache
+
+        return HttpResponse(render(app) + token_cache.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,6 +1,20 @@
 from django.contrib import admin
-from funds.models import Portfolio, FundFamily, MutualFund
+from funds.models import Portfolio, FundFamily, MutualFund, PortfolioValuation, SchemeHolding, IngestRun, QuarantinedNav
+from funds.models import RealizedLot, Redemption, SipMandate
 # Register your models here.
 admin.site.register(Portfolio)
 admin.site.register(MutualFund)
-admin.site.register(FundFamily)
\ No newline at end of file
+admin.site.register(FundFamily)
+admin.site.register(PortfolioValuation)
+admin.site.register(SchemeHolding)
+admin.site.register(IngestRun)
+admin.site.register(Redemption)
+admin.site.register(RealizedLot)
+admin.site.register(SipMandate)
+
+
+@admin.register(QuarantinedNav)
+class QuarantinedNavAdmin(admin.ModelAdmin):
+    list_display = ('scheme_code', 'scheme_name', 'nav', 'nav_date', 'previous_nav', 'previous_nav_date', 'reason', 'reviewed')
+    list_filter = ('reason', 'reviewed')
+    search_fields = ('scheme_code', 'scheme_name')
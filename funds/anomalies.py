@@ -0,0 +1,132 @@
+"""
+NAV anomaly screening for the ingest.
+
+Upstream occasionally sends NAVs that are plainly wrong: zeros, values off by
+a power of ten after a decimal slip, or dates older than what the catalogue
+already holds. Written as-is they would flow into every valuation. Before the
+ingest saves anything, ``screen_navs`` builds the incoming arrays straight
+from the decoder's columns (``FeedRecords.columns``), lines the NAVs up with
+the stored ones by ``scheme_code`` (a direct index when the codes are dense,
+as AMFI codes are, else ``searchsorted`` over the sorted catalogue) and
+checks all of them in one vectorized pass:
+
+``non_positive``
+    The NAV is zero or negative.
+``jump``
+    The NAV moved by more than ``NAV_MAX_CHANGE`` (a fraction, 0.25 is 25%)
+    from the stored one.
+``stale``
+    The NAV date lags the newest date in the feed by more than
+    ``NAV_STALE_DAYS``, is older than the stored date, or is in the future.
+
+Only NAVs the ingest would actually write are screened, so an unchanged NAV
+is never flagged. Flagged rows are stored as ``QuarantinedNav`` for review
+and left out of the save: existing schemes keep their last good NAV and new
+schemes wait for a plausible one.
+"""
+from itertools import compress
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from core.utils import get_logger
+
+from .feed import FeedRecords
+from .models import IngestRun, QuarantinedNav
+
+logger = get_logger(__name__)
+
+# Catalogue codes spanning at most this many slots per scheme are indexed directly
+DENSE_CODES_FACTOR = 16
+
+REASONS = (None, QuarantinedNav.NON_POSITIVE, QuarantinedNav.JUMP, QuarantinedNav.STALE)  # Index = reason code
+
+
+def ordinals(dates):
+    """Proleptic ordinals of ``dates``; a feed has a handful of distinct ones."""
+    lookup = {value: value.toordinal() for value in set(dates)}
+    return np.array(list(map(lookup.__getitem__, dates)), dtype=np.int64)
+
+
+def find_anomalies(codes, navs, nav_dates, catalogue_codes, catalogue_navs, catalogue_dates, today):
+    """
+    Check incoming NAVs against the catalogue. Dates are proleptic ordinals.
+    Returns ``(reasons, positions)``: a code into ``REASONS`` per incoming
+    NAV (0 when it looks fine) and its scheme's index in the catalogue
+    arrays (-1 for schemes not in the catalogue).
+    """
+    positions = np.full(len(codes), -1, dtype=np.int64)
+    low, high = (int(catalogue_codes.min()), int(catalogue_codes.max())) if len(catalogue_codes) else (0, 0)
+    if len(catalogue_codes) and high - low < DENSE_CODES_FACTOR * len(catalogue_codes):
+        index = np.full(high - low + 1, -1, dtype=np.int64)
+        index[catalogue_codes - low] = np.arange(len(catalogue_codes))
+        inside = (codes >= low) & (codes <= high)
+        positions[inside] = index[codes[inside] - low]
+    elif len(catalogue_codes):
+        order = np.argsort(catalogue_codes)
+        sorted_codes = catalogue_codes[order]
+        slots = np.minimum(np.searchsorted(sorted_codes, codes), len(order) - 1)
+        found = sorted_codes[slots] == codes
+        positions[found] = order[slots[found]]
+    found = positions >= 0
+    previous_navs = np.full(len(codes), np.nan)
+    previous_navs[found] = catalogue_navs[positions[found]]
+    previous_dates = np.zeros(len(codes), dtype=np.int64)
+    previous_dates[found] = catalogue_dates[positions[found]]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jump = found & (previous_navs > 0) & (np.abs(navs / previous_navs - 1) > settings.NAV_MAX_CHANGE)
+    stale = (
+        (nav_dates < nav_dates.max() - settings.NAV_STALE_DAYS)
+        | (nav_dates > today + 1)  # Feed dates are Indian dates, possibly a day ahead of the server
+        | (found & (nav_dates < previous_dates))
+    )
+    reasons = np.zeros(len(codes), dtype=np.int8)  # Later checks take precedence
+    reasons[stale] = 3
+    reasons[jump] = 2
+    reasons[~(navs > 0)] = 1
+    reasons[found & (navs == previous_navs) & (nav_dates == previous_dates)] = 0  # Nothing to write
+    return reasons, positions
+
+
+def screen_navs(records, catalogue, run_id=None):
+    """
+    Quarantine suspicious NAVs among the decoded feed ``records``.
+    ``catalogue`` holds the stored ``(fund_id, scheme_code, nav, nav_date)``
+    rows. Returns the records that are safe to save.
+    """
+    if not records:
+        return records
+
+    if isinstance(records, FeedRecords):
+        codes, navs, nav_dates = (records.columns[field] for field in ('scheme_code', 'nav', 'nav_date'))
+    else:
+        codes, navs, nav_dates = ([record[index] for record in records] for index in (0, 4, 5))
+    reasons, positions = find_anomalies(
+        np.array(codes, dtype=np.int64),
+        np.array(navs, dtype=np.float64),
+        ordinals(nav_dates),
+        np.array([row[1] for row in catalogue], dtype=np.int64),
+        np.array([row[2] for row in catalogue], dtype=np.float64),
+        ordinals([row[3] for row in catalogue]),
+        timezone.localdate().toordinal(),
+    )
+    flagged = np.flatnonzero(reasons)
+    if not len(flagged):
+        return records
+
+    quarantined = []
+    for index in flagged.tolist():
+        record, position = records[index], positions[index]
+        fund_id, _, previous_nav, previous_nav_date = catalogue[position] if position >= 0 else (None, None, None, None)
+        quarantined.append(QuarantinedNav(
+            ingest_run_id=run_id, mutual_fund_id=fund_id, scheme_code=record.scheme_code,
+            scheme_name=record.scheme_name, nav=record.nav, nav_date=record.nav_date,
+            previous_nav=previous_nav, previous_nav_date=previous_nav_date, reason=REASONS[reasons[index]],
+        ))
+    QuarantinedNav.objects.bulk_create(quarantined, ignore_conflicts=True)  # Already held from an earlier run
+    if run_id is not None:
+        IngestRun.objects.filter(pk=run_id).update(quarantined_funds=len(quarantined))
+    logger.warning("Quarantined %s suspicious NAVs out of %s", len(quarantined), len(records))
+    return list(compress(records, (reasons == 0).tolist()))
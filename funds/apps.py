@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class FundsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'funds'
+
+    def ready(self):
+        # Put SQLite into WAL mode on every new connection (see core/db.py)
+        from core.db import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='core.db.configure_sqlite')
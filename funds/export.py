@@ -0,0 +1,173 @@
+"""
+Bulk export of the scheme catalogue.
+
+All ``MutualFund`` rows, with the fund family name joined, are read through
+``QuerySet.iterator()`` (a server-side cursor on PostgreSQL) and encoded
+incrementally, so an export holds at most one chunk of rows in memory no
+matter how large the catalogue is. Three formats are available:
+
+``ndjson``
+    One JSON object per line.
+``csv``
+    Header row followed by one row per scheme.
+``columnar``
+    A compact binary dump of ``scheme_code``, ``nav`` and ``nav_date`` laid
+    out in row groups, meant to be memory-mapped::
+
+        header   <6sHII   magic b'MFCOL\\0', version, rows per group, 0
+        group    <II      row count n (0 terminates the file), 0
+                 float64[n] nav
+                 int32[n]   scheme_code
+                 int32[n]   nav_date as days since 1970-01-01
+
+    The file header is 16 bytes, a group header 8 bytes and a group 16 bytes
+    per row, so every ``nav`` array starts 8-byte aligned.
+    ``iter_columnar_groups`` reads it back from bytes or an ``mmap`` without
+    copying.
+"""
+import csv
+import io
+import mmap
+import struct
+from array import array
+from datetime import date
+
+from core.db import catalogue_db
+from core.renderers import FastJSONRenderer
+
+from .models import MutualFund
+
+EXPORT_FIELDS = (
+    ('scheme_code', 'scheme_code'),
+    ('scheme_name', 'scheme_name'),
+    ('isin_growth', 'isin_growth'),
+    ('isin_reinvestment', 'isin_reinvestment'),
+    ('nav', 'nav'),
+    ('nav_date', 'nav_date'),
+    ('scheme_type', 'scheme_type'),
+    ('scheme_category', 'scheme_category'),
+    ('fund_family', 'fund_family__name'),
+)
+EXPORT_FORMATS = ('ndjson', 'csv', 'columnar')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'columnar': 'application/octet-stream',
+}
+FILE_EXTENSIONS = {'ndjson': 'ndjson', 'csv': 'csv', 'columnar': 'mfcol'}
+
+DEFAULT_CHUNK_SIZE = 2000
+COLUMNAR_MAGIC = b'MFCOL\0'
+COLUMNAR_VERSION = 1
+COLUMNAR_GROUP_ROWS = 65536
+COLUMNAR_HEADER = struct.Struct('<6sHII')
+COLUMNAR_GROUP_HEADER = struct.Struct('<II')
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+_NAV_DATE = [name for name, _ in EXPORT_FIELDS].index('nav_date')
+
+
+def catalogue_rows(columns=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream catalogue tuples ordered by scheme_code."""
+    columns = columns or [source for _, source in EXPORT_FIELDS]
+    return (
+        MutualFund.objects.using(catalogue_db()).order_by('scheme_code').values_list(*columns)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def iter_ndjson(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    renderer = FastJSONRenderer()
+    names = [name for name, _ in EXPORT_FIELDS]
+    lines = []
+    for row in rows:
+        record = dict(zip(names, row))
+        record['nav_date'] = row[_NAV_DATE].isoformat()
+        lines.append(renderer.render(record))
+        if len(lines) >= chunk_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def iter_csv(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_FIELDS])
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+def iter_columnar(rows, group_rows=COLUMNAR_GROUP_ROWS):
+    """Encode ``(scheme_code, nav, nav_date)`` tuples as columnar row groups."""
+    yield COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, group_rows, 0)
+    codes, navs, days = array('i'), array('d'), array('i')
+    for scheme_code, nav, nav_date in rows:
+        codes.append(scheme_code)
+        navs.append(nav)
+        days.append(nav_date.toordinal() - EPOCH_ORDINAL)
+        if len(codes) >= group_rows:
+            yield _columnar_group(codes, navs, days)
+            codes, navs, days = array('i'), array('d'), array('i')
+    if codes:
+        yield _columnar_group(codes, navs, days)
+    yield COLUMNAR_GROUP_HEADER.pack(0, 0)
+
+
+def _columnar_group(codes, navs, days):
+    return COLUMNAR_GROUP_HEADER.pack(len(codes), 0) + navs.tobytes() + codes.tobytes() + days.tobytes()
+
+
+def iter_columnar_groups(buffer):
+    """
+    Yield ``(scheme_codes, navs, nav_days)`` memoryviews for each row group of
+    a columnar export held in ``buffer`` (bytes, or an ``mmap`` of the file).
+    """
+    with memoryview(buffer) as view:
+        magic, version, _, _ = COLUMNAR_HEADER.unpack_from(view, 0)
+        if magic != COLUMNAR_MAGIC or version != COLUMNAR_VERSION:
+            raise ValueError('Not a columnar catalogue export.')
+        offset = COLUMNAR_HEADER.size
+        while True:
+            count, _ = COLUMNAR_GROUP_HEADER.unpack_from(view, offset)
+            offset += COLUMNAR_GROUP_HEADER.size
+            if count == 0:
+                return
+            navs = view[offset:offset + 8 * count].cast('d')
+            offset += 8 * count
+            codes = view[offset:offset + 4 * count].cast('i')
+            offset += 4 * count
+            days = view[offset:offset + 4 * count].cast('i')
+            offset += 4 * count
+            yield codes, navs, days
+
+
+def read_columnar(path):
+    """Load a columnar export from ``path`` into ``(scheme_codes, navs, nav_days)`` arrays."""
+    codes, navs, days = array('i'), array('d'), array('i')
+    with open(path, 'rb') as export, mmap.mmap(export.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for group in iter_columnar_groups(mapped):
+            for column, view in zip((codes, navs, days), group):
+                with view:  # views must be released before the map is closed
+                    column.frombytes(view.cast('B'))
+    return codes, navs, days
+
+
+def iter_export(export_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Byte chunks of the whole catalogue in ``export_format``."""
+    if export_format == 'ndjson':
+        return iter_ndjson(catalogue_rows(chunk_size=chunk_size), chunk_size)
+    if export_format == 'csv':
+        return iter_csv(catalogue_rows(chunk_size=chunk_size), chunk_size)
+    if export_format == 'columnar':
+        return iter_columnar(catalogue_rows(('scheme_code', 'nav', 'nav_date'), chunk_size))
+    raise ValueError(f"Unknown export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
@@ -0,0 +1,250 @@
+"""
+Decoding of the RapidAPI scheme feed.
+
+The feed is a list of dicts keyed by the provider's field names, with NAVs as
+strings and dates as ``02-Apr-2025``. ``decode_feed`` turns it into compact
+``FeedRecord`` tuples (``__slots__ = ()``, like the snapshot records), a
+column at a time rather than a row at a time:
+
+* each field is pulled out of every item with one ``itemgetter`` map;
+* each column is converted and validated with a single ``map`` over it; only
+  a column that fails falls back to checking its values one by one, so the
+  cost of error reporting is paid by bad feeds only;
+* dates are parsed once per distinct value (a feed has a handful);
+* scheme type, category and fund family names are validated once per
+  distinct value and interned, so the few hundred distinct values are shared
+  by every record;
+* the cyclic garbage collector is paused while the records are built.
+
+The records come in a ``FeedRecords`` list that also keeps the validated
+columns, so column-wise consumers such as the NAV screen skip transposing
+the records back.
+
+Validation mirrors the ``MutualFund`` model: required fields, lengths, a
+numeric scheme code, a finite NAV, a valid date and scheme codes unique
+within the feed. Invalid items are reported as ``{'scheme_name', 'errors'}``
+dicts, the shape the ingest has always returned for failed funds.
+"""
+import gc
+import sys
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import partial
+from itertools import compress, repeat
+from math import isfinite
+from operator import itemgetter
+
+from core.utils import parse_date
+
+OPEN_ENDED = 'Open Ended Schemes'
+
+FeedRecord = namedtuple('FeedRecord', [
+    'scheme_code', 'scheme_name', 'isin_growth', 'isin_reinvestment', 'nav', 'nav_date',
+    'scheme_type', 'scheme_category', 'fund_family',
+])
+
+# Feed key -> (record field, max length for text fields); all required
+REQUIRED = {
+    'Scheme_Code': ('scheme_code', None),
+    'Scheme_Name': ('scheme_name', 255),
+    'Net_Asset_Value': ('nav', None),
+    'Date': ('nav_date', None),
+    'Scheme_Type': ('scheme_type', 100),
+    'Scheme_Category': ('scheme_category', 100),
+    'Mutual_Fund_Family': ('fund_family', 255),
+}
+OPTIONAL = {
+    'ISIN_Div_Payout_ISIN_Growth': ('isin_growth', 50),
+    'ISIN_Div_Reinvestment': ('isin_reinvestment', 50),
+}
+INTERNED = ('scheme_type', 'scheme_category', 'fund_family')
+make_record = partial(tuple.__new__, FeedRecord)  # FeedRecord._make without the Python-level call
+
+
+class FeedRecords(list):
+    """Decoded ``FeedRecord``s, with their values by field in ``columns``."""
+
+    __slots__ = ('columns',)
+
+    def __init__(self, records, columns):
+        super().__init__(records)
+        self.columns = columns
+
+
+@contextmanager
+def gc_paused():
+    """
+    Suspend the cyclic garbage collector. Decoding allocates a few tuples per
+    item, none of which can form cycles, and the collections they would
+    trigger keep re-scanning the growing result lists.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def flag(errors, index, field, message):
+    """Record an error for one item; the first error found for a field wins."""
+    errors.setdefault(index, {}).setdefault(field, [message])
+
+
+def to_scheme_code(value):
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    return int(value)
+
+
+def to_nav(value):
+    nav = float(value)
+    if not isfinite(nav):
+        raise ValueError(value)
+    return nav
+
+
+def convert(values, function, field, message, errors, fast=None):
+    """
+    ``function`` mapped over a column; values it rejects become None and an
+    error. ``fast``, when given, is tried first: a builtin doing the same
+    conversion whose result ``function`` would accept.
+    """
+    try:
+        return list(map(fast or function, values))
+    except (TypeError, ValueError, OverflowError):
+        pass
+    converted = []
+    for index, value in enumerate(values):
+        try:
+            converted.append(function(value))
+        except (TypeError, ValueError, OverflowError):
+            converted.append(None)
+            flag(errors, index, field, message)
+    return converted
+
+
+def check_text(values, field, max_length, required, errors, distinct=False):
+    """
+    Flag missing or over-long strings in a column. ``distinct`` checks the set
+    of values first, for columns that repeat a few values.
+    """
+    candidates = set(values) if distinct else values
+    present = candidates if required else filter(None, candidates)
+    try:
+        # str.__len__ raises TypeError for anything but a string: one pass checks both
+        if (not required or all(candidates)) and max(map(str.__len__, present), default=0) <= max_length:
+            return
+    except TypeError:
+        pass
+    for index, value in enumerate(values):
+        if not value:
+            if required:
+                flag(errors, index, field, 'This field may not be blank.')
+        elif not isinstance(value, str):
+            flag(errors, index, field, 'Not a valid string.')
+        elif len(value) > max_length:
+            flag(errors, index, field, f'Ensure this field has no more than {max_length} characters.')
+
+
+def parse_dates(values, errors):
+    """Dates parsed once per distinct value."""
+    parsed = {}
+    for value in set(values):
+        try:
+            parsed[value] = parse_date(value)
+        except (TypeError, ValueError):
+            parsed[value] = None
+    dates = list(map(parsed.__getitem__, values))
+    if None in parsed.values():
+        for index, nav_date in enumerate(dates):
+            if nav_date is None:
+                flag(errors, index, 'nav_date', 'Date has wrong format. Use DD-Mon-YYYY.')
+    return dates
+
+
+def to_scheme_codes(values, errors):
+    # int() truncates floats; they are rare enough to take the careful path
+    fast = int if float not in set(map(type, values)) else None
+    return convert(values, to_scheme_code, 'scheme_code', 'A valid integer is required.', errors, fast)
+
+
+def to_navs(values, errors):
+    navs = convert(values, to_nav, 'nav', 'A valid number is required.', errors, float)
+    try:
+        if isfinite(sum(navs)):  # An infinite or NaN NAV, or an overflow, makes the sum one
+            return navs
+    except TypeError:  # Invalid NAVs already flagged
+        pass
+    return convert(values, to_nav, 'nav', 'A valid number is required.', errors)
+
+
+def extract(items, key, field, errors):
+    """The required ``key`` of every item as a column, with None where it is missing."""
+    try:
+        return list(map(itemgetter(key), items))
+    except KeyError:
+        pass
+    for index, item in enumerate(items):
+        if key not in item:
+            flag(errors, index, field, 'This field is required.')
+    return list(map(dict.get, items, repeat(key)))
+
+
+def decode_feed(items, scheme_type=OPEN_ENDED):
+    """
+    Decode the feed items of ``scheme_type`` (all items when None).
+    Returns ``(records, failures)``: the valid items as ``FeedRecords`` in
+    feed order, and an error dict per invalid item.
+    """
+    with gc_paused():
+        return decode_items(items, scheme_type)
+
+
+def decode_items(items, scheme_type):
+    if set(map(type, items)) - {dict}:
+        items = [item for item in items if isinstance(item, dict)]
+    if scheme_type is not None:
+        types = list(map(dict.get, items, repeat('Scheme_Type')))
+        if set(types) != {scheme_type}:
+            items = list(compress(items, map(scheme_type.__eq__, types)))
+    if not items:
+        return [], []
+
+    errors = {}  # Item index -> {field: [messages]}
+    columns = {
+        field: [scheme_type] * len(items) if field == 'scheme_type' and scheme_type is not None  # Known from the filter
+        else extract(items, key, field, errors)
+        for key, (field, _) in REQUIRED.items()
+    }
+    for key, (field, _) in OPTIONAL.items():
+        columns[field] = list(map(dict.get, items, repeat(key)))
+
+    columns['scheme_code'] = to_scheme_codes(columns['scheme_code'], errors)
+    columns['nav'] = to_navs(columns['nav'], errors)
+    columns['nav_date'] = parse_dates(columns['nav_date'], errors)
+    for fields, required in ((REQUIRED, True), (OPTIONAL, False)):
+        for field, max_length in fields.values():
+            if max_length is not None:
+                check_text(columns[field], field, max_length, required, errors, distinct=field in INTERNED)
+
+    codes = columns['scheme_code']
+    if len(set(codes)) != len(codes):
+        seen = set()
+        for index, code in enumerate(codes):
+            if code is not None and code in seen:
+                flag(errors, index, 'scheme_code', 'Duplicate scheme code in the feed.')
+            seen.add(code)
+
+    failures = [
+        {'scheme_name': items[index].get('Scheme_Name'), 'errors': errors[index]} for index in sorted(errors)
+    ]
+    if errors:
+        keep = [index not in errors for index in range(len(items))]
+        columns = {field: list(compress(values, keep)) for field, values in columns.items()}
+    for field in INTERNED:
+        columns[field] = list(map(sys.intern, columns[field]))
+
+    records = FeedRecords(map(make_record, zip(*(columns[field] for field in FeedRecord._fields))), columns)
+    return records, failures
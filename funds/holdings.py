@@ -0,0 +1,129 @@
+"""
+Scheme-to-holders reverse index.
+
+``SchemeHolding`` keeps one row per (scheme, user) with the user's aggregate
+units and invested amount, updated in the purchase transaction. Work driven
+by NAV changes (revaluation, notifications, exposure reports) asks
+``holders_of`` for the affected users, so its cost follows the number of
+changed schemes and their holders instead of the size of ``Portfolio``.
+Redemptions (``funds.lots``) take units and their cost back out, and drop
+the row once nothing is left. SIP runs (``funds.sip``) add a whole shard of
+purchases with ``add_holdings``.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from core.utils import get_logger
+
+from .models import Portfolio, SchemeHolding
+
+logger = get_logger(__name__)
+
+REBUILD_BATCH_SIZE = 1000
+
+# Unit amounts closer than this are equal: units are floats, and a lot sold in
+# several parts must still close
+UNITS_EPSILON = 1e-6
+
+# What is still held of a purchase, for aggregating positions over Portfolio
+REMAINING_UNITS = F('units') - F('redeemed_units')
+REMAINING_COST = F('invested_amount') - F('redeemed_cost')
+
+
+def add_holding(user_id, mutual_fund_id, units, invested_amount):
+    """Add a purchase to the user's position in the scheme."""
+    updated = SchemeHolding.objects.filter(user_id=user_id, mutual_fund_id=mutual_fund_id).update(
+        units=F('units') + units,
+        invested_amount=F('invested_amount') + invested_amount,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            SchemeHolding.objects.create(
+                user_id=user_id, mutual_fund_id=mutual_fund_id, units=units, invested_amount=invested_amount,
+            )
+    except IntegrityError:
+        # A concurrent purchase created the row first
+        add_holding(user_id, mutual_fund_id, units, invested_amount)
+
+
+def add_holdings(positions, batch_size=REBUILD_BATCH_SIZE):
+    """
+    Add many purchases at once; ``positions`` maps ``(user_id, mutual_fund_id)``
+    to ``(units, invested_amount)``. As in ``add_holding`` the totals are
+    incremented in the database, so purchases committed meanwhile are kept:
+    missing rows are inserted empty (ignoring rows a concurrent purchase
+    created first), then the users' rows are locked and incremented with one
+    UPDATE per batch.
+    """
+    pending = dict(positions)
+    while pending:
+        SchemeHolding.objects.bulk_create(
+            [SchemeHolding(user_id=user_id, mutual_fund_id=fund_id) for user_id, fund_id in sorted(pending)],
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+        now = timezone.now()
+        rows = []
+        user_ids = sorted({user_id for user_id, _ in pending})
+        for start in range(0, len(user_ids), batch_size):
+            held = (
+                SchemeHolding.objects.select_for_update().filter(user_id__in=user_ids[start:start + batch_size])
+                .values_list('id', 'user_id', 'mutual_fund_id')
+            )
+            for holding_id, user_id, mutual_fund_id in held:
+                position = pending.pop((user_id, mutual_fund_id), None)
+                if position is not None:
+                    units, invested_amount = position
+                    rows.append(SchemeHolding(
+                        id=holding_id, units=F('units') + units,
+                        invested_amount=F('invested_amount') + invested_amount, updated_at=now,
+                    ))
+        SchemeHolding.objects.bulk_update(rows, ['units', 'invested_amount', 'updated_at'], batch_size=batch_size)
+        # Whatever is still pending was redeemed to nothing and dropped between the insert and the lock
+
+
+def holders_of(mutual_fund_ids):
+    """Ids of the users holding any of ``mutual_fund_ids``."""
+    return set(
+        SchemeHolding.objects.filter(mutual_fund_id__in=list(mutual_fund_ids))
+        .values_list('user_id', flat=True).distinct()
+    )
+
+
+def iter_holders(mutual_fund_ids, chunk_size=REBUILD_BATCH_SIZE):
+    """Stream ``(mutual_fund_id, user_id, units, invested_amount)`` for ``mutual_fund_ids``."""
+    return (
+        SchemeHolding.objects.filter(mutual_fund_id__in=list(mutual_fund_ids))
+        .order_by('mutual_fund_id', 'user_id')
+        .values_list('mutual_fund_id', 'user_id', 'units', 'invested_amount')
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def rebuild_holdings(batch_size=REBUILD_BATCH_SIZE):
+    """Recreate the whole index from ``Portfolio``; return the number of rows written."""
+    positions = (
+        Portfolio.objects.filter(is_open=True).values_list('mutual_fund_id', 'user_id')
+        .annotate(total_units=Sum(REMAINING_UNITS), total_invested=Sum(REMAINING_COST))
+        .order_by('mutual_fund_id', 'user_id')
+        .iterator(chunk_size=batch_size)
+    )
+    written = 0
+    with transaction.atomic():
+        SchemeHolding.objects.all().delete()
+        batch = []
+        for mutual_fund_id, user_id, units, invested_amount in positions:
+            batch.append(SchemeHolding(
+                mutual_fund_id=mutual_fund_id, user_id=user_id, units=units, invested_amount=invested_amount,
+            ))
+            if len(batch) >= batch_size:
+                SchemeHolding.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        SchemeHolding.objects.bulk_create(batch)
+        written += len(batch)
+    logger.info("Rebuilt scheme holdings index with %s rows", written)
+    return written
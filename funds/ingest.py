@@ -0,0 +1,286 @@
+"""
+NAV ingest: the single-flight run bookkeeping and the ingest service itself.
+
+Every trigger (the hourly beat task, the ``fetch-external-funds`` endpoint)
+goes through ``request_ingest``. It starts a new ``IngestRun`` only when no
+run is active; otherwise the trigger attaches to the active run and gets its
+id. A partial unique constraint on ``IngestRun.is_active`` settles races
+between concurrent triggers. The work itself runs in a Celery worker under the
+``funds-ingest`` lease (see ``funds.locks``), so even ingests started outside
+this module never overlap.
+
+A run goes through four steps, each usable on its own:
+
+``fetch_feed``
+    Download the scheme feed from the third-party API.
+``decode``
+    Turn it into ``FeedRecord``s and per-item errors (``funds.feed``).
+``validate``
+    Quarantine suspicious NAVs (``funds.anomalies``).
+``load``
+    Create new schemes, write changed NAVs and push them to the NAV streams
+    (``funds.nav_stream``).
+
+``save_feed`` chains the last three and loads in one transaction, renewing
+the lease before every batch: a run that loses its lease writes nothing and
+ends as failed. The service does not depend on the views,
+and ``requests`` and NumPy are imported on first use, so worker processes
+start without loading the API layer.
+"""
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.utils import get_logger
+
+from .feed import decode_feed
+from .locks import LeaseLock, LeaseLost, LeaseUnavailable
+from .models import FundFamily, IngestRun, MutualFund
+from .nav_stream import nav_update, publish
+from .snapshot import refresh_snapshot
+from .stats import bump_stats_version
+from .valuation import schedule_revaluation
+
+logger = get_logger(__name__)
+
+INGEST_LEASE = 'funds-ingest'
+# Rows per INSERT / UPDATE statement while loading; the lease is renewed before each
+LOAD_BATCH_SIZE = 500
+
+
+def active_run():
+    return IngestRun.objects.filter(is_active=True).first()
+
+
+def finish_run(run_id, status, error='', **counts):
+    IngestRun.objects.filter(pk=run_id, is_active=True).update(
+        status=status, is_active=False, error=error, finished_at=timezone.now(), **counts,
+    )
+
+
+def enqueue_run(run_id):
+    from .tasks import fetch_and_save_funds  # funds.tasks imports this module
+
+    try:
+        fetch_and_save_funds.delay(run_id=run_id)
+    except Exception as error:
+        # Without a broker the run would block every later trigger
+        logger.exception("Could not queue ingest run %s: %s", run_id, error)
+        finish_run(run_id, IngestRun.FAILED, error=f'Could not queue the ingest: {error}')
+
+
+def request_ingest(trigger, user=None, enqueue=True):
+    """
+    Start an ingest run or attach to the active one.
+    Returns ``(run, started)``; ``started`` is False when the caller attached.
+    """
+    run = active_run()
+    if run is not None and run.created_at < timezone.now() - timedelta(seconds=settings.INGEST_RUN_TIMEOUT):
+        logger.warning("Abandoning ingest run %s, active since %s", run.id, run.created_at)
+        finish_run(run.id, IngestRun.FAILED, error='Abandoned: did not finish in time.')
+        run = None
+
+    if run is None:
+        try:
+            with transaction.atomic():
+                run = IngestRun.objects.create(trigger=trigger, requested_by=user)
+        except IntegrityError:
+            # A concurrent trigger started a run between our check and insert
+            run = active_run()
+            if run is None:
+                return request_ingest(trigger, user, enqueue)
+        else:
+            logger.info("Ingest run %s requested (%s)", run.id, trigger)
+            if enqueue:
+                transaction.on_commit(lambda: enqueue_run(run.id))
+            return run, True
+
+    IngestRun.objects.filter(pk=run.pk).update(attached_requests=F('attached_requests') + 1)
+    logger.info("Trigger %s attached to ingest run %s", trigger, run.id)
+    return run, False
+
+
+def fetch_feed():
+    """
+    Fetch the open-ended scheme feed from the third-party API.
+    Raises ``ValueError`` when the request fails or is refused.
+    """
+    import requests  # Only the ingest worker talks to the provider
+
+    try:
+        response = requests.get(
+            os.getenv('RAPID_API_URL'),
+            headers={
+                "x-rapidapi-key": os.getenv('RAPIDAPI_KEY'),
+                "x-rapidapi-host": os.getenv('RAPIDAPI_HOST')
+            },
+            params={"Scheme_Type": "Open"},  # Fetching only open-ended mutual funds
+            timeout=settings.INGEST_FETCH_TIMEOUT,  # A hung provider must not outlive the lease
+        )
+    except requests.exceptions.RequestException as error:
+        logger.error("Error in API request: %s", error)
+        raise ValueError("API Request failed")
+
+    if response.status_code != 200:
+        raise ValueError("Failed to fetch schemes from third-party API")
+    return response.json()
+
+
+def decode(data):
+    """
+    Decode and validate the raw feed in bulk.
+    Returns ``(records, failures)``, see ``funds.feed.decode_feed``.
+    """
+    return decode_feed(data)
+
+
+def read_catalogue():
+    """The stored ``(fund_id, scheme_code, nav, nav_date)`` of every scheme, in one query."""
+    return list(MutualFund.objects.values_list('id', 'scheme_code', 'nav', 'nav_date'))
+
+
+def validate(records, catalogue, run_id=None):
+    """
+    Quarantine zero, jumping or stale NAVs among ``records`` against the
+    ``catalogue``. Returns the records that are safe to load.
+    """
+    from .anomalies import screen_navs  # Loads NumPy
+
+    return screen_navs(records, catalogue, run_id)
+
+
+def batches(items, heartbeat=None):
+    """Slice ``items`` into ``LOAD_BATCH_SIZE`` batches, calling ``heartbeat`` before each."""
+    for start in range(0, len(items), LOAD_BATCH_SIZE):
+        if heartbeat is not None:
+            heartbeat()
+        yield items[start:start + LOAD_BATCH_SIZE]
+
+
+def create_funds(records, heartbeat=None):
+    """
+    Insert decoded feed records as new schemes, creating missing fund families.
+    Returns the names of the created schemes.
+    """
+    if not records:
+        return []
+
+    names = {record.fund_family for record in records}
+    families = dict(FundFamily.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = names - families.keys()
+    if missing:
+        FundFamily.objects.bulk_create([FundFamily(name=name) for name in missing], ignore_conflicts=True)
+        families.update(FundFamily.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    for batch in batches(records, heartbeat):
+        MutualFund.objects.bulk_create([
+            MutualFund(
+                scheme_code=record.scheme_code,
+                isin_growth=record.isin_growth,
+                isin_reinvestment=record.isin_reinvestment,
+                scheme_name=record.scheme_name,
+                nav=record.nav,
+                nav_date=record.nav_date,
+                scheme_type=record.scheme_type,
+                scheme_category=record.scheme_category,
+                fund_family_id=families[record.fund_family],
+            )
+            for record in batch
+        ])
+    return [record.scheme_name for record in records]
+
+
+def load(records, catalogue, heartbeat=None):
+    """
+    Save validated ``records``: schemes missing from the ``catalogue`` are
+    created, known schemes get their NAV updated when it changed. Portfolio
+    revaluation, the stats refresh and the push to NAV streams are scheduled
+    for after the commit. ``heartbeat`` is called before every batch.
+    Returns the names of the created and of the updated schemes.
+    """
+    existing = {scheme_code: (fund_id, nav, nav_date) for fund_id, scheme_code, nav, nav_date in catalogue}
+    changed = []  # MutualFund objects carrying the new NAVs
+    updates = []  # The same changes for the NAV streams
+    updated_funds = []
+    new_records = []  # Schemes not in the catalogue yet
+    now = timezone.now()
+
+    for record in records:
+        current = existing.get(record.scheme_code)
+        if current is None:
+            new_records.append(record)
+            continue
+
+        # Known scheme: only the NAV moves between ingests
+        fund_id, nav, nav_date = current
+        if (record.nav, record.nav_date) != (nav, nav_date):
+            changed.append(MutualFund(id=fund_id, nav=record.nav, nav_date=record.nav_date, updated_at=now))
+            updates.append(nav_update(record.scheme_code, record.nav, record.nav_date))
+            updated_funds.append(record.scheme_name)
+
+    created_funds = create_funds(new_records, heartbeat)
+
+    if changed:
+        # Write all NAV changes in batches and revalue the affected portfolios in the background
+        for batch in batches(changed, heartbeat):
+            MutualFund.objects.bulk_update(batch, ['nav', 'nav_date', 'updated_at'])
+        changed_ids = [fund.id for fund in changed]
+        transaction.on_commit(lambda: schedule_revaluation(changed_ids))
+        transaction.on_commit(lambda: publish(updates))
+
+    if created_funds or changed:
+        # Family and category stats are stale from here on
+        transaction.on_commit(bump_stats_version)
+    return created_funds, updated_funds
+
+
+def save_feed(data, run_id=None, heartbeat=None):
+    """
+    Decode, validate and load a fetched feed, then publish the new scheme
+    master to every web and worker process. The load is one transaction, so
+    an exception from ``heartbeat`` leaves the catalogue untouched.
+    Returns the names of the created and updated schemes and the failed items.
+    """
+    records, failed_funds = decode(data)
+    catalogue = read_catalogue()
+    records = validate(records, catalogue, run_id)
+    with transaction.atomic():
+        created_funds, updated_funds = load(records, catalogue, heartbeat)
+    refresh_snapshot()
+    return created_funds, updated_funds, failed_funds
+
+
+def run_ingest(run_id):
+    """
+    Execute a queued run under the ingest lease. Raises ``LeaseUnavailable``
+    when another ingest holds the lease, leaving the run queued for a retry.
+    A run that loses the lease before its load commits fails without saving.
+    """
+    run = IngestRun.objects.get(pk=run_id)
+    if not run.is_active:
+        return run  # Duplicate delivery of a finished run
+
+    lease = LeaseLock(INGEST_LEASE, settings.INGEST_LEASE_TTL_MS)
+    if not lease.acquire():
+        raise LeaseUnavailable(INGEST_LEASE)
+    try:
+        IngestRun.objects.filter(pk=run_id).update(status=IngestRun.RUNNING, started_at=timezone.now())
+        data = fetch_feed()
+        lease.heartbeat()
+        created_funds, updated_funds, failed_funds = save_feed(data, run_id, heartbeat=lease.heartbeat)
+        finish_run(run_id, IngestRun.SUCCEEDED, created_funds=len(created_funds),
+                   updated_funds=len(updated_funds), failed_funds=len(failed_funds))
+    except LeaseLost:
+        logger.error("Ingest run %s lost the %s lease; nothing was saved", run_id, INGEST_LEASE)
+        finish_run(run_id, IngestRun.FAILED, error='Lost the ingest lease before the load committed.')
+    except Exception as error:
+        logger.exception("Ingest run %s failed: %s", run_id, error)
+        finish_run(run_id, IngestRun.FAILED, error=str(error))
+    finally:
+        lease.release()
+    run.refresh_from_db()
+    return run
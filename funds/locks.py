@@ -0,0 +1,122 @@
+"""
+Lease-based locks shared by web and worker processes.
+
+A lease is held for ``ttl_ms`` and must be renewed by long-running holders
+(``heartbeat`` between units of work); if a holder dies, the lease simply
+expires. With ``LOCK_REDIS_URL`` set,
+leases are Redis keys taken with ``SET key token NX PX ttl`` and released or
+renewed by Lua scripts that check the token first. Without Redis (or when it
+cannot be reached) a ``TaskLease`` row is used: taking it is a single
+conditional UPDATE that only succeeds when the lease is free or expired.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.utils import get_logger
+
+from .models import TaskLease
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is a Celery broker dependency
+    redis = None
+
+logger = get_logger(__name__)
+
+_RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+_RENEW = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('pexpire', KEYS[1], ARGV[2]) end return 0"
+
+_client = None
+
+
+def get_redis():
+    """Shared Redis client for leases, or ``None`` when not configured."""
+    global _client
+    url = getattr(settings, 'LOCK_REDIS_URL', None)
+    if not url or redis is None:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+    return _client
+
+
+class LeaseUnavailable(Exception):
+    """Another process holds the lease."""
+
+
+class LeaseLost(Exception):
+    """A held lease expired or was taken over before its holder finished."""
+
+
+class LeaseLock:
+    """
+    ``with LeaseLock('funds-ingest', ttl_ms) as lease:`` raises ``LeaseUnavailable``
+    when another process holds it; ``lease.acquire()`` returns a bool instead.
+    """
+
+    def __init__(self, name, ttl_ms):
+        self.name = name
+        self.ttl_ms = ttl_ms
+        self.token = uuid.uuid4().hex
+        self.held = False
+        self.backend = None
+
+    @property
+    def key(self):
+        return f'lease:{self.name}'
+
+    def acquire(self):
+        client = get_redis()
+        if client is not None:
+            try:
+                self.held = bool(client.set(self.key, self.token, nx=True, px=self.ttl_ms))
+                self.backend = 'redis'
+                return self.held
+            except redis.RedisError as error:
+                logger.warning("Redis unavailable for lease %s, using the database: %s", self.name, error)
+        self.held = self._acquire_db()
+        self.backend = 'db'
+        return self.held
+
+    def renew(self):
+        """Extend a held lease by ``ttl_ms``; False when it was lost in the meantime."""
+        if not self.held:
+            return False
+        if self.backend == 'redis':
+            self.held = bool(get_redis().eval(_RENEW, 1, self.key, self.token, self.ttl_ms))
+        else:
+            self.held = bool(TaskLease.objects.filter(name=self.name, holder=self.token).update(
+                expires_at=timezone.now() + timedelta(milliseconds=self.ttl_ms)))
+        return self.held
+
+    def heartbeat(self):
+        """``renew``, raising ``LeaseLost`` when the lease is no longer ours."""
+        if not self.renew():
+            raise LeaseLost(self.name)
+
+    def release(self):
+        if not self.held:
+            return
+        if self.backend == 'redis':
+            get_redis().eval(_RELEASE, 1, self.key, self.token)
+        else:
+            TaskLease.objects.filter(name=self.name, holder=self.token).update(holder='', expires_at=timezone.now())
+        self.held = False
+
+    def _acquire_db(self):
+        now = timezone.now()
+        TaskLease.objects.get_or_create(name=self.name, defaults={'expires_at': now})
+        return TaskLease.objects.filter(name=self.name, expires_at__lte=now).update(
+            holder=self.token, expires_at=now + timedelta(milliseconds=self.ttl_ms),
+        ) == 1
+
+    def __enter__(self):
+        if not self.acquire():
+            raise LeaseUnavailable(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
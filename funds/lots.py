@@ -0,0 +1,206 @@
+"""
+FIFO lot accounting for redemptions.
+
+Every ``Portfolio`` row is a lot: the units bought by one purchase and what
+they cost. ``redeemed_units`` and ``redeemed_cost`` record how much of it has
+been sold, and ``is_open`` drops it from the ``portfolio_open_lots_idx``
+partial index once nothing is left, so finding the open lots of a position
+never reads its sold-out history.
+
+``LotBook`` keeps the open lots of one (user, scheme) position in a heap
+ordered by purchase time. A sale consumes them oldest first, O(log n) per lot
+it closes; a lot sold in part stays at the top of the heap, its key
+unchanged. ``redeem`` runs a sale in one transaction:
+
+* the position's ``SchemeHolding`` row is locked, which serializes sales and
+  purchases of the same position;
+* its open lots are read in one query as plain tuples, checked for enough
+  units and matched; the lots sold out are closed with one ``UPDATE`` and the
+  one lot sold in part, if any, with another;
+* the ``Redemption`` and one ``RealizedLot`` per matched lot, carrying cost,
+  proceeds, gain and holding period, are inserted with ``bulk_create``;
+* the holding and the materialized valuation are adjusted.
+
+Since every realization is stored with its holding period, ``realized_gains``
+(the tax report) is one grouped query, however many lots the account has.
+"""
+import heapq
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Case, Count, F, Sum, Value, When
+from django.utils import timezone
+
+from core.utils import get_logger
+
+from .holdings import REMAINING_COST, REMAINING_UNITS, UNITS_EPSILON
+from .models import Portfolio, RealizedLot, Redemption, SchemeHolding
+from .valuation import refresh_valuations
+
+logger = get_logger(__name__)
+
+Match = namedtuple('Match', ['lot_id', 'purchased_at', 'units', 'cost', 'closed'])
+
+
+class InsufficientUnits(ValueError):
+    """The position holds fewer units than the sale asks for."""
+
+
+class LotBook:
+    """
+    The open lots of one position, oldest first. ``lots`` are
+    ``(lot_id, purchased_at, units, cost)`` with what is left of each lot.
+    """
+
+    def __init__(self, lots=()):
+        self.heap = [[purchased_at, lot_id, units, cost] for lot_id, purchased_at, units, cost in lots]
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def add(self, lot_id, purchased_at, units, cost):
+        heapq.heappush(self.heap, [purchased_at, lot_id, units, cost])
+
+    def units(self):
+        return sum(entry[2] for entry in self.heap)
+
+    def consume(self, units):
+        """
+        Take ``units`` from the oldest lots and return a ``Match`` per lot
+        touched. Raises ``InsufficientUnits`` when the lots run out; the book
+        is then partly consumed, so check ``units()`` first when it matters.
+        """
+        matches = []
+        while units > UNITS_EPSILON:
+            if not self.heap:
+                raise InsufficientUnits('Insufficient units to redeem.')
+            entry = self.heap[0]
+            purchased_at, lot_id, available, cost = entry
+            if available <= units + UNITS_EPSILON:
+                heapq.heappop(self.heap)
+                matches.append(Match(lot_id, purchased_at, available, cost, True))
+                units -= available
+            else:
+                taken_cost = cost * units / available
+                entry[2] = available - units
+                entry[3] = cost - taken_cost
+                matches.append(Match(lot_id, purchased_at, units, taken_cost, False))
+                units = 0
+        return matches
+
+
+def open_lots(user_id, mutual_fund_id):
+    """The open lots of a position as ``(lot_id, purchased_at, units, cost)``, what is left of each."""
+    return Portfolio.objects.filter(user_id=user_id, mutual_fund_id=mutual_fund_id, is_open=True).values_list(
+        'id', 'purchase_date', REMAINING_UNITS, REMAINING_COST,
+    )
+
+
+def redeem(user_id, mutual_fund, units):
+    """
+    Sell ``units`` of ``mutual_fund`` at its current NAV, FIFO.
+    Returns the saved ``Redemption`` and its ``RealizedLot``s.
+    Raises ``InsufficientUnits`` when the user holds fewer units.
+    """
+    with transaction.atomic():
+        holding = SchemeHolding.objects.select_for_update().filter(
+            user_id=user_id, mutual_fund_id=mutual_fund.id,
+        ).first()
+        book = LotBook(open_lots(user_id, mutual_fund.id) if holding is not None else ())
+        available = book.units()
+        if available + UNITS_EPSILON < units:
+            raise InsufficientUnits('Insufficient units to redeem.')
+        matches = book.consume(min(units, available))
+
+        now = timezone.now()
+        redeemed_on = timezone.localdate(now)
+        closed = [match.lot_id for match in matches if match.closed]
+        if closed:
+            Portfolio.objects.filter(pk__in=closed).update(
+                redeemed_units=F('units'), redeemed_cost=F('invested_amount'), is_open=False, updated_at=now,
+            )
+        if matches and not matches[-1].closed:  # only the last lot matched can be sold in part
+            Portfolio.objects.filter(pk=matches[-1].lot_id).update(
+                redeemed_units=F('redeemed_units') + matches[-1].units,
+                redeemed_cost=F('redeemed_cost') + matches[-1].cost, updated_at=now,
+            )
+
+        sold = sum(match.units for match in matches)
+        cost = sum(match.cost for match in matches)
+        amount = sold * mutual_fund.nav
+        redemption = Redemption.objects.create(
+            user_id=user_id, mutual_fund=mutual_fund, units=sold, nav=mutual_fund.nav,
+            nav_date=mutual_fund.nav_date, amount=round(amount, 2), cost=round(cost, 2),
+            realized_gain=round(amount - cost, 2),
+        )
+        realized = RealizedLot.objects.bulk_create([
+            RealizedLot(
+                redemption=redemption, lot_id=match.lot_id, user_id=user_id, mutual_fund_id=mutual_fund.id,
+                units=match.units, cost=round(match.cost, 2), proceeds=round(match.units * mutual_fund.nav, 2),
+                gain=round(match.units * mutual_fund.nav - match.cost, 2),
+                purchased_on=timezone.localdate(match.purchased_at), redeemed_on=redeemed_on,
+                holding_days=(redeemed_on - timezone.localdate(match.purchased_at)).days,
+            )
+            for match in matches
+        ])
+
+        if available - sold <= UNITS_EPSILON:
+            holding.delete()  # Nothing left: the user is no longer a holder of the scheme
+        else:
+            SchemeHolding.objects.filter(pk=holding.pk).update(
+                units=F('units') - sold, invested_amount=F('invested_amount') - cost, updated_at=now,
+            )
+        refresh_valuations([user_id])
+
+    logger.info("User %s redeemed %s units of scheme %s over %s lots", user_id, sold, mutual_fund.scheme_code,
+                len(matches))
+    return redemption, realized
+
+
+def realized_gains(user_id, date_from=None, date_to=None):
+    """
+    Realized gains of a user between two dates (inclusive), per scheme and
+    term. A realization is long term when the units were held at least
+    ``LONG_TERM_HOLDING_DAYS``.
+    """
+    realizations = RealizedLot.objects.filter(user_id=user_id)
+    if date_from is not None:
+        realizations = realizations.filter(redeemed_on__gte=date_from)
+    if date_to is not None:
+        realizations = realizations.filter(redeemed_on__lte=date_to)
+    rows = (
+        realizations
+        .annotate(term=Case(
+            When(holding_days__gte=settings.LONG_TERM_HOLDING_DAYS, then=Value('long')), default=Value('short'),
+        ))
+        .values('mutual_fund__scheme_code', 'mutual_fund__scheme_name', 'term')
+        .annotate(
+            lots=Count('id'), units=Sum('units'), cost=Sum('cost'), proceeds=Sum('proceeds'), gain=Sum('gain'),
+            average_holding_days=Avg('holding_days'),
+        )
+        .order_by('mutual_fund__scheme_code', 'term')
+    )
+
+    schemes = []
+    totals = {'short': 0.0, 'long': 0.0}
+    for row in rows:
+        totals[row['term']] += row['gain']
+        schemes.append({
+            'scheme_code': row['mutual_fund__scheme_code'],
+            'scheme_name': row['mutual_fund__scheme_name'],
+            'term': row['term'],
+            'lots': row['lots'],
+            'units': row['units'],
+            'cost': round(row['cost'], 2),
+            'proceeds': round(row['proceeds'], 2),
+            'gain': round(row['gain'], 2),
+            'average_holding_days': round(row['average_holding_days']),
+        })
+    return {
+        'schemes': schemes,
+        'short_term_gain': round(totals['short'], 2),
+        'long_term_gain': round(totals['long'], 2),
+        'total_gain': round(totals['short'] + totals['long'], 2),
+    }
@@ -0,0 +1,18 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from funds.reports import REPORT_CHUNK_SIZE, build_report
+
+
+class Command(BaseCommand):
+    help = 'Build the AUM report in this process (the scheduled run uses the Celery task).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None, help='Report date (default: today).')
+        parser.add_argument('--shards', type=int, default=1)
+        parser.add_argument('--chunk-size', type=int, default=REPORT_CHUNK_SIZE)
+
+    def handle(self, *args, date, shards, chunk_size, **options):
+        count = build_report(date, shards, chunk_size)
+        self.stdout.write(f'Wrote {count} report rows.')
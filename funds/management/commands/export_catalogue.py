@@ -0,0 +1,31 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from funds.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Export the mutual fund catalogue as NDJSON, CSV or columnar binary.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson', dest='export_format')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout).')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Rows fetched from the database cursor per round trip.')
+
+    def handle(self, *args, export_format, output, chunk_size, **options):
+        started = time.perf_counter()
+        written = 0
+        target = open(output, 'wb') if output else sys.stdout.buffer
+        try:
+            for chunk in iter_export(export_format, chunk_size):
+                target.write(chunk)
+                written += len(chunk)
+        finally:
+            if output:
+                target.close()
+            else:
+                target.flush()
+        self.stderr.write(f'Exported {written} bytes of {export_format} in {time.perf_counter() - started:.2f}s.')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from funds.holdings import rebuild_holdings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the scheme-to-holders index from the Portfolio table.'
+
+    def handle(self, *args, **options):
+        count = rebuild_holdings()
+        self.stdout.write(f'Indexed {count} scheme holdings.')
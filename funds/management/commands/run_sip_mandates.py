@@ -0,0 +1,17 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from funds.sip import run_due_mandates
+
+
+class Command(BaseCommand):
+    help = 'Execute the due SIP instalments in this process (the scheduled run uses the Celery task).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=date.fromisoformat, default=None, help='Run date (default: today).')
+        parser.add_argument('--shards', type=int, default=1)
+
+    def handle(self, *args, date, shards, **options):
+        result = run_due_mandates(date, shards)
+        self.stdout.write(f"Bought {result['purchases']} of {result['due_mandates']} due instalments.")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from funds.snapshot import get_snapshot_path, write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write the memory-mapped scheme master snapshot (normally done by the ingest).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='Snapshot file (default: settings.SCHEME_SNAPSHOT_PATH).')
+
+    def handle(self, *args, output, **options):
+        path = output or get_snapshot_path()
+        count = write_snapshot(path)
+        self.stdout.write(f'Wrote {count} schemes to {path}.')
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from accounts.models import User
 
 # Represents a Fund Family (like HDFC Mutual Fund, ICICI Mutual Fund etc.)
@@ -21,22 +22,249 @@ class MutualFund(models.Model):
     nav_date = models.DateField()                                 # NAV Date
     scheme_type = models.CharField(max_length=100)                # Type: e.g., "Open Ended", "Close Ended"
     scheme_category = models.CharField(max_length=100)            # Category: e.g., "Equity", "Debt", "Hybrid"
-    fund_family = models.ForeignKey(FundFamily, on_delete=models.CASCADE)  # Link to the parent fund family
+    fund_family = models.ForeignKey(FundFamily, on_delete=models.CASCADE, db_index=False)  # Link to the parent fund family (indexed below)
     created_at = models.DateTimeField(auto_now_add=True)          # Timestamp of creation
     updated_at = models.DateTimeField(auto_now=True)              # Timestamp of last update
 
+    class Meta:
+        indexes = [
+            # Schemes are listed per family and category; also serves fund_family lookups
+            models.Index(fields=['fund_family', 'scheme_category'], name='mutualfund_family_category_idx'),
+            models.Index(fields=['isin_growth'], name='mutualfund_isin_growth_idx'),
+            models.Index(fields=['isin_reinvestment'], name='mutualfund_isin_reinvest_idx'),
+        ]
+
     def __str__(self):
         return f"id: {self.id}---> SchemeName: {self.scheme_name}"
 
-# Represents a User's Investment in a particular Mutual Fund (Portfolio Holding)
+# Represents a User's Investment in a particular Mutual Fund (Portfolio Holding).
+# Each purchase is a lot that redemptions consume oldest first (see funds/lots.py)
 class Portfolio(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='fund_portfolios')  # User who owns this portfolio
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='fund_portfolios', db_index=False)  # User who owns this portfolio (indexed below)
     mutual_fund = models.ForeignKey(MutualFund, on_delete=models.CASCADE)                     # Mutual fund invested in
     units = models.FloatField()                                                                 # Number of units purchased
     invested_amount = models.FloatField()                                                       # Total money invested
     purchase_date = models.DateTimeField(auto_now_add=True)  # When the purchase was made
+    redeemed_units = models.FloatField(default=0)  # Units of this lot sold so far
+    redeemed_cost = models.FloatField(default=0)   # Part of invested_amount those units cost
+    is_open = models.BooleanField(default=True)    # False once every unit is sold
     created_at = models.DateTimeField(auto_now_add=True)     # Timestamp of creation
     updated_at = models.DateTimeField(auto_now=True)         # Timestamp of last update
 
+    class Meta:
+        indexes = [
+            # Holdings are always read per user, newest purchase first
+            models.Index(fields=['user', '-purchase_date'], name='portfolio_user_purchased_idx'),
+            # Redemptions look up the open lots of one position, oldest first
+            models.Index(fields=['user', 'mutual_fund', 'purchase_date'], condition=Q(is_open=True),
+                         name='portfolio_open_lots_idx'),
+        ]
+
     def __str__(self):
         return f"{self.id} ---- {self.user.username} - {self.mutual_fund.scheme_name}"
+
+
+# Reverse index from a scheme to the users holding it, with each user's aggregate position.
+# Maintained on purchase; lets NAV-driven work visit only the holders of changed schemes
+class SchemeHolding(models.Model):
+    mutual_fund = models.ForeignKey(MutualFund, on_delete=models.CASCADE, related_name='holders', db_index=False)  # Covered by the unique constraint
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='scheme_holdings')  # Holder of the scheme
+    units = models.FloatField(default=0)            # Total units the user holds in the scheme
+    invested_amount = models.FloatField(default=0)  # Total money the user invested in the scheme
+    updated_at = models.DateTimeField(auto_now=True)  # Timestamp of last update
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mutual_fund', 'user'], name='schemeholding_fund_user_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.mutual_fund_id} ---- {self.user_id} - {self.units}"
+
+
+# Materialized valuation of a user's whole portfolio, refreshed after each NAV ingest
+# and on purchase so that portfolio summaries are a single-row read
+class PortfolioValuation(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='portfolio_valuation')  # One summary per user
+    total_invested = models.FloatField(default=0)   # Sum of invested_amount over all holdings
+    current_value = models.FloatField(default=0)    # Sum of units * latest NAV over all holdings
+    holdings = models.JSONField(default=list)       # Per-scheme breakdown, ordered by scheme_code
+    valued_at = models.DateTimeField(auto_now=True)  # When the valuation was last computed
+
+    def __str__(self):
+        return f"{self.user_id} ---- {self.current_value}"
+
+
+# Daily platform AUM report rows, one per (date, dimension, key); written by the reporting job
+class AumReport(models.Model):
+    DIMENSION_CHOICES = [
+        ('scheme', 'Scheme'),
+        ('family', 'Fund family'),
+        ('segment', 'User segment'),
+    ]
+
+    report_date = models.DateField()                                      # Day the report describes
+    dimension = models.CharField(max_length=20, choices=DIMENSION_CHOICES)  # What the row is grouped by
+    key = models.CharField(max_length=255)                                # scheme_code, family name or segment label
+    holders = models.IntegerField()                                       # Distinct users with a position
+    invested_amount = models.FloatField()                                 # Total money invested
+    aum = models.FloatField()                                             # Units held times the latest NAV
+    created_at = models.DateTimeField(auto_now_add=True)                  # Timestamp of creation
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['report_date', 'dimension', 'key'], name='aumreport_date_dimension_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.report_date} ---- {self.dimension}:{self.key} - {self.aum}"
+
+
+# Lease row used as a cross-process lock when Redis is not available (see funds/locks.py)
+class TaskLease(models.Model):
+    name = models.CharField(max_length=100, unique=True)  # Lock name, e.g. "funds-ingest"
+    holder = models.CharField(max_length=64, blank=True)   # Token of the current holder; empty when free
+    expires_at = models.DateTimeField()                    # The lease is free again after this instant
+
+    def __str__(self):
+        return f"{self.name} ---- {self.holder or 'free'} until {self.expires_at}"
+
+
+# One NAV ingest, from the moment it is requested until it finishes.
+# At most one run is active at a time; further triggers attach to it
+class IngestRun(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)  # Where the run is
+    is_active = models.BooleanField(default=True)  # True while queued or running; unique among active runs
+    trigger = models.CharField(max_length=20)      # "schedule" or "api"
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='ingest_runs')
+    attached_requests = models.IntegerField(default=0)  # Triggers that joined this run instead of starting one
+    created_funds = models.IntegerField(default=0)
+    updated_funds = models.IntegerField(default=0)
+    failed_funds = models.IntegerField(default=0)
+    quarantined_funds = models.IntegerField(default=0)  # Suspicious NAVs held back for review
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['is_active'], condition=Q(is_active=True), name='ingestrun_single_active'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ---- {self.trigger} - {self.status}"
+
+
+# NAV from the feed held back by the ingest because it looked wrong (see funds/anomalies.py).
+# The scheme keeps its last good NAV until the next ingest brings a plausible one
+class QuarantinedNav(models.Model):
+    NON_POSITIVE = 'non_positive'
+    JUMP = 'jump'
+    STALE = 'stale'
+    REASON_CHOICES = [
+        (NON_POSITIVE, 'Zero or negative NAV'),
+        (JUMP, 'Day-over-day jump'),
+        (STALE, 'Stale or out-of-order date'),
+    ]
+
+    ingest_run = models.ForeignKey(IngestRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='quarantined_navs')
+    mutual_fund = models.ForeignKey(MutualFund, on_delete=models.CASCADE, null=True, blank=True, related_name='quarantined_navs')  # None for schemes not in the catalogue yet
+    scheme_code = models.IntegerField()                              # Scheme as sent by the feed
+    scheme_name = models.CharField(max_length=255)
+    nav = models.FloatField()                                        # Rejected NAV
+    nav_date = models.DateField()                                    # Date sent with it
+    previous_nav = models.FloatField(null=True, blank=True)          # NAV kept in the catalogue
+    previous_nav_date = models.DateField(null=True, blank=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    reviewed = models.BooleanField(default=False)                    # Set once someone has looked at it
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # The same bad value is sent on every ingest until upstream fixes it; keep one row
+            models.UniqueConstraint(fields=['scheme_code', 'nav_date', 'nav'], name='quarantinednav_scheme_value_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.scheme_code} ---- {self.nav} on {self.nav_date} ({self.reason})"
+
+
+# A sale of units of one scheme, matched against the user's lots oldest first
+class Redemption(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='redemptions', db_index=False)  # Indexed below
+    mutual_fund = models.ForeignKey(MutualFund, on_delete=models.CASCADE, related_name='redemptions')
+    units = models.FloatField()           # Units sold
+    nav = models.FloatField()             # NAV the units were sold at
+    nav_date = models.DateField()         # Date of that NAV
+    amount = models.FloatField()          # Proceeds, units times NAV
+    cost = models.FloatField()            # What the sold units cost, per the matched lots
+    realized_gain = models.FloatField()   # amount - cost
+    redeemed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-redeemed_at'], name='redemption_user_redeemed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ---- {self.user_id} - {self.units} of {self.mutual_fund_id}"
+
+
+# The part of one lot consumed by a redemption, with its gain and holding period.
+# Tax reports aggregate these rows instead of replaying the purchase history
+class RealizedLot(models.Model):
+    redemption = models.ForeignKey(Redemption, on_delete=models.CASCADE, related_name='lots')
+    lot = models.ForeignKey(Portfolio, on_delete=models.CASCADE, related_name='realizations')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='realized_lots', db_index=False)  # Indexed below
+    mutual_fund = models.ForeignKey(MutualFund, on_delete=models.CASCADE, db_index=False)
+    units = models.FloatField()           # Units of the lot sold
+    cost = models.FloatField()            # Their share of the lot's invested amount
+    proceeds = models.FloatField()        # Units times the redemption NAV
+    gain = models.FloatField()            # proceeds - cost
+    purchased_on = models.DateField()
+    redeemed_on = models.DateField()
+    holding_days = models.IntegerField()  # redeemed_on - purchased_on
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'redeemed_on'], name='realizedlot_user_redeemed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.lot_id} ---- {self.units} units, gain {self.gain}"
+
+
+# Monthly systematic investment (SIP): buy `amount` worth of a scheme on `day_of_month`.
+# The scheduler (funds/sip.py) turns due mandates into Portfolio lots in sharded batches
+class SipMandate(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sip_mandates', db_index=False)  # Indexed below
+    mutual_fund = models.ForeignKey(MutualFund, on_delete=models.CASCADE, related_name='sip_mandates')
+    amount = models.FloatField()                       # Rupees invested per instalment
+    day_of_month = models.PositiveSmallIntegerField()  # 1 to 28, so every month has the day
+    next_run_date = models.DateField()                 # Next instalment; due once it is today or earlier
+    last_run_date = models.DateField(null=True, blank=True)
+    instalments = models.IntegerField(default=0)       # Instalments executed so far
+    is_active = models.BooleanField(default=True)      # False once cancelled
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The scheduler reads the due mandates of a user_id range
+            models.Index(fields=['user', 'next_run_date'], condition=Q(is_active=True), name='sipmandate_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.id} ---- {self.user_id} - {self.amount} of {self.mutual_fund_id} on day {self.day_of_month}"
@@ -0,0 +1,291 @@
+"""
+Server-sent NAV updates.
+
+Instead of polling the portfolio and catalogue endpoints, clients keep one
+``text/event-stream`` connection open (``NavStreamView``, served under ASGI).
+It starts with an ``event: nav`` carrying the current NAVs of the schemes the
+user holds plus any listed in ``?schemes=``, followed by one ``event: nav``
+whenever an ingest changes some of them.
+
+The ingest calls ``publish`` once per run, after its transaction commits.
+With ``NAV_STREAM_REDIS_URL`` set (``CACHE_URL`` by default) the updates go
+out as a single Redis pub/sub message, and each web process listens with one
+connection however many clients it serves. Without it they are delivered in
+the publishing process only, which is what tests and eager development
+setups need.
+
+Each process has a ``NavHub`` that indexes subscriptions by scheme code, so a
+publish only touches the subscriptions of the changed schemes. A subscription
+is a dict of pending updates and an ``asyncio.Event``. An idle client
+therefore costs those and a suspended generator: no thread, no task, no
+timer. Keep-alive comments come from one ticker per event loop.
+
+Pending updates are keyed by scheme code. A client that reads slower than NAVs
+change gets only the latest NAV of each scheme, and its buffer never grows
+beyond its watch list. All pending updates are written as one event and the
+stream awaits the transport before taking more, so a slow reader only holds
+back its own generator.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from core.utils import get_logger
+
+from .models import MutualFund
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is a Celery broker dependency
+    redis = None
+
+logger = get_logger(__name__)
+
+KEEP_ALIVE = b': keep-alive\n\n'
+RECONNECT_DELAY = 5  # Seconds before the Redis listener subscribes again after an error
+
+
+def dumps(value):
+    return orjson.dumps(value) if orjson is not None else json.dumps(value, separators=(',', ':')).encode()
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def nav_update(scheme_code, nav, nav_date):
+    """The payload of one NAV change, as sent to clients."""
+    return {'scheme_code': scheme_code, 'nav': nav, 'nav_date': nav_date.isoformat()}
+
+
+def encode_event(updates):
+    return b'event: nav\ndata: ' + dumps(updates) + b'\n\n'
+
+
+class Subscription:
+    """The pending updates of one stream, the latest per scheme code."""
+
+    __slots__ = ('scheme_codes', 'loop', 'pending', 'event', 'coalesced')
+
+    def __init__(self, scheme_codes, loop):
+        self.scheme_codes = frozenset(scheme_codes)
+        self.loop = loop
+        self.pending = {}
+        self.event = asyncio.Event()
+        self.coalesced = 0  # Updates replaced by a newer one before the client read them
+
+    def offer(self, update):
+        if update['scheme_code'] in self.pending:
+            self.coalesced += 1
+        self.pending[update['scheme_code']] = update
+        self.event.set()
+
+    def take(self):
+        """Pending updates, emptied; an empty list means only a keep-alive is due."""
+        updates, self.pending = list(self.pending.values()), {}
+        self.event.clear()
+        return updates
+
+
+def offer_all(offers):
+    for subscription, update in offers:
+        subscription.offer(update)
+
+
+class NavHub:
+    """
+    Subscriptions of this process, indexed by scheme code and by event loop.
+    ``subscribe`` runs on the loop of the stream; the other methods may be
+    called from any thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_scheme = {}  # scheme_code -> set of Subscriptions
+        self.by_loop = {}  # event loop -> set of Subscriptions
+        self.pumps = {}  # event loop -> background tasks (keep-alive ticker, Redis listener)
+
+    def subscribe(self, scheme_codes):
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(scheme_codes, loop)
+        with self.lock:
+            for scheme_code in subscription.scheme_codes:
+                self.by_scheme.setdefault(scheme_code, set()).add(subscription)
+            self.by_loop.setdefault(loop, set()).add(subscription)
+        if loop not in self.pumps:
+            self.pumps[loop] = start_pumps(self)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for scheme_code in subscription.scheme_codes:
+                subscribers = self.by_scheme.get(scheme_code)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.by_scheme[scheme_code]
+            subscribers = self.by_loop.get(subscription.loop)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if subscribers:
+                    return
+                del self.by_loop[subscription.loop]
+        for task in self.pumps.pop(subscription.loop, ()):
+            try:
+                subscription.loop.call_soon_threadsafe(task.cancel)  # Django may close the stream from a thread
+            except RuntimeError:
+                pass  # The loop is closed, and its tasks with it
+
+    def deliver(self, updates):
+        """Queue ``updates`` on the subscriptions of their schemes. Returns the number of offers."""
+        by_loop = {}
+        with self.lock:
+            for update in updates:
+                for subscription in self.by_scheme.get(update['scheme_code'], ()):
+                    by_loop.setdefault(subscription.loop, []).append((subscription, update))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for loop, offers in by_loop.items():
+            if loop is running:
+                offer_all(offers)
+                continue
+            try:
+                loop.call_soon_threadsafe(offer_all, offers)
+            except RuntimeError:
+                pass  # The loop is closed and its streams with it
+        return sum(map(len, by_loop.values()))
+
+    def wake_all(self, loop):
+        """Wake every stream on ``loop``; those with nothing pending send a keep-alive."""
+        with self.lock:
+            subscriptions = list(self.by_loop.get(loop, ()))
+        for subscription in subscriptions:
+            subscription.event.set()
+
+    def count(self):
+        return sum(map(len, self.by_loop.values()))
+
+
+hub = NavHub()
+
+_client = None
+
+
+def get_redis():
+    """Redis client used to publish updates, or ``None`` when not configured."""
+    global _client
+    url = getattr(settings, 'NAV_STREAM_REDIS_URL', None)
+    if not url or redis is None:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+    return _client
+
+
+@receiver(setting_changed)
+def reset_client(setting, **kwargs):
+    global _client
+    if setting == 'NAV_STREAM_REDIS_URL':
+        _client = None
+
+
+def publish(updates):
+    """
+    Send NAV updates (``nav_update`` dicts) to every stream. Called by the
+    ingest after its commit; never raises, a missed push only means clients
+    see the new NAV on their next read.
+    """
+    if not updates:
+        return
+    client = get_redis()
+    if client is None:
+        hub.deliver(updates)
+        return
+    try:
+        client.publish(settings.NAV_STREAM_CHANNEL, dumps(updates))
+    except redis.RedisError as error:
+        logger.warning("Could not publish %s NAV updates: %s", len(updates), error)
+
+
+def start_pumps(nav_hub):
+    loop = asyncio.get_running_loop()
+    tasks = [loop.create_task(keep_alive(nav_hub, loop, settings.NAV_STREAM_HEARTBEAT))]
+    url = getattr(settings, 'NAV_STREAM_REDIS_URL', None)
+    if url and redis is not None:
+        tasks.append(loop.create_task(listen(nav_hub, url, settings.NAV_STREAM_CHANNEL)))
+    return tasks
+
+
+async def keep_alive(nav_hub, loop, interval):
+    # Also how closed connections are noticed: the write fails and the stream ends
+    while True:
+        await asyncio.sleep(interval)
+        nav_hub.wake_all(loop)
+
+
+async def listen(nav_hub, url, channel):
+    """Feed the updates published on ``channel`` to ``nav_hub``, reconnecting on errors."""
+    from redis import asyncio as redis_asyncio  # Only processes serving streams listen
+
+    while True:
+        client = redis_asyncio.Redis.from_url(url)
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message['type'] == 'message':
+                        nav_hub.deliver(loads(message['data']))
+        except (redis.RedisError, OSError, ValueError) as error:
+            logger.warning("NAV stream listener lost Redis, retrying in %ss: %s", RECONNECT_DELAY, error)
+            await asyncio.sleep(RECONNECT_DELAY)
+        finally:
+            await client.aclose()
+
+
+async def current_navs(scheme_codes):
+    rows = MutualFund.objects.filter(scheme_code__in=scheme_codes).values('scheme_code', 'nav', 'nav_date')
+    return [nav_update(row['scheme_code'], row['nav'], row['nav_date']) async for row in rows.aiterator()]
+
+
+class NavEventStream:
+    """
+    The event stream of ``scheme_codes``: their current NAVs, then every
+    change. Django calls ``close`` when it closes the response, which ends the
+    subscription even when the client went away in the middle of the stream.
+    """
+
+    def __init__(self, scheme_codes, nav_hub=hub):
+        self.scheme_codes = scheme_codes
+        self.nav_hub = nav_hub
+        self.subscription = None
+
+    def __aiter__(self):
+        return self.events()
+
+    async def events(self):
+        # Subscribed before the current NAVs are read, so no change falls in between
+        self.subscription = subscription = self.nav_hub.subscribe(self.scheme_codes)
+        try:
+            yield encode_event(await current_navs(subscription.scheme_codes))
+            while True:
+                await subscription.event.wait()
+                updates = subscription.take()
+                yield encode_event(updates) if updates else KEEP_ALIVE
+        finally:
+            self.close()
+
+    def close(self):
+        subscription, self.subscription = self.subscription, None
+        if subscription is not None:
+            self.nav_hub.unsubscribe(subscription)
@@ -0,0 +1,199 @@
+"""
+Platform AUM reporting.
+
+The daily report aggregates what is left of every ``Portfolio`` lot after
+redemptions into AUM, invested amount and distinct holders per scheme, per
+fund family and per user segment (users bucketed by the value of their whole
+portfolio), and stores the result as ``AumReport`` rows.
+
+Work is split into shards by ``user_id`` range. A shard streams its holdings
+ordered by user through ``QuerySet.iterator()`` (a server-side cursor on
+PostgreSQL) and folds each chunk into fixed-size NumPy arrays with
+``bincount`` over dense scheme indices and ``add.reduceat`` over user runs.
+Memory is bounded by the chunk size and the catalogue size, not by the number
+of holdings. NAVs come from one catalogue read per shard instead of a join on
+every row. Shards return plain lists so they can run as Celery tasks, and
+``merge_shards`` adds them up keyed by fund and family id.
+"""
+from datetime import date
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max, Min
+
+from core.utils import get_logger
+
+from .holdings import REMAINING_COST, REMAINING_UNITS
+from .models import AumReport, FundFamily, MutualFund, Portfolio
+
+logger = get_logger(__name__)
+
+REPORT_CHUNK_SIZE = 10000
+# Upper bounds of the user segments by portfolio value, in rupees
+SEGMENT_BOUNDS = np.array([1e5, 1e6, 1e7])
+SEGMENT_LABELS = ('below-1L', '1L-10L', '10L-1Cr', '1Cr-and-above')
+
+SCHEME_FIELDS = ('scheme_holders', 'scheme_invested', 'scheme_aum')
+FAMILY_FIELDS = ('family_holders', 'family_invested', 'family_aum')
+SEGMENT_FIELDS = ('segment_holders', 'segment_invested', 'segment_aum')
+
+
+def shard_bounds(shards):
+    """Split the range of user ids holding anything into ``[start, stop)`` ranges."""
+    bounds = Portfolio.objects.aggregate(first=Min('user_id'), last=Max('user_id'))
+    if bounds['first'] is None:
+        return []
+    first, stop = bounds['first'], bounds['last'] + 1
+    step = -(-(stop - first) // max(shards, 1))
+    return [(start, min(start + step, stop)) for start in range(first, stop, step)]
+
+
+class ShardAggregator:
+    """Running totals of one shard, indexed by the catalogue read at start."""
+
+    def __init__(self):
+        catalogue = np.array(
+            list(MutualFund.objects.order_by('id').values_list('id', 'nav', 'fund_family_id')), dtype=np.float64,
+        ).reshape(-1, 3)
+        self.fund_ids = catalogue[:, 0].astype(np.int64)
+        self.navs = catalogue[:, 1]
+        self.family_ids, self.scheme_family = np.unique(catalogue[:, 2].astype(np.int64), return_inverse=True)
+
+        schemes, families, segments = len(self.fund_ids), len(self.family_ids), len(SEGMENT_LABELS)
+        self.totals = {}
+        for fields, size in ((SCHEME_FIELDS, schemes), (FAMILY_FIELDS, families), (SEGMENT_FIELDS, segments)):
+            for field in fields:
+                self.totals[field] = np.zeros(size, dtype=np.int64 if field.endswith('holders') else np.float64)
+        self.rows = 0
+        self.skipped = 0
+
+    def add_block(self, block):
+        """Fold rows of ``(user_id, mutual_fund_id, units, invested_amount)`` holding complete users."""
+        users = block[:, 0].astype(np.int64)
+        fund_ids = block[:, 1].astype(np.int64)
+        schemes = np.searchsorted(self.fund_ids, fund_ids).clip(max=max(len(self.fund_ids) - 1, 0))
+        known = self.fund_ids[schemes] == fund_ids if len(self.fund_ids) else np.zeros(len(users), dtype=bool)
+        if not known.all():
+            # Schemes created after the catalogue was read belong to the next report
+            self.skipped += int((~known).sum())
+            users, schemes, block = users[known], schemes[known], block[known]
+        if not len(users):
+            return
+        invested = block[:, 3]
+        value = block[:, 2] * self.navs[schemes]
+        totals = self.totals
+        scheme_count, family_count = len(self.fund_ids), len(self.family_ids)
+
+        totals['scheme_invested'] += np.bincount(schemes, weights=invested, minlength=scheme_count)
+        totals['scheme_aum'] += np.bincount(schemes, weights=value, minlength=scheme_count)
+        holders = np.unique(users * scheme_count + schemes) % scheme_count
+        totals['scheme_holders'] += np.bincount(holders, minlength=scheme_count)
+        families = self.scheme_family[schemes]
+        holders = np.unique(users * family_count + families) % family_count
+        totals['family_holders'] += np.bincount(holders, minlength=family_count)
+
+        # Rows are ordered by user: one reduceat over the runs gives each user's totals
+        starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        user_value = np.add.reduceat(value, starts)
+        user_invested = np.add.reduceat(invested, starts)
+        segments = np.searchsorted(SEGMENT_BOUNDS, user_value, side='right')
+        totals['segment_holders'] += np.bincount(segments, minlength=len(SEGMENT_LABELS))
+        totals['segment_invested'] += np.bincount(segments, weights=user_invested, minlength=len(SEGMENT_LABELS))
+        totals['segment_aum'] += np.bincount(segments, weights=user_value, minlength=len(SEGMENT_LABELS))
+        self.rows += len(users)
+
+    def result(self):
+        """JSON-serializable totals of the shard."""
+        totals = self.totals
+        family_count = len(self.family_ids)
+        totals['family_invested'] = np.bincount(self.scheme_family, weights=totals['scheme_invested'], minlength=family_count)
+        totals['family_aum'] = np.bincount(self.scheme_family, weights=totals['scheme_aum'], minlength=family_count)
+        result = {field: values.tolist() for field, values in totals.items()}
+        result.update(fund_ids=self.fund_ids.tolist(), family_ids=self.family_ids.tolist(),
+                      rows=self.rows, skipped=self.skipped)
+        return result
+
+
+def aggregate_shard(user_id_from, user_id_to, chunk_size=REPORT_CHUNK_SIZE):
+    """Aggregate the holdings of users in ``[user_id_from, user_id_to)``."""
+    aggregator = ShardAggregator()
+    rows = iter(
+        Portfolio.objects.filter(user_id__gte=user_id_from, user_id__lt=user_id_to, is_open=True)
+        .order_by('user_id')
+        .values_list('user_id', 'mutual_fund_id', REMAINING_UNITS, REMAINING_COST)
+        .iterator(chunk_size=chunk_size)
+    )
+    carry = np.empty((0, 4))
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            if len(carry):
+                aggregator.add_block(carry)
+            break
+        block = np.concatenate([carry, np.array(chunk, dtype=np.float64)])
+        # Hold back the last user's rows: the next chunk may continue them
+        split = np.searchsorted(block[:, 0], block[-1, 0])
+        if split:
+            aggregator.add_block(block[:split])
+        carry = block[split:]
+    logger.info("Aggregated %s holdings of users %s-%s", aggregator.rows, user_id_from, user_id_to)
+    return aggregator.result()
+
+
+def _align(partials, key, fields):
+    """Sum ``fields`` of ``partials`` over the union of their ``key`` ids."""
+    ids = np.unique(np.concatenate([np.asarray(partial[key], dtype=np.int64) for partial in partials]))
+    merged = {}
+    for field in fields:
+        merged[field] = np.zeros(len(ids), dtype=np.int64 if field.endswith('holders') else np.float64)
+        for partial in partials:
+            positions = np.searchsorted(ids, np.asarray(partial[key], dtype=np.int64))
+            np.add.at(merged[field], positions, partial[field])
+    return ids, merged
+
+
+def merge_shards(partials):
+    """Add up shard results. Users never span shards, so holder counts add too."""
+    partials = [partial for partial in partials if partial]
+    if not partials:
+        return None
+    fund_ids, schemes = _align(partials, 'fund_ids', SCHEME_FIELDS)
+    family_ids, families = _align(partials, 'family_ids', FAMILY_FIELDS)
+    segments = {field: np.sum([partial[field] for partial in partials], axis=0) for field in SEGMENT_FIELDS}
+    return {
+        'fund_ids': fund_ids, 'family_ids': family_ids, **schemes, **families, **segments,
+        'rows': sum(partial['rows'] for partial in partials),
+    }
+
+
+def save_report(report_date, totals):
+    """Replace the report rows of ``report_date``; return how many rows were written."""
+    rows = []
+    if totals is not None:
+        scheme_codes = dict(MutualFund.objects.filter(id__in=totals['fund_ids'].tolist()).values_list('id', 'scheme_code'))
+        family_names = dict(FundFamily.objects.filter(id__in=totals['family_ids'].tolist()).values_list('id', 'name'))
+        for dimension, ids, labels, prefix in (
+            ('scheme', totals['fund_ids'], scheme_codes, 'scheme'),
+            ('family', totals['family_ids'], family_names, 'family'),
+            ('segment', range(len(SEGMENT_LABELS)), dict(enumerate(SEGMENT_LABELS)), 'segment'),
+        ):
+            holders, invested, aum = (totals[f'{prefix}_{name}'] for name in ('holders', 'invested', 'aum'))
+            for position, item in enumerate(ids):
+                if holders[position] or dimension == 'segment':
+                    rows.append(AumReport(
+                        report_date=report_date, dimension=dimension, key=str(labels.get(int(item), item)),
+                        holders=int(holders[position]), invested_amount=round(float(invested[position]), 2),
+                        aum=round(float(aum[position]), 2),
+                    ))
+    with transaction.atomic():
+        AumReport.objects.filter(report_date=report_date).delete()
+        AumReport.objects.bulk_create(rows, batch_size=1000)
+    logger.info("Saved AUM report for %s with %s rows", report_date, len(rows))
+    return len(rows)
+
+
+def build_report(report_date=None, shards=1, chunk_size=REPORT_CHUNK_SIZE):
+    """Run every shard in this process and save the report (used by tests and manual runs)."""
+    partials = [aggregate_shard(start, stop, chunk_size) for start, stop in shard_bounds(shards)]
+    return save_report(report_date or date.today(), merge_shards(partials))
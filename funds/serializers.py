@@ -1,5 +1,8 @@
 from rest_framework import serializers
+from core.fast_serializers import Computed, ValuesSerializer, iso_date
+from .holdings import REMAINING_COST, REMAINING_UNITS
 from .models import FundFamily, MutualFund, Portfolio
+from .valuation import current_value
 from rest_framework import serializers
 from .models import FundFamily, MutualFund
 
@@ -41,4 +44,61 @@ class PortfolioSerializer(serializers.ModelSerializer):
 
     def get_current_value(self, obj):
         """Calculate current value based on units and NAV."""
-        return round(obj.units * obj.mutual_fund.nav, 2)
+        return current_value(obj.units, obj.mutual_fund.nav)
+
+
+# Read-only serializers for the list endpoints. They produce the same output as
+# the ModelSerializers above, but work from values_list() tuples.
+
+class FundFamilyReadSerializer(ValuesSerializer):
+    """Fast read-only counterpart of FundFamilySerializer."""
+    fields = {
+        'id': 'id',
+        'name': 'name',
+    }
+
+
+class MutualFundReadSerializer(ValuesSerializer):
+    """Fast read-only counterpart of MutualFundSerializer."""
+    fields = {
+        'scheme_code': 'scheme_code',
+        'isin_growth': 'isin_growth',
+        'isin_reinvestment': 'isin_reinvestment',
+        'scheme_name': 'scheme_name',
+        'nav': 'nav',
+        'nav_date': Computed(iso_date, 'nav_date'),
+        'scheme_type': 'scheme_type',
+        'scheme_category': 'scheme_category',
+        'fund_family': 'fund_family_id',
+    }
+
+
+class PortfolioReadSerializer(ValuesSerializer):
+    """Fast read-only counterpart of PortfolioSerializer; joins the fund in the same query."""
+    fields = {
+        'scheme_name': 'mutual_fund__scheme_name',
+        'units': 'units',
+        'invested_amount': 'invested_amount',
+        'current_value': Computed(current_value, 'units', 'mutual_fund__nav'),
+        'nav': 'mutual_fund__nav',
+    }
+
+
+class OpenLotReadSerializer(ValuesSerializer):
+    """
+    The portfolio endpoints' rows: each purchase not yet fully redeemed, with
+    the units and cost left in it, in the same shape as PortfolioReadSerializer.
+    """
+    fields = {
+        'scheme_name': 'mutual_fund__scheme_name',
+        'units': 'remaining_units',
+        'invested_amount': 'remaining_cost',
+        'current_value': Computed(current_value, 'remaining_units', 'mutual_fund__nav'),
+        'nav': 'mutual_fund__nav',
+    }
+
+    @classmethod
+    def queryset(cls, queryset):
+        return super().queryset(
+            queryset.filter(is_open=True).annotate(remaining_units=REMAINING_UNITS, remaining_cost=REMAINING_COST)
+        )
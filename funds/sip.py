@@ -0,0 +1,129 @@
+"""
+Systematic investment plans (SIPs).
+
+A ``SipMandate`` buys ``amount`` rupees of a scheme every month on its
+``day_of_month``. Once a day the scheduler (``funds.tasks.run_sip_mandates``)
+executes every active mandate whose ``next_run_date`` has come:
+
+* the due mandates are split into ``user_id`` ranges (``shard_bounds``), one
+  ``sip_mandate_shard`` task each;
+* the trigger reads the NAV of every scheme with a due mandate once
+  (``price_snapshot``) and sends the same prices to every shard, so a day's
+  instalments are priced alike even when an ingest lands during the run;
+* a shard runs in one transaction (``execute_shard``): it locks its due
+  mandates with ``SKIP LOCKED``, inserts one ``Portfolio`` lot per mandate
+  with ``bulk_create``, adds the positions to ``SchemeHolding``, refreshes
+  its users' valuations and moves every mandate to its next date.
+
+A shard commits all of its instalments or none, and a mandate that ran is no
+longer due, so a failed shard is retried as a whole and a redelivered one
+finds nothing left to buy. Mandates of schemes without a usable NAV stay due
+for the next run. Months missed while the scheduler was down are not caught
+up: a late mandate runs once and moves to its next date after the run date.
+"""
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F, Max, Min
+from django.utils import timezone
+
+from core.utils import get_logger
+
+from .holdings import add_holdings
+from .models import MutualFund, Portfolio, SipMandate
+from .valuation import refresh_valuations
+
+logger = get_logger(__name__)
+
+# Rows per INSERT / UPDATE statement inside a shard
+SIP_BATCH_SIZE = 1000
+# Fund houses allot units to three decimals
+UNITS_DECIMALS = 3
+
+
+def next_run_date(day_of_month, after):
+    """The first ``day_of_month`` strictly after ``after``."""
+    if after.day < day_of_month:
+        return after.replace(day=day_of_month)
+    year, month = divmod(after.year * 12 + after.month, 12)  # the month after, counted from 0
+    return date(year, month + 1, day_of_month)
+
+
+def due_mandates(run_date):
+    return SipMandate.objects.filter(is_active=True, next_run_date__lte=run_date)
+
+
+def shard_bounds(run_date, shards):
+    """Split the range of user ids with a due mandate into ``[start, stop)`` ranges."""
+    bounds = due_mandates(run_date).aggregate(first=Min('user_id'), last=Max('user_id'))
+    if bounds['first'] is None:
+        return []
+    first, stop = bounds['first'], bounds['last'] + 1
+    step = -(-(stop - first) // max(shards, 1))
+    return [(start, min(start + step, stop)) for start in range(first, stop, step)]
+
+
+def price_snapshot(run_date):
+    """``[mutual_fund_id, nav]`` of every scheme with a mandate due on ``run_date``."""
+    return [
+        [mutual_fund_id, nav]
+        for mutual_fund_id, nav in MutualFund.objects.filter(
+            id__in=due_mandates(run_date).values('mutual_fund_id'),
+        ).values_list('id', 'nav')
+        if nav and nav > 0
+    ]
+
+
+def execute_shard(user_id_from, user_id_to, run_date, prices, batch_size=SIP_BATCH_SIZE):
+    """
+    Buy the instalments due on ``run_date`` for users in ``[user_id_from, user_id_to)``
+    at ``prices`` (as returned by ``price_snapshot``). Returns the counts.
+    """
+    prices = dict(prices)
+    now = timezone.now()
+    with transaction.atomic():
+        mandates = list(
+            due_mandates(run_date).filter(user_id__gte=user_id_from, user_id__lt=user_id_to)
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'user_id', 'mutual_fund_id', 'amount', 'day_of_month')
+        )
+
+        lots = []
+        positions = defaultdict(lambda: [0.0, 0.0])
+        advanced = defaultdict(list)  # next run date -> mandate ids
+        for mandate_id, user_id, mutual_fund_id, amount, day_of_month in mandates:
+            nav = prices.get(mutual_fund_id)
+            if nav is None:
+                continue  # No NAV in the snapshot; the mandate stays due
+            units = round(amount / nav, UNITS_DECIMALS)
+            lots.append(Portfolio(user_id=user_id, mutual_fund_id=mutual_fund_id, units=units, invested_amount=amount))
+            position = positions[user_id, mutual_fund_id]
+            position[0] += units
+            position[1] += amount
+            advanced[next_run_date(day_of_month, run_date)].append(mandate_id)
+
+        Portfolio.objects.bulk_create(lots, batch_size=batch_size)
+        add_holdings(positions, batch_size)
+        for next_date, mandate_ids in advanced.items():
+            for start in range(0, len(mandate_ids), batch_size):
+                SipMandate.objects.filter(pk__in=mandate_ids[start:start + batch_size]).update(
+                    next_run_date=next_date, last_run_date=run_date, instalments=F('instalments') + 1,
+                    updated_at=now,
+                )
+        refresh_valuations({user_id for user_id, _ in positions})
+
+    result = {'due_mandates': len(mandates), 'purchases': len(lots), 'unpriced': len(mandates) - len(lots)}
+    logger.info("SIP shard %s-%s for %s: %s", user_id_from, user_id_to, run_date, result)
+    return result
+
+
+def run_due_mandates(run_date=None, shards=1):
+    """Run every shard in this process (used by tests and manual runs)."""
+    run_date = run_date or timezone.localdate()
+    prices = price_snapshot(run_date)
+    totals = {'due_mandates': 0, 'purchases': 0, 'unpriced': 0}
+    for start, stop in shard_bounds(run_date, shards):
+        for key, count in execute_shard(start, stop, run_date, prices).items():
+            totals[key] += count
+    return totals
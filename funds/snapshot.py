@@ -0,0 +1,195 @@
+"""
+Memory-mapped scheme master snapshot.
+
+The ingest writes every scheme's ``id``, ``scheme_code``, ``nav``, ``nav_date``
+and ``scheme_name`` into one binary file sorted by ``scheme_code``. Web and
+worker processes ``mmap`` the file and binary-search it, so NAV lookups never
+touch the database and a fresh process is ready as soon as the file is mapped.
+
+Layout (little-endian)::
+
+    header   <6sHIIQ     magic b'MFSNAP', format version, row count n,
+                         string table size, generation
+    float64[n]  nav
+    int64[n]    mutual fund id
+    int32[n]    scheme_code (ascending)
+    int32[n]    nav_date as days since 1970-01-01
+    uint32[n+1] offsets of each scheme_name in the string table
+    bytes       string table (UTF-8 scheme names)
+
+The file is replaced atomically with ``os.replace``. ``get_snapshot()`` checks
+the file at most every ``SCHEME_SNAPSHOT_CHECK_INTERVAL`` seconds and swaps to
+the new generation without a restart; readers holding the previous snapshot
+keep a valid mapping until they drop it.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import date
+
+from django.conf import settings
+
+from core.utils import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b'MFSNAP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<6sHIIQ')
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+SchemeRecord = namedtuple('SchemeRecord', ['id', 'scheme_code', 'nav', 'nav_date', 'scheme_name'])
+
+
+def get_snapshot_path():
+    return os.fspath(settings.SCHEME_SNAPSHOT_PATH)
+
+
+def write_snapshot(path=None):
+    """Write the current scheme master to ``path`` atomically; return the row count."""
+    from .models import MutualFund
+
+    path = path or get_snapshot_path()
+    navs, ids, codes, days, offsets = array('d'), array('q'), array('i'), array('i'), array('I', [0])
+    names = bytearray()
+    rows = MutualFund.objects.order_by('scheme_code').values_list(
+        'id', 'scheme_code', 'nav', 'nav_date', 'scheme_name'
+    ).iterator(chunk_size=2000)
+    for fund_id, scheme_code, nav, nav_date, scheme_name in rows:
+        navs.append(nav)
+        ids.append(fund_id)
+        codes.append(scheme_code)
+        days.append(nav_date.toordinal() - EPOCH_ORDINAL)
+        names += scheme_name.encode()
+        offsets.append(len(names))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, tmp_path = tempfile.mkstemp(dir=directory, prefix='.scheme-snapshot-')
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(codes), len(names), time.time_ns()))
+            for column in (navs, ids, codes, days, offsets):
+                column.tofile(output)
+            output.write(names)
+            output.flush()
+            os.fsync(output.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logger.info("Wrote scheme snapshot with %s schemes to %s", len(codes), path)
+    return len(codes)
+
+
+def refresh_snapshot():
+    """Rewrite the snapshot after an ingest. Failures are logged, never raised."""
+    try:
+        return write_snapshot()
+    except Exception as error:
+        logger.exception("Could not write the scheme snapshot: %s", error)
+        return None
+
+
+class SchemeSnapshot:
+    """Read-only view over a mapped snapshot file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as source:
+            self.stat = os.fstat(source.fileno())
+            self.mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, names_size, self.generation = HEADER.unpack_from(self.mapped, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a scheme snapshot.')
+
+        view = memoryview(self.mapped)
+        offset = HEADER.size
+        columns = []
+        for code, width, length in (('d', 8, count), ('q', 8, count), ('i', 4, count),
+                                    ('i', 4, count), ('I', 4, count + 1)):
+            columns.append(view[offset:offset + width * length].cast(code))
+            offset += width * length
+        self.navs, self.ids, self.codes, self.days, self.offsets = columns
+        self.names = view[offset:offset + names_size]
+        self.path = path
+
+    def __len__(self):
+        return len(self.codes)
+
+    def index(self, scheme_code):
+        """Position of ``scheme_code``, or ``None`` when it is not in the snapshot."""
+        try:
+            scheme_code = int(scheme_code)
+        except (TypeError, ValueError):
+            return None
+        position = bisect_left(self.codes, scheme_code)
+        if position < len(self.codes) and self.codes[position] == scheme_code:
+            return position
+        return None
+
+    def nav(self, scheme_code):
+        position = self.index(scheme_code)
+        return None if position is None else self.navs[position]
+
+    def get(self, scheme_code):
+        position = self.index(scheme_code)
+        if position is None:
+            return None
+        name = bytes(self.names[self.offsets[position]:self.offsets[position + 1]]).decode()
+        return SchemeRecord(
+            self.ids[position], self.codes[position], self.navs[position],
+            date.fromordinal(EPOCH_ORDINAL + self.days[position]), name,
+        )
+
+    def is_current(self):
+        """True while the file on disk is still the one that was mapped."""
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return (current.st_ino, current.st_mtime_ns, current.st_size) == (
+            self.stat.st_ino, self.stat.st_mtime_ns, self.stat.st_size)
+
+
+_lock = threading.Lock()
+_snapshot = None
+_checked_at = 0.0
+
+
+def get_snapshot():
+    """
+    The process-wide snapshot, reopened when the file has been replaced.
+    Returns ``None`` when no snapshot has been written yet.
+    """
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < settings.SCHEME_SNAPSHOT_CHECK_INTERVAL:
+        return snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.path != get_snapshot_path() or not _snapshot.is_current():
+            try:
+                _snapshot = SchemeSnapshot(get_snapshot_path())
+            except FileNotFoundError:
+                _snapshot = None
+            except ValueError as error:
+                logger.error("Ignoring scheme snapshot: %s", error)
+                _snapshot = None
+            else:
+                logger.info("Loaded scheme snapshot generation %s (%s schemes)",
+                            _snapshot.generation, len(_snapshot))
+        _checked_at = now
+        return _snapshot
+
+
+def lookup_scheme(scheme_code):
+    """``SchemeRecord`` for ``scheme_code`` from the snapshot, or ``None``."""
+    snapshot = get_snapshot()
+    return None if snapshot is None else snapshot.get(scheme_code)
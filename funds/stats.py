@@ -0,0 +1,99 @@
+"""
+Fund family and category statistics.
+
+``compute_stats`` gathers scheme counts, average NAV and platform AUM (units
+held times NAV) per (family, category) with a single grouped query, then
+rolls the rows up per family and per category. The result is cached under
+a version key that the ingest bumps after it commits new schemes or NAVs.
+Purchases, redemptions and SIP runs do not invalidate it: the AUM they move
+shows up when the entry expires after ``FUND_STATS_CACHE_TIMEOUT`` seconds,
+so a busy order flow cannot turn every read into a recomputation.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import MutualFund, SchemeHolding
+
+VERSION_KEY = 'funds:stats:version'
+
+
+def bump_stats_version():
+    """Invalidate cached stats. Time-based, so a lost version key cannot resurrect old entries."""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def get_stats_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def grouped_rows():
+    """One row per (family, category) with count, NAV total and AUM."""
+    units_held = (
+        SchemeHolding.objects.filter(mutual_fund=OuterRef('pk'))
+        .values('mutual_fund').annotate(total_units=Sum('units')).values('total_units')
+    )
+    return (
+        MutualFund.objects.values_list('fund_family_id', 'fund_family__name', 'scheme_category')
+        .annotate(
+            scheme_count=Count('id'),
+            nav_total=Sum('nav'),
+            aum=Sum(Coalesce(Subquery(units_held, output_field=FloatField()), 0.0) * F('nav')),
+        )
+        .order_by('fund_family__name', 'scheme_category')
+    )
+
+
+def _bucket(**fields):
+    return dict(fields, scheme_count=0, nav_total=0.0, aum=0.0)
+
+
+def _add(bucket, scheme_count, nav_total, aum):
+    bucket['scheme_count'] += scheme_count
+    bucket['nav_total'] += nav_total
+    bucket['aum'] += aum
+
+
+def _finish(bucket):
+    nav_total = bucket.pop('nav_total')
+    bucket['average_nav'] = round(nav_total / bucket['scheme_count'], 4) if bucket['scheme_count'] else None
+    bucket['aum'] = round(bucket['aum'], 2)
+    return bucket
+
+
+def compute_stats():
+    families, categories = {}, {}
+    for family_id, family_name, category, scheme_count, nav_total, aum in grouped_rows():
+        family = families.get(family_id)
+        if family is None:
+            family = families[family_id] = _bucket(id=family_id, name=family_name, categories=[])
+        category_bucket = _bucket(category=category)
+        for bucket in (family, category_bucket, categories.setdefault(category, _bucket(category=category))):
+            _add(bucket, scheme_count, nav_total, aum or 0.0)
+        family['categories'].append(_finish(category_bucket))
+
+    families = [_finish(family) for family in families.values()]
+    return {
+        'families': families,
+        'categories': [_finish(categories[name]) for name in sorted(categories)],
+        'total_schemes': sum(family['scheme_count'] for family in families),
+        'total_aum': round(sum(family['aum'] for family in families), 2),
+    }
+
+
+def get_stats():
+    """Cached stats for the current version; computed on a miss."""
+    key = f'funds:stats:{get_stats_version()}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_stats()
+        cache.set(key, stats, settings.FUND_STATS_CACHE_TIMEOUT)
+    return stats
@@ -1,21 +1,120 @@
-from celery import shared_task
-from .views import FetchFundsByFamilyView
+from datetime import date
+from celery import chord, group, shared_task
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from .ingest import finish_run, request_ingest, run_ingest
+from .locks import LeaseUnavailable
+from .models import IngestRun
+from .sip import execute_shard, price_snapshot, shard_bounds as sip_shard_bounds
+from .valuation import revalue_funds
 
-@shared_task
-def fetch_and_save_funds():
+
+def lease_retries():
+    """Retries that outlast the lease of a crashed holder, after which it expires."""
+    return -(-settings.INGEST_LEASE_TTL_MS // (settings.INGEST_RETRY_DELAY * 1000)) + 1
+
+
+@shared_task(bind=True)
+def fetch_and_save_funds(self, run_id=None):
     """
     Celery task to fetch mutual fund data from a third-party API 
     and save it to the database. This task is triggered asynchronously.
+
+    Scheduled calls come without a run_id and start a run unless one is already
+    active. The run waits and retries while another ingest holds the lease, and
+    is marked failed once the lease stays taken for longer than its TTL.
+    """
+    if run_id is None:
+        run, started = request_ingest('schedule', enqueue=False)
+        if not started:
+            return {"attached_to": run.id}  # An ingest is already in flight
+        run_id = run.id
+
+    try:
+        run = run_ingest(run_id)
+    except LeaseUnavailable as error:
+        retries = lease_retries()
+        if self.request.retries >= retries:
+            # Left active, the run would hold every later trigger until INGEST_RUN_TIMEOUT
+            finish_run(run_id, IngestRun.FAILED, error='Gave up waiting for the ingest lease.')
+            raise
+        raise self.retry(exc=error, countdown=settings.INGEST_RETRY_DELAY, max_retries=retries)
+
+    return {
+        "run_id": run.id,
+        "status": run.status,
+        "created_funds": run.created_funds,  # Number of successfully created funds
+        "updated_funds": run.updated_funds,  # Number of funds whose NAV changed
+        "failed_funds": run.failed_funds,    # Number of funds that failed validation
+        "quarantined_funds": run.quarantined_funds,  # Number of suspicious NAVs held back
+        "error": run.error,
+    }
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def refresh_portfolio_valuations(mutual_fund_ids):
+    """
+    Celery task to recompute the stored portfolio valuations of every user
+    holding one of the given mutual funds. Queued by the ingest after NAVs change.
+    Recomputing is idempotent, so the message is only acknowledged once it ran.
+    """
+    return {"revalued_portfolios": revalue_funds(mutual_fund_ids)}
+
+
+@shared_task
+def build_aum_report(report_date=None, shards=None):
     """
-    fetch_funds_view = FetchFundsByFamilyView()
+    Celery task to build the daily AUM report. Holdings are split into user_id
+    ranges, aggregated by one aum_report_shard task each, and merged by save_aum_report.
+    """
+    from .reports import shard_bounds  # NumPy is only loaded by the reporting workers
+
+    report_date = report_date or date.today().isoformat()
+    bounds = shard_bounds(shards or settings.AUM_REPORT_SHARDS)
+    if not bounds:
+        return save_aum_report([], report_date)
+    return chord(aum_report_shard.s(start, stop) for start, stop in bounds)(save_aum_report.s(report_date)).id
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def aum_report_shard(user_id_from, user_id_to):
+    """Aggregate the holdings of one user_id range for the AUM report."""
+    from .reports import aggregate_shard
+
+    return aggregate_shard(user_id_from, user_id_to)
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def save_aum_report(partials, report_date):
+    """Merge the shard results and store the AUM report rows."""
+    from .reports import merge_shards, save_report
+
+    return {"report_rows": save_report(date.fromisoformat(report_date), merge_shards(partials))}
 
-    # Call the view's logic to fetch and save mutual fund data to the database
+
+@shared_task
+def run_sip_mandates(run_date=None, shards=None):
+    """
+    Celery task to execute the SIP instalments due today. Due mandates are split
+    into user_id ranges, priced against one read of the NAVs and bought by one
+    sip_mandate_shard task each.
+    """
+    run_date = run_date or timezone.localdate().isoformat()
+    bounds = sip_shard_bounds(date.fromisoformat(run_date), shards or settings.SIP_SHARDS)
+    if not bounds:
+        return {"shards": 0}
+    prices = price_snapshot(date.fromisoformat(run_date))
+    return group(sip_mandate_shard.s(start, stop, run_date, prices) for start, stop in bounds).apply_async().id
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=5)
+def sip_mandate_shard(self, user_id_from, user_id_to, run_date, prices):
+    """
+    Buy the due SIP instalments of one user_id range. The shard is one
+    transaction, so after a database error it is retried as a whole.
+    """
     try:
-        data = fetch_funds_view.fetch_funds_from_api()  # Fetch funds data from API
-        created_funds, failed_funds = fetch_funds_view.save_funds_to_db(data)  # Save to DB
-        return {
-            "created_funds": created_funds,  # List of successfully created funds
-            "failed_funds": failed_funds,    # List of failed funds with errors
-        }
-    except Exception as error:
-        return {"error": str(error)}  # Return error message in case of failure
+        return execute_shard(user_id_from, user_id_to, date.fromisoformat(run_date), prices)
+    except DatabaseError as error:
+        raise self.retry(exc=error, countdown=settings.SIP_RETRY_DELAY)
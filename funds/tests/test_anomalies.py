@@ -0,0 +1,93 @@
+from datetime import date
+from unittest import mock
+import numpy as np
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.test import override_settings
+from funds.anomalies import find_anomalies
+from funds.models import FundFamily, IngestRun, MutualFund, QuarantinedNav
+from funds import ingest
+import logging
+
+
+def item(code, nav, nav_date='02-Apr-2025'):
+    return {
+        'Scheme_Code': code, 'Scheme_Name': f'Scheme {code}', 'Net_Asset_Value': nav, 'Date': nav_date,
+        'Scheme_Type': 'Open Ended Schemes', 'Scheme_Category': 'Equity', 'Mutual_Fund_Family': 'Axis Mutual Fund',
+    }
+
+
+@override_settings(NAV_MAX_CHANGE=0.25, NAV_STALE_DAYS=7)
+class NavAnomalyTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        snapshot = mock.patch('funds.ingest.refresh_snapshot')  # The scheme master file is not under test
+        snapshot.start()
+        self.addCleanup(snapshot.stop)
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        for code in range(101, 106):
+            MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme {code}', nav=20.0, nav_date=date(2025, 4, 1),
+                scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+            )
+
+    def test_suspicious_navs_are_quarantined(self):
+        """Zero, jumping and out-of-date NAVs are held back; the plausible one is saved."""
+        run = IngestRun.objects.create(trigger='schedule')
+        feed = [
+            item(101, '21.5'),                   # fine
+            item(102, '0'),                      # zero
+            item(103, '200.0'),                  # decimal slip
+            item(104, '20.5', '31-Mar-2025'),    # older than the stored NAV
+            item(105, '20.5', '10-Mar-2025'),    # weeks behind the rest of the feed
+            item(106, '-1'),                     # new scheme with a negative NAV
+        ]
+        created, updated, failed = ingest.save_feed(feed, run.id)
+
+        self.assertEqual((created, updated, failed), ([], ['Scheme 101'], []))
+        reasons = dict(QuarantinedNav.objects.values_list('scheme_code', 'reason'))
+        self.assertEqual(reasons, {102: 'non_positive', 103: 'jump', 104: 'stale', 105: 'stale', 106: 'non_positive'})
+        self.assertEqual(set(MutualFund.objects.exclude(scheme_code=101).values_list('nav', flat=True)), {20.0})
+        self.assertFalse(MutualFund.objects.filter(scheme_code=106).exists())
+
+        jump = QuarantinedNav.objects.get(scheme_code=103)
+        self.assertEqual((jump.previous_nav, jump.previous_nav_date, jump.ingest_run_id), (20.0, date(2025, 4, 1), run.id))
+        run.refresh_from_db()
+        self.assertEqual(run.quarantined_funds, 5)
+
+    def test_repeated_bad_values_are_kept_once(self):
+        """Upstream resending the same bad NAV does not pile up review rows."""
+        for _ in range(2):
+            ingest.save_feed([item(102, '0')])
+        self.assertEqual(QuarantinedNav.objects.count(), 1)
+
+    def test_unchanged_navs_are_not_screened(self):
+        """A NAV equal to the stored one is never flagged, however old it is."""
+        ingest.save_feed([item(101, '20.0', '01-Apr-2025'), item(102, '21', '20-Apr-2025')])
+        self.assertFalse(QuarantinedNav.objects.exists())
+
+    def test_empty_catalogue(self):
+        """Every scheme is new: only value and date checks apply."""
+        empty = np.array([], dtype=np.int64)
+        reasons, positions = find_anomalies(
+            np.array([1, 2]), np.array([10.0, 0.0]), np.array([739000, 739000]),
+            empty, np.array([]), empty, 739000,
+        )
+        self.assertEqual(reasons.tolist(), [0, 1])
+        self.assertEqual(positions.tolist(), [-1, -1])
+
+    def test_dense_and_sparse_codes_align_alike(self):
+        """Direct indexing and the sorted search find the same catalogue rows."""
+        codes = np.array([7, 3, 1000000, 5, 9])
+        for catalogue_codes in (np.array([5, 3, 7]), np.array([5, 3, 7, 1000000])):
+            reasons, positions = find_anomalies(
+                codes, np.full(5, 10.0), np.full(5, 739000),
+                catalogue_codes, np.full(len(catalogue_codes), 10.0), np.full(len(catalogue_codes), 739000), 739000,
+            )
+            expected = [2, 1, 3 if len(catalogue_codes) == 4 else -1, 0, -1]
+            self.assertEqual(positions.tolist(), expected)
+            self.assertEqual(reasons.tolist(), [0] * 5)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
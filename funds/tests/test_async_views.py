@@ -0,0 +1,78 @@
+import json
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import BlacklistedToken
+from funds.models import FundFamily, MutualFund, Portfolio
+import logging
+
+User = get_user_model()
+
+
+class AsyncReadViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.token = str(AccessToken.for_user(self.user))
+        self.headers = {'Authorization': f'Bearer {self.token}'}
+        families = [FundFamily.objects.create(name=f'Family {index}') for index in range(15)]
+        fund = MutualFund.objects.create(
+            scheme_code=119551, scheme_name='Axis Bluechip Fund', nav=45.5,
+            nav_date=date(2025, 4, 1), scheme_type='Open Ended Schemes',
+            scheme_category='Equity', fund_family=families[0],
+        )
+        Portfolio.objects.create(user=self.user, mutual_fund=fund, units=3, invested_amount=120)
+
+    async def test_fund_families_match_sync_view(self):
+        """The async list returns the same page as the DRF view."""
+        sync_response = await self.async_client.get(
+            reverse('funds:list_fund_families'), {'page': 2, 'page_size': 5}, headers=self.headers,
+        )
+        async_response = await self.async_client.get(
+            reverse('funds:async_list_fund_families'), {'page': 2, 'page_size': 5}, headers=self.headers,
+        )
+
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        sync_data, async_data = sync_response.json(), async_response.json()
+        self.assertEqual(async_data['results'], sync_data['results'])
+        self.assertEqual(async_data['count'], 15)
+        self.assertIn('page=3', async_data['next'])
+        self.assertNotIn('page=', async_data['previous'])
+
+    async def test_fund_families_out_of_range_page(self):
+        """A page past the end returns 404 like the sync view."""
+        response = await self.async_client.get(
+            reverse('funds:async_list_fund_families'), {'page': 9}, headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(response.json()['success'])
+
+    async def test_portfolio_matches_sync_view(self):
+        """The async portfolio carries the serializer fields and values."""
+        sync_response = await self.async_client.get(reverse('funds:user_portfolio'), headers=self.headers)
+        async_response = await self.async_client.get(reverse('funds:async_user_portfolio'), headers=self.headers)
+
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        sync_content = await sync_to_async(b''.join)(sync_response.streaming_content)
+        self.assertEqual(async_response.json(), json.loads(sync_content))
+
+    async def test_requires_authentication(self):
+        """Requests without a token are rejected with 401."""
+        response = await self.async_client.get(reverse('funds:async_user_portfolio'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('WWW-Authenticate', response.headers)
+
+    async def test_blacklisted_token_is_rejected(self):
+        """Logged-out tokens cannot be used on the async views."""
+        await BlacklistedToken.objects.acreate(token=self.token)
+        response = await self.async_client.get(reverse('funds:async_user_portfolio'), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,145 @@
+import os
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core import metrics
+from funds.models import FundFamily, MutualFund
+from funds.holdings import add_holding
+from MutualFundBroker.celery import apply_worker_profile, select_profile_queues
+import logging
+
+User = get_user_model()
+
+# The Celery settings read these before the Django settings
+IN_MEMORY_BROKER = {'CELERY_BROKER_URL': 'memory://', 'CELERY_RESULT_BACKEND': 'cache+memory://'}
+
+
+def celery_app():
+    """A Celery app with the project's configuration, isolated from the shared one."""
+    test_app = Celery('MutualFundBroker', set_as_current=False)
+    test_app.config_from_object('django.conf:settings', namespace='CELERY')
+    return test_app
+
+
+class TaskRoutingTestCase(TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.app = celery_app()
+
+    def route(self, name):
+        return self.app.amqp.router.route({}, name)
+
+    def test_tasks_are_routed_to_their_queues(self):
+        """Ingest, valuation and notification tasks leave the default queue."""
+        self.assertEqual(self.route('funds.tasks.fetch_and_save_funds')['queue'].name, 'ingest')
+        for name in ('refresh_portfolio_valuations', 'build_aum_report', 'aum_report_shard', 'save_aum_report'):
+            self.assertEqual(self.route(f'funds.tasks.{name}')['queue'].name, 'valuation')
+        self.assertEqual(self.route('notification.tasks.send_notifications')['queue'].name, 'notifications')
+        self.assertEqual(self.route('MutualFundBroker.celery.debug_task')['queue'].name, 'default')
+
+    def test_report_chunks_are_compressed(self):
+        """The merge task carrying every shard result is sent compressed."""
+        self.assertEqual(self.route('funds.tasks.save_aum_report')['compression'], 'zlib')
+
+    def test_worker_profile_sets_tuning_and_queues(self):
+        """CELERY_WORKER_PROFILE picks concurrency, prefetch and the consumed queues."""
+        with mock.patch.dict(os.environ, CELERY_WORKER_PROFILE='ingest'):
+            apply_worker_profile(self.app)
+            select_profile_queues(instance=SimpleNamespace(app=self.app), options={})
+        self.assertEqual(self.app.conf.worker_concurrency, 1)
+        self.assertEqual(self.app.conf.worker_prefetch_multiplier, 1)
+        self.assertEqual(set(self.app.amqp.queues.consume_from), {'ingest'})
+
+    def test_explicit_queues_override_the_profile(self):
+        """Queues given with -Q are not replaced by the profile's."""
+        with mock.patch.dict(os.environ, CELERY_WORKER_PROFILE='ingest'):
+            select_profile_queues(instance=SimpleNamespace(app=self.app), options={'queues': 'default'})
+        self.assertEqual(set(self.app.amqp.queues.consume_from), {'default', 'ingest', 'valuation', 'notifications'})
+
+    def tearDown(self):
+        self.app.close()
+        logging.disable(logging.NOTSET)
+
+
+class InMemoryWorkerTestCase(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.environ = mock.patch.dict(os.environ, IN_MEMORY_BROKER)
+        self.environ.start()
+        self.app = celery_app()
+        metrics.connect_celery_signals()
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        self.fund = MutualFund.objects.create(
+            scheme_code=1, scheme_name='Axis Bluechip', nav=20.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+        )
+        user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        add_holding(user.id, self.fund.id, 5, 100)
+
+    def test_valuation_worker_runs_while_ingest_waits(self):
+        """A valuation worker serves its queue while an ingest message waits in its own."""
+        self.app.tasks['funds.tasks.fetch_and_save_funds'].delay(run_id=0)
+        with start_worker(self.app, queues=['valuation'], perform_ping_check=False, shutdown_timeout=30):
+            result = self.app.tasks['funds.tasks.refresh_portfolio_valuations'].delay([self.fund.id])
+            self.assertEqual(result.get(timeout=30), {'revalued_portfolios': 1})
+
+        text = metrics.render(self.app)
+        labels = 'task="funds.tasks.refresh_portfolio_valuations",queue="valuation"'
+        self.assertIn(f'celery_task_runtime_seconds_count{{{labels}}} 1', text)
+        self.assertIn(f'celery_task_queue_wait_seconds_count{{{labels}}} 1', text)
+        self.assertIn('celery_tasks_total{task="funds.tasks.refresh_portfolio_valuations",state="SUCCESS"} 1', text)
+        self.assertIn('celery_broker_up 1', text)
+        self.assertIn('celery_queue_depth{queue="ingest"} 1', text)
+        self.assertIn('celery_queue_depth{queue="valuation"} 0', text)
+
+    def tearDown(self):
+        # The memory transport keeps its queues for the whole process
+        with self.app.connection_for_write() as connection:
+            for name in self.app.amqp.queues:
+                connection.default_channel.queue_purge(name)
+        self.app.close()
+        self.environ.stop()
+        logging.disable(logging.NOTSET)
+
+
+class MetricsViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.url = reverse('metrics')
+
+    def test_metrics_are_staff_only(self):
+        """Regular users cannot scrape the metrics."""
+        user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_render_histograms(self):
+        """Recorded latencies show up as cumulative Prometheus buckets."""
+        metrics.observe('runtime', 'funds.tasks.fetch_and_save_funds', 0.2)
+        metrics.observe('runtime', 'funds.tasks.fetch_and_save_funds', 45)
+        staff = User.objects.create_user(email='ops@example.com', username='ops', password='Test1234', is_staff=True)
+        self.client.force_authenticate(staff)
+
+        with mock.patch.object(metrics, 'queue_depths', return_value=None):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        text = response.content.decode()
+        labels = 'task="funds.tasks.fetch_and_save_funds",queue="ingest"'
+        self.assertIn(f'celery_task_runtime_seconds_bucket{{{labels},le="0.25"}} 1', text)
+        self.assertIn(f'celery_task_runtime_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'celery_task_runtime_seconds_sum{{{labels}}} 45.2', text)
+        self.assertIn('celery_broker_up 0', text)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
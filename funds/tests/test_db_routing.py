@@ -0,0 +1,102 @@
+import os
+import tempfile
+from datetime import date
+from django.test import TestCase
+from django.urls import reverse
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from core.db import REPLICA_DB_ALIAS, ReplicaRouter, catalogue_db
+from funds.models import FundFamily, MutualFund, Portfolio
+
+User = get_user_model()
+
+
+class ReplicaRoutingTestCase(TestCase):
+    """Routing between the default test database and a second local SQLite file."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        replica_settings = {
+            **connections['default'].settings_dict,
+            'NAME': os.path.join(self.tmpdir.name, 'replica.sqlite3'),
+        }
+        connections.settings[REPLICA_DB_ALIAS] = replica_settings
+        with connections[REPLICA_DB_ALIAS].schema_editor() as editor:
+            editor.create_model(FundFamily)
+            editor.create_model(MutualFund)
+
+    def create_fund(self, using, family_name):
+        family = FundFamily.objects.using(using).create(id=1, name=family_name)
+        return MutualFund.objects.using(using).create(
+            id=1, scheme_code=119551, scheme_name=f'{family_name} Bluechip', nav=45.5,
+            nav_date=date(2025, 4, 1), scheme_type='Open Ended Schemes',
+            scheme_category='Equity', fund_family=family,
+        )
+
+    def test_only_catalogue_endpoints_read_the_replica(self):
+        """Read-only catalogue endpoints use the replica; plain reads, as on write paths, stay on the primary."""
+        self.create_fund('default', 'Primary')
+        self.create_fund(REPLICA_DB_ALIAS, 'Replica')
+
+        self.assertEqual(FundFamily.objects.get().name, 'Primary')
+        self.assertEqual(MutualFund.objects.get(scheme_code=119551).scheme_name, 'Primary Bluechip')
+        self.assertEqual(FundFamily.objects.using(catalogue_db()).get().name, 'Replica')
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='investor@example.com', username='investor',
+                                                           password='Test1234'))
+        response = client.get(reverse('funds:list_fund_families'))
+        self.assertEqual([family['name'] for family in response.data['results']], ['Replica'])
+
+    def test_writes_and_portfolio_reads_use_default(self):
+        """Writes never go to the replica, even when related to a replica row."""
+        self.create_fund('default', 'Primary')
+        self.create_fund(REPLICA_DB_ALIAS, 'Replica')
+        user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+
+        fund = MutualFund.objects.using(REPLICA_DB_ALIAS).get(scheme_code=119551)
+        portfolio = Portfolio.objects.create(user=user, mutual_fund=fund, units=1, invested_amount=45.5)
+
+        self.assertEqual(portfolio._state.db, 'default')
+        self.assertTrue(Portfolio.objects.filter(user=user).exists())
+        FundFamily.objects.create(name='New Family')
+        self.assertTrue(FundFamily.objects.using('default').filter(name='New Family').exists())
+
+    def test_replica_is_not_migrated(self):
+        """Schema changes are applied to the primary only."""
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate(REPLICA_DB_ALIAS, 'funds'))
+        self.assertIsNone(router.allow_migrate('default', 'funds'))
+
+    def test_without_replica_catalogue_reads_use_default(self):
+        """When no replica alias is configured the catalogue endpoints read the primary."""
+        del connections.settings[REPLICA_DB_ALIAS]
+        try:
+            self.assertEqual(catalogue_db(), 'default')
+        finally:
+            connections.settings[REPLICA_DB_ALIAS] = {}
+
+    def tearDown(self):
+        connections[REPLICA_DB_ALIAS].close()
+        del connections[REPLICA_DB_ALIAS]
+        del connections.settings[REPLICA_DB_ALIAS]
+        self.tmpdir.cleanup()
+
+
+class SQLiteWALTestCase(TestCase):
+    def test_file_database_uses_wal(self):
+        """New connections to a SQLite file are switched to WAL mode."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings_dict = {
+                **connections['default'].settings_dict,
+                'NAME': os.path.join(tmpdir, 'wal.sqlite3'),
+            }
+            connection = DatabaseWrapper(settings_dict, alias='wal_check')
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+            finally:
+                connection.close()
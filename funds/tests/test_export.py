@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from funds.export import catalogue_rows, iter_columnar, iter_columnar_groups, read_columnar
+from funds.models import FundFamily, MutualFund
+import logging
+
+User = get_user_model()
+
+
+class CatalogueExportTestCase(APITestCase):
+    def setUp(self):
+        # Throttle history lives in the cache; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        for code in range(1, 6):
+            MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme, "{code}"', nav=10.25 + code,
+                nav_date=date(2025, 4, code), scheme_type='Open Ended Schemes',
+                scheme_category='Equity', fund_family=family, isin_growth=f'INF{code}',
+            )
+        self.url = reverse('funds:export_catalogue')
+
+    def download(self, output):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'output': output})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_export(self):
+        """Each line is one scheme with its fund family name."""
+        response, content = self.download('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([record['scheme_code'] for record in records], [1, 2, 3, 4, 5])
+        self.assertEqual(records[0]['fund_family'], 'Axis Mutual Fund')
+        self.assertEqual(records[0]['nav_date'], '2025-04-01')
+        self.assertIsNone(records[0]['isin_reinvestment'])
+
+    def test_csv_export(self):
+        """The CSV export has a header row and quotes awkward values."""
+        response, content = self.download('csv')
+        self.assertIn('catalogue.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[2]['scheme_name'], 'Scheme, "3"')
+        self.assertEqual(rows[2]['nav'], '13.25')
+
+    def test_columnar_export_round_trip(self):
+        """Row groups decode back to the original columns."""
+        _, content = self.download('columnar')
+        codes, navs, days = [], [], []
+        for group_codes, group_navs, group_days in iter_columnar_groups(content):
+            codes += group_codes.tolist()
+            navs += group_navs.tolist()
+            days += group_days.tolist()
+        self.assertEqual(codes, [1, 2, 3, 4, 5])
+        self.assertEqual(navs, [11.25, 12.25, 13.25, 14.25, 15.25])
+        self.assertEqual(days[0], (date(2025, 4, 1) - date(1970, 1, 1)).days)
+
+    def test_columnar_groups_stay_aligned(self):
+        """Odd-sized row groups keep every column aligned for zero-copy reads."""
+        rows = catalogue_rows(('scheme_code', 'nav', 'nav_date'))
+        content = b''.join(iter_columnar(rows, group_rows=2))
+        groups = list(iter_columnar_groups(content))
+        self.assertEqual([len(group[0]) for group in groups], [2, 2, 1])
+        self.assertEqual(groups[2][0].tolist(), [5])
+
+    def test_invalid_output_format(self):
+        """Unknown formats are rejected before anything is streamed."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_requires_authentication(self):
+        """Anonymous users cannot download the catalogue."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_management_command_writes_memory_mappable_file(self):
+        """export_catalogue writes a file that read_columnar maps back in."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalogue.mfcol')
+            call_command('export_catalogue', format='columnar', output=path, chunk_size=2, stderr=io.StringIO())
+            codes, navs, _ = read_columnar(path)
+        self.assertEqual(codes.tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(navs[4], 15.25)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,87 @@
+from datetime import date
+from unittest import mock
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.test import override_settings
+from funds import feed
+from funds.feed import FeedRecord, decode_feed
+from funds.models import FundFamily, MutualFund
+from funds import ingest
+import logging
+
+
+def item(code, **overrides):
+    return {
+        'Scheme_Code': code, 'Scheme_Name': f'Scheme {code}', 'Net_Asset_Value': '12.5', 'Date': '02-Apr-2025',
+        'Scheme_Type': 'Open Ended Schemes', 'Scheme_Category': 'Equity', 'Mutual_Fund_Family': 'Axis Mutual Fund',
+        'ISIN_Div_Payout_ISIN_Growth': f'INF{code}', **overrides,
+    }
+
+
+class FeedDecoderTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+
+    def test_decodes_compact_records(self):
+        """Items become typed FeedRecord tuples; other scheme types are skipped."""
+        records, failures = decode_feed([item(101), item('102', Net_Asset_Value=20), item(103, Scheme_Type='Close')])
+        self.assertEqual(failures, [])
+        self.assertEqual(records[0], FeedRecord(101, 'Scheme 101', 'INF101', None, 12.5, date(2025, 4, 2),
+                                                'Open Ended Schemes', 'Equity', 'Axis Mutual Fund'))
+        self.assertEqual((records[1].scheme_code, records[1].nav), (102, 20.0))
+        self.assertEqual(len(records), 2)
+
+    def test_repeated_strings_are_shared_and_dates_parsed_once(self):
+        """Family names are interned and each distinct date is parsed a single time."""
+        items = [item(code, Mutual_Fund_Family=''.join(['Axis ', 'Mutual Fund'])) for code in range(100, 150)]
+        with mock.patch.object(feed, 'parse_date', wraps=feed.parse_date) as parse_date:
+            records, _ = decode_feed(items)
+        self.assertEqual(parse_date.call_count, 1)
+        self.assertEqual(len({id(record.fund_family) for record in records}), 1)
+
+    def test_invalid_items_are_reported_and_the_rest_kept(self):
+        """Each bad item is listed with its field errors; valid items still decode."""
+        items = [
+            item(101),
+            item(102, Net_Asset_Value='n/a'),
+            item(103, Date='2025-04-02'),
+            item(101, Scheme_Name='Copy'),
+            item(104, Scheme_Name='x' * 256),
+            {key: value for key, value in item(105).items() if key != 'Scheme_Category'},
+            item('abc'),
+            item(106, Net_Asset_Value='nan'),
+            item(107, Mutual_Fund_Family='F' * 256),
+            item(108, Scheme_Category=7),
+        ]
+        records, failures = decode_feed(items)
+        self.assertEqual([record.scheme_code for record in records], [101])
+        self.assertEqual([failure['errors'] for failure in failures], [
+            {'nav': ['A valid number is required.']},
+            {'nav_date': ['Date has wrong format. Use DD-Mon-YYYY.']},
+            {'scheme_code': ['Duplicate scheme code in the feed.']},
+            {'scheme_name': ['Ensure this field has no more than 255 characters.']},
+            {'scheme_category': ['This field is required.']},
+            {'scheme_code': ['A valid integer is required.']},
+            {'nav': ['A valid number is required.']},
+            {'fund_family': ['Ensure this field has no more than 255 characters.']},
+            {'scheme_category': ['Not a valid string.']},
+        ])
+        self.assertEqual(failures[2]['scheme_name'], 'Copy')
+
+    @override_settings(LOCK_REDIS_URL=None)
+    def test_ingest_creates_new_schemes_in_bulk(self):
+        """New schemes and their missing families are inserted without per-item serializers."""
+        FundFamily.objects.create(name='Axis Mutual Fund')
+        items = [item(101), item(102, Mutual_Fund_Family='HDFC Mutual Fund'), item(103, Net_Asset_Value='')]
+        with mock.patch('funds.ingest.refresh_snapshot'):
+            created, updated, failed = ingest.save_feed(items)
+
+        self.assertEqual((created, updated), (['Scheme 101', 'Scheme 102'], []))
+        self.assertEqual(failed, [{'scheme_name': 'Scheme 103', 'errors': {'nav': ['A valid number is required.']}}])
+        fund = MutualFund.objects.select_related('fund_family').get(scheme_code=102)
+        self.assertEqual((fund.fund_family.name, fund.nav_date), ('HDFC Mutual Fund', date(2025, 4, 2)))
+        self.assertEqual(FundFamily.objects.count(), 2)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,74 @@
+import io
+from datetime import date
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from funds.holdings import add_holding, holders_of, iter_holders
+from funds.models import FundFamily, MutualFund, Portfolio, SchemeHolding
+import logging
+
+User = get_user_model()
+
+
+class SchemeHoldingTestCase(APITestCase):
+    def setUp(self):
+        # Throttle history lives in the cache; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.other = User.objects.create_user(email='other@example.com', username='other', password='Test1234')
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        self.funds = [
+            MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme {code}', nav=10.0, nav_date=date(2025, 4, 1),
+                scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+            )
+            for code in (101, 102, 103)
+        ]
+
+    def buy(self, user, scheme_code, units, invested_amount):
+        self.client.force_authenticate(user=user)
+        response = self.client.post(reverse('funds:purchase_fund'), {
+            'scheme_code': scheme_code, 'units': units, 'invested_amount': invested_amount,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_purchases_aggregate_per_user_and_scheme(self):
+        """Repeat purchases add to one index row."""
+        self.buy(self.user, 101, 2, 20)
+        self.buy(self.user, 101, 3, 30)
+        self.buy(self.other, 101, 1, 10)
+
+        holding = SchemeHolding.objects.get(user=self.user, mutual_fund=self.funds[0])
+        self.assertEqual((holding.units, holding.invested_amount), (5, 50))
+        self.assertEqual(SchemeHolding.objects.count(), 2)
+
+    def test_holders_of_changed_schemes(self):
+        """Only holders of the given schemes are returned."""
+        add_holding(self.user.id, self.funds[0].id, 1, 10)
+        add_holding(self.other.id, self.funds[1].id, 1, 10)
+
+        self.assertEqual(holders_of([self.funds[0].id]), {self.user.id})
+        self.assertEqual(holders_of([self.funds[0].id, self.funds[1].id]), {self.user.id, self.other.id})
+        self.assertEqual(holders_of([self.funds[2].id]), set())
+        self.assertEqual(list(iter_holders([self.funds[1].id])), [(self.funds[1].id, self.other.id, 1, 10)])
+
+    def test_rebuild_command_matches_portfolio(self):
+        """rebuild_scheme_holdings recreates the index from Portfolio."""
+        Portfolio.objects.create(user=self.user, mutual_fund=self.funds[0], units=2, invested_amount=20)
+        Portfolio.objects.create(user=self.user, mutual_fund=self.funds[0], units=1, invested_amount=15)
+        Portfolio.objects.create(user=self.other, mutual_fund=self.funds[2], units=4, invested_amount=40)
+        add_holding(self.other.id, self.funds[1].id, 9, 90)  # stale entry
+
+        call_command('rebuild_scheme_holdings', stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(SchemeHolding.objects.values_list('user_id', 'mutual_fund_id', 'units', 'invested_amount')),
+            sorted([(self.user.id, self.funds[0].id, 3, 35), (self.other.id, self.funds[2].id, 4, 40)]),
+        )
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,159 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.conf import settings
+from django.test import override_settings
+from django.utils import timezone
+from funds.ingest import INGEST_LEASE, request_ingest, run_ingest
+from funds.locks import LeaseLock, LeaseLost, LeaseUnavailable
+from funds.models import IngestRun, MutualFund, TaskLease
+from funds import ingest, tasks
+import logging
+
+User = get_user_model()
+SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), 'test_ingest.snapshot')
+
+FEED = [
+    {'Scheme_Code': 101, 'Scheme_Name': 'Axis Bluechip', 'Net_Asset_Value': '55.5', 'Date': '02-Apr-2025',
+     'Scheme_Type': 'Open Ended Schemes', 'Scheme_Category': 'Equity', 'Mutual_Fund_Family': 'Axis Mutual Fund',
+     'ISIN_Div_Payout_ISIN_Growth': 'INF846K01DP8', 'ISIN_Div_Reinvestment': None},
+]
+SECOND_SCHEME = dict(FEED[0], Scheme_Code=102, Scheme_Name='Axis Midcap', ISIN_Div_Payout_ISIN_Growth='INF846K01DQ6')
+
+
+@override_settings(SCHEME_SNAPSHOT_PATH=SNAPSHOT_PATH, LOCK_REDIS_URL=None)
+class IngestSingleFlightTestCase(APITestCase):
+    def setUp(self):
+        # Throttle history lives in the cache; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+
+    def test_database_lease_is_exclusive_until_expiry(self):
+        """Only one holder at a time; an expired lease can be taken over."""
+        first, second = LeaseLock('job', 60000), LeaseLock('job', 60000)
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        with self.assertRaises(LeaseUnavailable):
+            with LeaseLock('job', 60000):
+                pass
+
+        TaskLease.objects.filter(name='job').update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertTrue(second.acquire())
+        self.assertFalse(first.renew())  # the old holder notices it lost the lease
+        first.release()
+        self.assertEqual(TaskLease.objects.get(name='job').holder, second.token)
+        second.release()
+        self.assertEqual(TaskLease.objects.get(name='job').holder, '')
+
+    def test_concurrent_triggers_attach_to_one_run(self):
+        """A second trigger joins the active run instead of starting another."""
+        with self.captureOnCommitCallbacks() as callbacks:
+            first, started = request_ingest('schedule', enqueue=True)
+            second, attached_started = request_ingest('api', user=self.user)
+
+        self.assertTrue(started)
+        self.assertFalse(attached_started)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(len(callbacks), 1)  # only one task is queued
+        self.assertEqual(IngestRun.objects.get().attached_requests, 1)
+
+    def test_endpoint_returns_run_id(self):
+        """The endpoint answers 202 with a run to poll instead of ingesting inline."""
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks():
+            response = self.client.get(reverse('funds:fetch_external_funds'))
+            again = self.client.get(reverse('funds:fetch_external_funds'))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['run_id'], again.data['run_id'])
+        self.assertTrue(again.data['attached'])
+
+        poll = self.client.get(reverse('funds:ingest_run', args=[response.data['run_id']]))
+        self.assertEqual(poll.data['data']['status'], IngestRun.QUEUED)
+
+    @mock.patch.object(ingest, 'fetch_feed', return_value=FEED)
+    def test_run_ingest_records_results(self, fetch):
+        """A run saves the feed, records its counts and frees the lease."""
+        run, _ = request_ingest('api', enqueue=False)
+        run = run_ingest(run.id)
+
+        self.assertEqual((run.status, run.is_active, run.created_funds), (IngestRun.SUCCEEDED, False, 1))
+        self.assertTrue(MutualFund.objects.filter(scheme_code=101).exists())
+        self.assertEqual(TaskLease.objects.get(name=INGEST_LEASE).holder, '')
+        # The next trigger starts a fresh run
+        self.assertTrue(request_ingest('api', enqueue=False)[1])
+
+    @mock.patch.object(ingest, 'fetch_feed', return_value=FEED)
+    def test_run_waits_while_lease_is_held(self, fetch):
+        """An ingest started elsewhere blocks the run until it finishes."""
+        run, _ = request_ingest('api', enqueue=False)
+        with LeaseLock(INGEST_LEASE, 60000):
+            with self.assertRaises(LeaseUnavailable):
+                run_ingest(run.id)
+        fetch.assert_not_called()
+        self.assertEqual(IngestRun.objects.get(pk=run.id).status, IngestRun.QUEUED)
+
+    @override_settings(INGEST_LEASE_TTL_MS=60000, INGEST_RETRY_DELAY=30)
+    def test_run_fails_when_the_lease_outlives_its_retries(self):
+        """Retries cover a crashed holder's lease; past them the run fails instead of blocking triggers."""
+        self.assertEqual(tasks.lease_retries(), 3)
+        run, _ = request_ingest('api', enqueue=False)
+        with LeaseLock(INGEST_LEASE, 60000):
+            result = tasks.fetch_and_save_funds.apply(kwargs={'run_id': run.id}, retries=3)
+        self.assertIsInstance(result.result, LeaseUnavailable)
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.is_active), (IngestRun.FAILED, False))
+        self.assertTrue(request_ingest('api', enqueue=False)[1])
+
+    def test_run_that_loses_its_lease_saves_nothing(self):
+        """A lease taken over while fetching fails the run instead of loading the feed."""
+        def fetch_until_expired():
+            TaskLease.objects.filter(name=INGEST_LEASE).update(expires_at=timezone.now() - timedelta(seconds=1))
+            LeaseLock(INGEST_LEASE, 60000).acquire()
+            return FEED
+
+        run, _ = request_ingest('api', enqueue=False)
+        with mock.patch.object(ingest, 'fetch_feed', side_effect=fetch_until_expired):
+            run = run_ingest(run.id)
+        self.assertEqual((run.status, run.is_active), (IngestRun.FAILED, False))
+        self.assertIn('lease', run.error)
+        self.assertFalse(MutualFund.objects.exists())
+
+    def test_load_renews_the_lease_before_every_batch(self):
+        """Each batch renews the lease, and losing it mid-load rolls the earlier batches back."""
+        heartbeat = mock.Mock(side_effect=[None, LeaseLost(INGEST_LEASE)])
+        with mock.patch.object(ingest, 'LOAD_BATCH_SIZE', 1), self.assertRaises(LeaseLost):
+            ingest.save_feed(FEED + [SECOND_SCHEME], heartbeat=heartbeat)
+        self.assertEqual(heartbeat.call_count, 2)
+        self.assertFalse(MutualFund.objects.exists())
+
+    def test_fetch_times_out_before_the_lease_expires(self):
+        """The provider request carries a timeout shorter than the lease."""
+        import requests
+
+        response = mock.Mock(status_code=200, json=mock.Mock(return_value=FEED))
+        with mock.patch.object(requests, 'get', return_value=response) as get:
+            self.assertEqual(ingest.fetch_feed(), FEED)
+        self.assertLess(get.call_args.kwargs['timeout'] * 1000, settings.INGEST_LEASE_TTL_MS)
+
+    def test_stale_run_is_abandoned(self):
+        """A run that never finished stops blocking new triggers."""
+        stale, _ = request_ingest('schedule', enqueue=False)
+        IngestRun.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+        run, started = request_ingest('api', enqueue=False)
+        self.assertTrue(started)
+        self.assertNotEqual(run.id, stale.id)
+        self.assertEqual(IngestRun.objects.get(pk=stale.pk).status, IngestRun.FAILED)
+
+    def tearDown(self):
+        if os.path.exists(SNAPSHOT_PATH):
+            os.remove(SNAPSHOT_PATH)
+        logging.disable(logging.NOTSET)
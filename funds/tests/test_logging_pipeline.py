@@ -0,0 +1,103 @@
+import gc
+import json
+import logging
+import os
+import tempfile
+import unittest
+import weakref
+from django.test import SimpleTestCase
+from core.logging_pipeline import JSONFormatter, QueueFileHandler, SamplingFilter
+
+
+class LoggingPipelineTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'app.log')
+        self.logger = logging.getLogger('funds.tests.pipeline')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def make_record(self, level=logging.DEBUG, msg='SQL %s', args=('select 1',)):
+        return self.logger.makeRecord(self.logger.name, level, __file__, 1, msg, args, None)
+
+    def test_json_formatter_is_compact(self):
+        """Records are rendered as one compact JSON object."""
+        line = JSONFormatter().format(self.make_record(logging.INFO, 'NAV %s', (10.5,)))
+
+        self.assertNotIn(', "', line)
+        payload = json.loads(line)
+        self.assertEqual(payload['msg'], 'NAV 10.5')
+        self.assertEqual(payload['level'], 'INFO')
+
+    def test_sampling_filter_keeps_one_in_n(self):
+        """DEBUG records are sampled per template while warnings always pass."""
+        sampler = SamplingFilter(rate=10, level='INFO')
+        kept = sum(sampler.filter(self.make_record()) for _ in range(100))
+
+        self.assertEqual(kept, 10)
+        self.assertTrue(sampler.filter(self.make_record(logging.WARNING)))
+
+    def test_records_are_written_by_listener(self):
+        """Queued records, including tracebacks, end up in the file as JSON lines."""
+        handler = QueueFileHandler(self.path, max_bytes=1024 * 1024, backup_count=1)
+        handler.setFormatter(JSONFormatter())
+        self.logger.addHandler(handler)
+        try:
+            self.logger.info('purchase %s', 'ok')
+            try:
+                raise ValueError('bad nav')
+            except ValueError:
+                self.logger.exception('ingest failed')
+            handler.flush()
+        finally:
+            self.logger.removeHandler(handler)
+            handler.close()
+
+        with open(self.path, encoding='utf-8') as log_file:
+            lines = [json.loads(line) for line in log_file]
+        self.assertEqual([line['msg'] for line in lines], ['purchase ok', 'ingest failed'])
+        self.assertIn('ValueError: bad nav', lines[1]['exc'])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """When the listener falls behind, records are dropped and counted."""
+        handler = QueueFileHandler(self.path, queue_size=2)
+        handler.listener.stop()  # simulate a stalled writer
+        try:
+            for _ in range(5):
+                handler.handle(self.make_record(logging.INFO))
+            self.assertEqual(handler.dropped, 3)
+        finally:
+            handler.close()
+
+    def test_closed_handlers_are_released(self):
+        """Nothing keeps a closed handler alive once its owner drops it."""
+        handler = QueueFileHandler(self.path)
+        handler.close()
+        released = weakref.ref(handler)
+        del handler
+        gc.collect()
+        self.assertIsNone(released())
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+    def test_forked_child_writes_through_open_handler(self):
+        """A forked child gets its own listener, so what it logs reaches the file."""
+        QueueFileHandler(os.path.join(self.tmpdir.name, 'closed.log')).close()
+        handler = QueueFileHandler(self.path)
+        handler.setFormatter(JSONFormatter())
+        try:
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    handler.handle(self.make_record(logging.INFO, 'from child %s', ('ok',)))
+                    handler.flush()
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+        finally:
+            handler.close()
+
+        with open(self.path, encoding='utf-8') as log_file:
+            self.assertEqual([json.loads(line)['msg'] for line in log_file], ['from child ok'])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
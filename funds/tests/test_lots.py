@@ -0,0 +1,155 @@
+import json
+from datetime import date, datetime, timedelta
+from asgiref.sync import sync_to_async
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from funds.holdings import add_holding
+from funds.lots import InsufficientUnits, LotBook
+from funds.models import FundFamily, MutualFund, Portfolio, PortfolioValuation, RealizedLot, SchemeHolding
+from funds.valuation import get_valuation
+import logging
+
+User = get_user_model()
+
+
+class LotBookTestCase(APITestCase):
+    def test_consumes_oldest_lots_first(self):
+        """Lots are matched by purchase time whatever order they were added in; a partial lot stays open."""
+        book = LotBook([(3, datetime(2025, 3, 1), 5.0, 50.0), (1, datetime(2025, 1, 1), 2.0, 30.0)])
+        book.add(2, datetime(2025, 2, 1), 4.0, 20.0)
+
+        matches = book.consume(7)
+        self.assertEqual([(match.lot_id, match.units, match.cost, match.closed) for match in matches],
+                         [(1, 2.0, 30.0, True), (2, 4.0, 20.0, True), (3, 1.0, 10.0, False)])
+        self.assertEqual((len(book), book.units()), (1, 4.0))
+
+        with self.assertRaises(InsufficientUnits):
+            book.consume(5)
+
+
+class RedemptionTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.client.force_authenticate(user=self.user)
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        self.fund = MutualFund.objects.create(
+            scheme_code=101, scheme_name='Axis Bluechip', nav=20.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+        )
+        self.url = reverse('funds:redeem_fund')
+
+    def buy(self, units, invested_amount, days_ago):
+        lot = Portfolio.objects.create(user=self.user, mutual_fund=self.fund, units=units,
+                                       invested_amount=invested_amount)
+        Portfolio.objects.filter(pk=lot.pk).update(purchase_date=timezone.now() - timedelta(days=days_ago))
+        add_holding(self.user.id, self.fund.id, units, invested_amount)
+        return lot
+
+    def redeem(self, units):
+        return self.client.post(self.url, {'scheme_code': 101, 'units': units}, format='json')
+
+    def test_redemption_matches_lots_fifo(self):
+        """Units come out of the oldest purchases; gains, lots, holding and valuation follow."""
+        newest = self.buy(10, 150, days_ago=10)
+        oldest = self.buy(10, 100, days_ago=400)
+        get_valuation(self.user)
+
+        response = self.redeem(15)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.data['data']
+        self.assertEqual((data['units'], data['amount'], data['cost'], data['realized_gain']), (15, 300, 175, 125))
+        self.assertEqual([(lot['units'], lot['gain'], lot['holding_days']) for lot in data['lots']],
+                         [(10, 100, 400), (5, 25, 10)])
+
+        oldest.refresh_from_db()
+        newest.refresh_from_db()
+        self.assertFalse(oldest.is_open)
+        self.assertEqual((newest.is_open, newest.redeemed_units, newest.redeemed_cost), (True, 5, 75))
+        holding = SchemeHolding.objects.get(user=self.user)
+        self.assertEqual((holding.units, holding.invested_amount), (5, 75))
+        valuation = PortfolioValuation.objects.get(user=self.user)
+        self.assertEqual((valuation.total_invested, valuation.current_value), (75, 100))
+
+    async def test_portfolio_endpoints_show_what_is_left(self):
+        """After a sale the portfolio lists only the open lots, at their remaining units and cost."""
+        await sync_to_async(self.buy)(10, 150, days_ago=10)
+        await sync_to_async(self.buy)(10, 100, days_ago=400)
+        response = await sync_to_async(self.redeem)(15)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        expected = [{'scheme_name': 'Axis Bluechip', 'units': 5.0, 'invested_amount': 75.0,
+                     'current_value': 100.0, 'nav': 20.0}]
+        response = await sync_to_async(self.client.get)(reverse('funds:user_portfolio'))
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['data'], expected)
+
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        response = await self.async_client.get(reverse('funds:async_user_portfolio'), headers=headers)
+        self.assertEqual(response.json()['data'], expected)
+
+        summary = await sync_to_async(self.client.get)(reverse('funds:portfolio_summary'))
+        self.assertEqual((summary.data['data']['total_invested'], summary.data['data']['current_value']), (75, 100))
+
+    def test_redeeming_more_than_held_changes_nothing(self):
+        """Asking for more units than the open lots hold is a 400 and leaves the lots alone."""
+        lot = self.buy(10, 100, days_ago=30)
+        response = self.redeem(10.5)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'Insufficient units to redeem.')
+        lot.refresh_from_db()
+        self.assertEqual((lot.redeemed_units, lot.is_open), (0, True))
+        self.assertFalse(RealizedLot.objects.exists())
+
+        self.assertEqual(self.redeem(-1).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'scheme_code': 999, 'units': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_selling_everything_closes_the_position(self):
+        """Partial sales add up to whole lots, and the emptied position leaves the holders index."""
+        self.buy(3, 30, days_ago=5)
+        for units in (1, 1, 1):
+            self.assertEqual(self.redeem(units).status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Portfolio.objects.filter(is_open=True).exists())
+        self.assertFalse(SchemeHolding.objects.exists())
+        self.assertEqual(PortfolioValuation.objects.get(user=self.user).holdings, [])
+
+    def test_queries_do_not_grow_with_lots(self):
+        """A sale costs the same queries whether it consumes a few lots or many."""
+        for index in range(60):
+            self.buy(1, 10, days_ago=100 + index)
+        counts = []
+        for units in (3, 50):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.redeem(units).status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_realized_gains_report(self):
+        """Gains are summed per scheme and term over the requested redemption dates."""
+        self.buy(10, 100, days_ago=400)
+        self.buy(10, 150, days_ago=10)
+        self.redeem(15)
+
+        response = self.client.get(reverse('funds:realized_gains'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual((data['long_term_gain'], data['short_term_gain'], data['total_gain']), (100, 25, 125))
+        self.assertEqual([(row['term'], row['lots'], row['units']) for row in data['schemes']],
+                         [('long', 1, 10), ('short', 1, 5)])
+
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('funds:realized_gains'), {'from': tomorrow})
+        self.assertEqual(response.data['data']['schemes'], [])
+        response = self.client.get(reverse('funds:realized_gains'), {'to': 'last year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
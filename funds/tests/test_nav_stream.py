@@ -0,0 +1,123 @@
+import asyncio
+import json
+from datetime import date
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from funds import ingest, nav_stream
+from funds.holdings import add_holding
+from funds.models import FundFamily, MutualFund
+from funds.nav_stream import NavHub, hub, nav_update, publish
+import logging
+
+User = get_user_model()
+
+
+def parse_event(chunk):
+    """The updates carried by one `event: nav` chunk."""
+    event, data = chunk.decode().strip().split('\n')
+    assert event == 'event: nav'
+    return json.loads(data[len('data: '):])
+
+
+@override_settings(NAV_STREAM_REDIS_URL=None)
+class NavStreamTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        self.funds = [
+            MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme {code}', nav=10.0 + index, nav_date=date(2025, 4, 1),
+                scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+            )
+            for index, code in enumerate((101, 102, 103))
+        ]
+        add_holding(self.user.id, self.funds[0].id, units=2, invested_amount=20)
+        self.url = reverse('funds:nav_stream')
+
+    async def test_stream_sends_current_navs_then_changes(self):
+        """Held and watched schemes are sent on connect, later changes as they are published."""
+        response = await self.async_client.get(self.url, {'schemes': '102'}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = response.streaming_content
+
+        current = parse_event(await anext(events))
+        self.assertEqual(sorted((update['scheme_code'], update['nav']) for update in current),
+                         [(101, 10.0), (102, 11.0)])
+
+        # Published from another thread, like the Redis listener or an eager ingest
+        await sync_to_async(publish)([
+            nav_update(103, 30.0, date(2025, 4, 2)), nav_update(101, 10.5, date(2025, 4, 2)),
+        ])
+        self.assertEqual(parse_event(await anext(events)),
+                         [{'scheme_code': 101, 'nav': 10.5, 'nav_date': '2025-04-02'}])
+
+        # What the ASGI handler does once the client is gone
+        await sync_to_async(response.close)()
+        self.assertEqual(hub.count(), 0)
+        await events.aclose()
+
+    async def test_event_streams_are_not_compressed(self):
+        """Compression would buffer events, so the stream goes out as it is."""
+        response = await self.async_client.get(self.url, headers={**self.headers, 'Accept-Encoding': 'gzip'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+        await sync_to_async(response.close)()
+
+    async def test_rejects_anonymous_and_bad_scheme_lists(self):
+        """The stream needs a token and a list of numeric scheme codes."""
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.async_client.get(self.url, {'schemes': '101,abc'}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_slow_readers_get_the_latest_nav_only(self):
+        """Updates a client has not read yet are coalesced per scheme; other schemes never wake it."""
+        local_hub = NavHub()
+        subscription = local_hub.subscribe([101, 102])
+        local_hub.deliver([nav_update(103, 1.0, date(2025, 4, 2))])
+        self.assertFalse(subscription.event.is_set())
+
+        for nav in (10.1, 10.2, 10.3):
+            local_hub.deliver([nav_update(101, nav, date(2025, 4, 2))])
+        self.assertEqual([update['nav'] for update in subscription.take()], [10.3])
+        self.assertEqual(subscription.coalesced, 2)
+
+        local_hub.unsubscribe(subscription)
+        self.assertEqual((local_hub.by_scheme, local_hub.pumps), ({}, {}))
+
+    async def test_idle_streams_send_keep_alives(self):
+        """Without changes, the per-loop ticker makes every stream write a comment."""
+        with override_settings(NAV_STREAM_HEARTBEAT=0.01):
+            events = aiter(nav_stream.NavEventStream([999]))
+            self.assertEqual(parse_event(await anext(events)), [])
+            self.assertEqual(await asyncio.wait_for(anext(events), 1), nav_stream.KEEP_ALIVE)
+            await events.aclose()
+
+    def test_ingest_publishes_changed_navs_after_commit(self):
+        """Only schemes whose NAV changed are pushed, once the ingest has committed."""
+        feed = [
+            {
+                'Scheme_Code': code, 'Scheme_Name': f'Scheme {code}', 'Net_Asset_Value': nav, 'Date': '01-Apr-2025',
+                'Scheme_Type': 'Open Ended Schemes', 'Scheme_Category': 'Equity',
+                'Mutual_Fund_Family': 'Axis Mutual Fund',
+            }
+            for code, nav in ((101, '10.0'), (102, '11.5'))
+        ]
+        with mock.patch.object(ingest, 'publish') as push, mock.patch.object(ingest, 'refresh_snapshot'), \
+                mock.patch.object(ingest, 'schedule_revaluation'):
+            with self.captureOnCommitCallbacks(execute=True):
+                ingest.save_feed(feed)
+                push.assert_not_called()
+        push.assert_called_once_with([{'scheme_code': 102, 'nav': 11.5, 'nav_date': '2025-04-01'}])
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
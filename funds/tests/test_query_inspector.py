@@ -0,0 +1,69 @@
+import json
+from datetime import date
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from core.query_inspector import QueryInspector, assert_no_n_plus_one, normalize_sql
+from funds.models import FundFamily, MutualFund, Portfolio
+import logging
+
+User = get_user_model()
+
+
+class QueryInspectorTestCase(APITestCase):
+    def setUp(self):
+        # Throttle history lives in the cache; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        for code in range(1, 9):
+            fund = MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme {code}', nav=10.0 + code,
+                nav_date=date(2025, 4, 1), scheme_type='Open Ended Schemes',
+                scheme_category='Equity', fund_family=family,
+            )
+            Portfolio.objects.create(user=self.user, mutual_fund=fund, units=2, invested_amount=20)
+
+    def test_normalize_sql_collapses_literals(self):
+        """Queries differing only in parameters share one shape."""
+        first = normalize_sql("SELECT * FROM t WHERE id = 1 AND name = 'a'")
+        second = normalize_sql("SELECT *  FROM t WHERE id = 42 AND name = 'b''c'")
+        self.assertEqual(first, second)
+        self.assertEqual(
+            normalize_sql('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            normalize_sql('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+    def test_lazy_relation_access_is_flagged(self):
+        """Touching a foreign key per row is reported with its call site."""
+        with QueryInspector('lazy loop', threshold=3) as inspector:
+            names = [holding.mutual_fund.scheme_name for holding in Portfolio.objects.all()]
+
+        self.assertEqual(len(names), 8)
+        offenders = inspector.report()
+        self.assertEqual(len(offenders), 1)
+        self.assertEqual(offenders[0].count, 8)
+        self.assertIn('test_query_inspector.py', offenders[0].call_site)
+
+    def test_assert_helper_fails_on_n_plus_one(self):
+        """The test helper raises when a query shape repeats."""
+        with self.assertRaises(AssertionError):
+            with assert_no_n_plus_one(threshold=3):
+                for holding in Portfolio.objects.all():
+                    holding.mutual_fund.nav
+
+    def test_portfolio_view_has_no_n_plus_one(self):
+        """The portfolio endpoint loads all holdings with a constant number of queries."""
+        self.client.force_authenticate(user=self.user)
+        with assert_no_n_plus_one(threshold=1):
+            response = self.client.get(reverse('funds:user_portfolio'))
+            content = b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(content)['data']), 8)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,49 @@
+import re
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from accounts.models import BlacklistedToken
+from funds.models import FundFamily, MutualFund, Portfolio
+
+User = get_user_model()
+
+
+class HotQueryPlanTestCase(TestCase):
+    """Every hot lookup in the views must be served by an index, not a table scan."""
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        for line in plan.splitlines():
+            if re.search(r'\bSCAN\b', line) and 'INDEX' not in line:
+                self.fail(f"Full table scan in plan:\n{plan}\n\nfor query: {queryset.query}")
+            if 'TEMP B-TREE' in line:
+                self.fail(f"Sort not served by an index:\n{plan}\n\nfor query: {queryset.query}")
+
+    def test_portfolio_by_user_newest_first(self):
+        """PortfolioView: holdings of one user ordered by purchase time."""
+        self.assertUsesIndex(
+            Portfolio.objects.filter(user_id=1).select_related('mutual_fund').order_by('-purchase_date')
+        )
+
+    def test_scheme_by_code(self):
+        """BuyFundView: scheme lookup by scheme_code."""
+        self.assertUsesIndex(MutualFund.objects.filter(scheme_code=119551))
+
+    def test_schemes_by_family_and_category(self):
+        """Catalogue filters by fund family and category."""
+        self.assertUsesIndex(MutualFund.objects.filter(fund_family_id=1))
+        self.assertUsesIndex(MutualFund.objects.filter(fund_family_id=1, scheme_category='Equity'))
+
+    def test_schemes_by_isin(self):
+        """ISIN lookups for both plan options."""
+        self.assertUsesIndex(MutualFund.objects.filter(isin_growth='INF846K01EW2'))
+        self.assertUsesIndex(MutualFund.objects.filter(isin_reinvestment='INF846K01EX0'))
+
+    def test_fund_family_by_name(self):
+        """Ingest: get_or_create of a fund family by name."""
+        self.assertUsesIndex(FundFamily.objects.filter(name='Axis Mutual Fund'))
+
+    def test_authentication_lookups(self):
+        """Every authenticated request: user by id/email and the token blacklist."""
+        self.assertUsesIndex(User.objects.filter(email='investor@example.com'))
+        self.assertUsesIndex(User.objects.filter(pk=1))
+        self.assertUsesIndex(BlacklistedToken.objects.filter(token='header.payload.signature'))
@@ -0,0 +1,65 @@
+from datetime import date
+from unittest import mock
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+from core import renderers
+from core.renderers import FastJSONRenderer
+from funds.models import FundFamily, MutualFund, Portfolio
+from funds.serializers import (
+    FundFamilySerializer, MutualFundSerializer, PortfolioSerializer,
+    FundFamilyReadSerializer, MutualFundReadSerializer, PortfolioReadSerializer,
+)
+
+User = get_user_model()
+
+
+class ReadSerializerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        families = [FundFamily.objects.create(name=name) for name in ('Axis Mutual Fund', 'Kotak — Mutual Fund ')]
+        navs = [45.5, 0.00001234, 1e16, 12.3456789, 100.0]
+        for code, nav in enumerate(navs, start=1):
+            fund = MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme {code} – Growth',
+                isin_growth=f'INF{code:09d}' if code % 2 else None, nav=nav,
+                nav_date=date(2025, 4, code), scheme_type='Open Ended Schemes',
+                scheme_category='Equity', fund_family=families[code % 2],
+            )
+            Portfolio.objects.create(user=self.user, mutual_fund=fund, units=1.0 / 3 * code, invested_amount=1000 * code)
+
+    def assertSameBytes(self, drf_data, fast_data):
+        self.assertEqual(drf_data, fast_data)
+        expected = JSONRenderer().render({'data': drf_data, 'success': True})
+        self.assertEqual(FastJSONRenderer().render({'data': fast_data, 'success': True}), expected)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render({'data': fast_data, 'success': True}), expected)
+
+    def test_fund_families(self):
+        """FundFamilyReadSerializer renders exactly like FundFamilySerializer."""
+        families = FundFamily.objects.order_by('id')
+        self.assertSameBytes(
+            FundFamilySerializer(families, many=True).data,
+            FundFamilyReadSerializer(families).data,
+        )
+
+    def test_mutual_funds(self):
+        """MutualFundReadSerializer renders exactly like MutualFundSerializer."""
+        funds = MutualFund.objects.order_by('id')
+        self.assertSameBytes(
+            MutualFundSerializer(funds, many=True).data,
+            MutualFundReadSerializer(funds).data,
+        )
+
+    def test_portfolio(self):
+        """PortfolioReadSerializer renders exactly like PortfolioSerializer, in one query."""
+        holdings = Portfolio.objects.filter(user=self.user).order_by('-purchase_date')
+        drf_data = PortfolioSerializer(holdings.select_related('mutual_fund'), many=True).data
+        with self.assertNumQueries(1):
+            fast_data = PortfolioReadSerializer(holdings).data
+        self.assertSameBytes(drf_data, fast_data)
+
+    def test_accepts_paginated_tuples(self):
+        """Pre-fetched values_list rows can be serialized directly."""
+        rows = list(FundFamilyReadSerializer.queryset(FundFamily.objects.order_by('id'))[:1])
+        self.assertEqual(FundFamilyReadSerializer(rows).data, [{'id': rows[0][0], 'name': 'Axis Mutual Fund'}])
@@ -0,0 +1,87 @@
+import json
+from collections import defaultdict
+from datetime import date
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from funds.models import AumReport, FundFamily, MutualFund, Portfolio
+from funds.reports import build_report, shard_bounds
+from funds.tasks import aum_report_shard, save_aum_report
+import logging
+
+User = get_user_model()
+
+
+class AumReportTestCase(TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        axis = FundFamily.objects.create(name='Axis Mutual Fund')
+        hdfc = FundFamily.objects.create(name='HDFC Mutual Fund')
+        self.funds = [
+            MutualFund.objects.create(
+                scheme_code=100 + index, scheme_name=f'Scheme {index}', nav=nav, nav_date=date(2025, 4, 1),
+                scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+            )
+            for index, (nav, family) in enumerate(((10.0, axis), (250.0, hdfc), (40.0, axis)))
+        ]
+        self.users = [
+            User.objects.create_user(email=f'user{index}@example.com', username=f'user{index}', password='Test1234')
+            for index in range(5)
+        ]
+        holdings = [
+            (0, 0, 10, 90), (0, 0, 5, 60), (0, 2, 1, 35),   # one user holding a scheme twice
+            (1, 1, 500, 100000),                               # 1.25L portfolio
+            (2, 0, 1, 10), (2, 1, 1, 200), (2, 2, 1, 40),
+            (4, 1, 50000, 9000000),                            # 1.25Cr portfolio
+        ]
+        for user, fund, units, invested in holdings:
+            Portfolio.objects.create(user=self.users[user], mutual_fund=self.funds[fund],
+                                     units=units, invested_amount=invested)
+        self.holdings = holdings
+
+    def expected(self):
+        schemes = defaultdict(lambda: [set(), 0.0, 0.0])
+        for user, fund, units, invested in self.holdings:
+            entry = schemes[self.funds[fund].scheme_code]
+            entry[0].add(user)
+            entry[1] += invested
+            entry[2] += units * self.funds[fund].nav
+        return {str(code): (len(users), invested, aum) for code, (users, invested, aum) in schemes.items()}
+
+    def report(self, dimension):
+        return {
+            row.key: (row.holders, row.invested_amount, row.aum)
+            for row in AumReport.objects.filter(report_date=date(2025, 4, 2), dimension=dimension)
+        }
+
+    def test_sharded_chunked_report_matches_plain_aggregation(self):
+        """Chunk boundaries inside a user's rows and several shards give exact totals."""
+        build_report(date(2025, 4, 2), shards=3, chunk_size=2)
+
+        self.assertEqual(self.report('scheme'), self.expected())
+        self.assertEqual(self.report('family'), {
+            'Axis Mutual Fund': (2, 235.0, 240.0),
+            'HDFC Mutual Fund': (3, 9100200.0, 12625250.0),
+        })
+        self.assertEqual(self.report('segment'), {
+            'below-1L': (2, 435.0, 490.0),
+            '1L-10L': (1, 100000.0, 125000.0),
+            '10L-1Cr': (0, 0.0, 0.0),
+            '1Cr-and-above': (1, 9000000.0, 12500000.0),
+        })
+
+    def test_rebuilding_replaces_the_day(self):
+        """Running the report twice for a date keeps one set of rows."""
+        build_report(date(2025, 4, 2))
+        first = AumReport.objects.count()
+        build_report(date(2025, 4, 2))
+        self.assertEqual(AumReport.objects.count(), first)
+
+    def test_shard_tasks_exchange_json(self):
+        """Shard results survive the broker's JSON serialization."""
+        partials = [json.loads(json.dumps(aum_report_shard(start, stop))) for start, stop in shard_bounds(2)]
+        self.assertEqual(len(partials), 2)
+        save_aum_report(partials, '2025-04-02')
+        self.assertEqual(self.report('scheme'), self.expected())
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,171 @@
+from datetime import date
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from funds import tasks
+from funds.holdings import add_holding, add_holdings
+from funds.models import FundFamily, MutualFund, Portfolio, PortfolioValuation, SchemeHolding, SipMandate
+from funds.sip import execute_shard, next_run_date, price_snapshot, run_due_mandates, shard_bounds
+import logging
+
+User = get_user_model()
+
+RUN_DATE = date(2025, 4, 5)
+
+
+class SipSchedulerTestCase(TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        self.fund, self.other, self.unpriced = [
+            MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme {code}', nav=nav, nav_date=date(2025, 4, 4),
+                scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+            )
+            for code, nav in ((101, 20.0), (102, 50.0), (103, 0.0))
+        ]
+        self.users = [
+            User.objects.create_user(email=f'user{index}@example.com', username=f'user{index}', password='Test1234')
+            for index in range(4)
+        ]
+
+    def mandate(self, user, fund, amount, day_of_month=5, next_run=RUN_DATE, **fields):
+        return SipMandate.objects.create(user=user, mutual_fund=fund, amount=amount, day_of_month=day_of_month,
+                                         next_run_date=next_run, **fields)
+
+    def test_next_run_date(self):
+        """The next instalment is the mandate's day in this month if still ahead, else next month's."""
+        self.assertEqual(next_run_date(5, date(2025, 4, 1)), date(2025, 4, 5))
+        self.assertEqual(next_run_date(5, date(2025, 4, 5)), date(2025, 5, 5))
+        self.assertEqual(next_run_date(28, date(2025, 12, 31)), date(2026, 1, 28))
+
+    def test_sharded_run_buys_due_instalments_once(self):
+        """Due mandates become lots, holdings and valuations across shards; a second run buys nothing."""
+        first, second, third, fourth = self.users
+        add_holding(first.id, self.fund.id, 10, 150)
+        due = [
+            self.mandate(first, self.fund, 1000),
+            self.mandate(first, self.other, 500, day_of_month=3, next_run=date(2025, 4, 3)),  # missed two days ago
+            self.mandate(third, self.fund, 250),
+        ]
+        self.mandate(second, self.fund, 1000, next_run=date(2025, 4, 6))     # not due yet
+        self.mandate(second, self.other, 1000, is_active=False)               # cancelled
+        unpriced = self.mandate(fourth, self.unpriced, 1000)                  # no NAV today
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = run_due_mandates(RUN_DATE, shards=3)
+        self.assertEqual(result, {'due_mandates': 4, 'purchases': 3, 'unpriced': 1})
+
+        self.assertEqual(
+            sorted(Portfolio.objects.values_list('user_id', 'mutual_fund__scheme_code', 'units', 'invested_amount')),
+            [(first.id, 101, 50, 1000), (first.id, 102, 10, 500), (third.id, 101, 12.5, 250)],
+        )
+        holding = SchemeHolding.objects.get(user=first, mutual_fund=self.fund)
+        self.assertEqual((holding.units, holding.invested_amount), (60, 1150))
+        self.assertEqual(SchemeHolding.objects.get(user=third).units, 12.5)
+        self.assertEqual(PortfolioValuation.objects.get(user=third).current_value, 250)
+
+        for mandate in due:
+            mandate.refresh_from_db()
+        self.assertEqual([(mandate.next_run_date, mandate.last_run_date, mandate.instalments) for mandate in due], [
+            (date(2025, 5, 5), RUN_DATE, 1), (date(2025, 5, 3), RUN_DATE, 1), (date(2025, 5, 5), RUN_DATE, 1),
+        ])
+        unpriced.refresh_from_db()
+        self.assertEqual((unpriced.next_run_date, unpriced.instalments), (RUN_DATE, 0))
+
+        self.assertEqual(run_due_mandates(RUN_DATE, shards=3)['purchases'], 0)
+        self.assertEqual(Portfolio.objects.count(), 3)
+
+    def test_shard_keeps_purchases_committed_meanwhile(self):
+        """A holding a concurrent purchase creates while the shard runs is added to, not overwritten."""
+        user = self.users[0]
+        bulk_create = SchemeHolding.objects.bulk_create
+
+        def purchase_first(*args, **kwargs):
+            add_holding(user.id, self.fund.id, 5, 100)
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(SchemeHolding.objects, 'bulk_create', side_effect=purchase_first):
+            add_holdings({(user.id, self.fund.id): (10, 200)})
+        holding = SchemeHolding.objects.get(user=user, mutual_fund=self.fund)
+        self.assertEqual((holding.units, holding.invested_amount), (15, 300))
+
+    def test_shards_price_against_one_snapshot(self):
+        """A NAV that changes after the trigger read the prices does not reach the shards."""
+        self.mandate(self.users[0], self.fund, 1000)
+        prices = price_snapshot(RUN_DATE)
+        self.assertEqual(prices, [[self.fund.id, 20.0]])
+
+        MutualFund.objects.filter(pk=self.fund.pk).update(nav=25.0)
+        [(start, stop)] = shard_bounds(RUN_DATE, 4)
+        execute_shard(start, stop, RUN_DATE, prices)
+        self.assertEqual(Portfolio.objects.get().units, 50)
+
+    def test_trigger_fans_out_one_task_per_shard(self):
+        """Every shard task gets the run date and the same prices."""
+        for user in self.users:
+            self.mandate(user, self.fund, 1000)
+        with mock.patch.object(tasks, 'group') as fan_out:
+            tasks.run_sip_mandates.apply(kwargs={'run_date': RUN_DATE.isoformat(), 'shards': 2})
+        signatures = list(fan_out.call_args.args[0])
+        self.assertEqual(len(signatures), 2)
+        for signature in signatures:
+            self.assertEqual(signature.args[2:], (RUN_DATE.isoformat(), [[self.fund.id, 20.0]]))
+
+    def test_failed_shard_is_retried(self):
+        """A database error rolls the shard back and runs it again."""
+        with mock.patch.object(tasks, 'execute_shard', side_effect=[OperationalError('deadlock'), {'purchases': 1}]) \
+                as execute:
+            result = tasks.sip_mandate_shard.apply(args=(1, 10, RUN_DATE.isoformat(), []))
+        self.assertEqual(result.get(), {'purchases': 1})
+        self.assertEqual(execute.call_count, 2)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+
+class SipMandateAPITestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.client.force_authenticate(user=self.user)
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        MutualFund.objects.create(
+            scheme_code=101, scheme_name='Axis Bluechip', nav=20.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+        )
+        self.url = reverse('funds:sip_mandates')
+
+    def test_create_list_and_cancel(self):
+        """A mandate starts on its next day of month, is listed until cancelled, and cancels once."""
+        response = self.client.post(self.url, {'scheme_code': 101, 'amount': 5000, 'day_of_month': 10}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mandate = response.data['data']
+        self.assertEqual(mandate['next_run_date'].day, 10)
+
+        self.assertEqual([item['id'] for item in self.client.get(self.url).data['data']], [mandate['id']])
+
+        cancel_url = reverse('funds:cancel_sip_mandate', args=[mandate['id']])
+        self.assertEqual(self.client.delete(cancel_url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.delete(cancel_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.url).data['data'], [])
+
+    def test_rejects_invalid_mandates(self):
+        """Days past the 28th, non-positive amounts and unknown schemes are refused."""
+        for payload in ({'scheme_code': 101, 'amount': 5000, 'day_of_month': 31},
+                        {'scheme_code': 101, 'amount': -1, 'day_of_month': 5},
+                        {'scheme_code': 101, 'amount': 5000}):
+            self.assertEqual(self.client.post(self.url, payload, format='json').status_code,
+                             status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'scheme_code': 999, 'amount': 5000, 'day_of_month': 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(SipMandate.objects.exists())
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,134 @@
+import os
+import tempfile
+from datetime import date
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from funds import snapshot
+from funds.models import FundFamily, MutualFund, Portfolio
+import logging
+
+User = get_user_model()
+
+
+class SchemeSnapshotTestCase(APITestCase):
+    def setUp(self):
+        # Throttle history lives in the cache; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'scheme_master.snapshot')
+        self.settings_override = override_settings(SCHEME_SNAPSHOT_PATH=self.path, SCHEME_SNAPSHOT_CHECK_INTERVAL=0)
+        self.settings_override.enable()
+        snapshot._snapshot = None
+
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.family = FundFamily.objects.create(name='Axis Mutual Fund')
+        for code in (300, 100, 200):
+            self.create_fund(code, nav=code / 10)
+
+    def create_fund(self, code, nav):
+        return MutualFund.objects.create(
+            scheme_code=code, scheme_name=f'Scheme ₹{code}', nav=nav,
+            nav_date=date(2025, 4, 1), scheme_type='Open Ended Schemes',
+            scheme_category='Equity', fund_family=self.family,
+        )
+
+    def test_lookup_without_snapshot(self):
+        """Lookups return None until the first snapshot is written."""
+        self.assertIsNone(snapshot.get_snapshot())
+        self.assertIsNone(snapshot.lookup_scheme(100))
+
+    def test_round_trip(self):
+        """Every scheme is found by binary search with its columns intact."""
+        self.assertEqual(snapshot.write_snapshot(), 3)
+        record = snapshot.lookup_scheme('200')
+        fund = MutualFund.objects.get(scheme_code=200)
+        self.assertEqual(record, snapshot.SchemeRecord(fund.id, 200, 20.0, date(2025, 4, 1), 'Scheme ₹200'))
+        self.assertEqual(snapshot.get_snapshot().nav(300), 30.0)
+        self.assertIsNone(snapshot.lookup_scheme(150))
+        self.assertIsNone(snapshot.lookup_scheme('abc'))
+
+    def test_processes_hot_swap_to_new_generation(self):
+        """A replaced file is picked up without restarting."""
+        snapshot.write_snapshot()
+        first = snapshot.get_snapshot()
+        self.create_fund(400, nav=40.0)
+        snapshot.write_snapshot()
+
+        second = snapshot.get_snapshot()
+        self.assertIsNot(first, second)
+        self.assertGreater(second.generation, first.generation)
+        self.assertEqual(second.nav(400), 40.0)
+        # Readers holding the old generation keep a working mapping
+        self.assertIsNone(first.nav(400))
+        self.assertEqual(first.nav(100), 10.0)
+
+    def test_purchase_uses_snapshot(self):
+        """BuyFundView resolves the scheme without querying MutualFund."""
+        snapshot.write_snapshot()
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('funds:purchase_fund'),
+                                        {'scheme_code': 100, 'units': 2, 'invested_amount': 20}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse([query for query in queries if 'FROM "funds_mutualfund"' in query['sql']])
+        self.assertEqual(response.data['data']['current_value'], 20.0)
+        self.assertEqual(Portfolio.objects.get().mutual_fund.scheme_code, 100)
+
+    def test_purchase_falls_back_to_database(self):
+        """Schemes added after the snapshot are still purchasable."""
+        snapshot.write_snapshot()
+        self.create_fund(500, nav=50.0)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('funds:purchase_fund'),
+                                    {'scheme_code': 500, 'units': 1, 'invested_amount': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def tearDown(self):
+        snapshot._snapshot = None
+        self.settings_override.disable()
+        self.directory.cleanup()
+        logging.disable(logging.NOTSET)
+
+
+class StaleSnapshotPurchaseTestCase(APITransactionTestCase):
+    """Commits for real, so the foreign key to a deleted scheme is checked."""
+
+    def setUp(self):
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, 'scheme_master.snapshot')
+        self.settings_override = override_settings(SCHEME_SNAPSHOT_PATH=path, SCHEME_SNAPSHOT_CHECK_INTERVAL=0)
+        self.settings_override.enable()
+        snapshot._snapshot = None
+
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        MutualFund.objects.create(
+            scheme_code=100, scheme_name='Scheme 100', nav=10.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity',
+            fund_family=FundFamily.objects.create(name='Axis Mutual Fund'),
+        )
+
+    def test_purchase_of_deleted_scheme_is_not_found(self):
+        """A scheme deleted after the snapshot was written answers 404 like an unknown one."""
+        snapshot.write_snapshot()
+        MutualFund.objects.filter(scheme_code=100).delete()
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('funds:purchase_fund'),
+                                    {'scheme_code': 100, 'units': 2, 'invested_amount': 20}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data, {'error': 'Mutual Fund not found.', 'success': False})
+        self.assertFalse(Portfolio.objects.exists())
+
+    def tearDown(self):
+        snapshot._snapshot = None
+        self.settings_override.disable()
+        self.directory.cleanup()
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,65 @@
+from datetime import date
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from funds.holdings import add_holding
+from funds.models import FundFamily, MutualFund
+from funds.stats import bump_stats_version
+import logging
+
+User = get_user_model()
+
+
+class FundStatsTestCase(APITestCase):
+    def setUp(self):
+        # Throttle history lives in the cache; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        axis = FundFamily.objects.create(name='Axis Mutual Fund')
+        hdfc = FundFamily.objects.create(name='HDFC Mutual Fund')
+        self.funds = {}
+        for code, family, category, nav in ((1, axis, 'Equity', 10.0), (2, axis, 'Equity', 20.0),
+                                             (3, axis, 'Debt', 30.0), (4, hdfc, 'Equity', 40.0)):
+            self.funds[code] = MutualFund.objects.create(
+                scheme_code=code, scheme_name=f'Scheme {code}', nav=nav, nav_date=date(2025, 4, 1),
+                scheme_type='Open Ended Schemes', scheme_category=category, fund_family=family,
+            )
+        add_holding(self.user.id, self.funds[1].id, 2, 20)
+        add_holding(self.user.id, self.funds[4].id, 1, 40)
+        self.client.force_authenticate(user=self.user)
+
+    def test_stats_per_family_and_category(self):
+        """Counts, average NAV and AUM roll up per family and per category."""
+        response = self.client.get(reverse('funds:fund_stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+
+        axis = data['families'][0]
+        self.assertEqual((axis['name'], axis['scheme_count'], axis['average_nav'], axis['aum']),
+                         ('Axis Mutual Fund', 3, 20.0, 20.0))
+        self.assertEqual([(c['category'], c['scheme_count']) for c in axis['categories']], [('Debt', 1), ('Equity', 2)])
+        equity = data['categories'][1]
+        self.assertEqual((equity['scheme_count'], equity['average_nav'], equity['aum']), (3, 23.3333, 60.0))
+        self.assertEqual((data['total_schemes'], data['total_aum']), (4, 60.0))
+
+    def test_purchases_do_not_invalidate(self):
+        """Reads hit the cache through purchases; the ingest's version bump or expiry refreshes them."""
+        self.client.get(reverse('funds:fund_stats'))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('funds:purchase_fund'),
+                                        {'scheme_code': 3, 'units': 1, 'invested_amount': 30}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            data = self.client.get(reverse('funds:fund_stats')).data['data']
+        self.assertEqual(data['total_aum'], 60.0)
+
+        bump_stats_version()
+        data = self.client.get(reverse('funds:fund_stats')).data['data']
+        self.assertEqual(data['total_aum'], 90.0)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
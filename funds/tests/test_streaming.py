@@ -0,0 +1,154 @@
+import gzip
+import json
+import logging
+import re
+import zlib
+from datetime import date
+from itertools import chain
+from unittest import mock
+from asgiref.sync import iscoroutinefunction
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError
+from django.core.handlers.asgi import ASGIHandler
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from core.compression import CompressionMiddleware, negotiate_encoding
+from core.renderers import FastJSONRenderer
+from core.streaming import iter_json_envelope
+from funds.models import FundFamily, MutualFund, Portfolio
+from funds.serializers import OpenLotReadSerializer, PortfolioReadSerializer
+
+User = get_user_model()
+
+
+def raise_database_error(_):
+    raise OperationalError('connection lost')
+
+
+class StreamingResponseTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        funds = MutualFund.objects.bulk_create(
+            MutualFund(
+                scheme_code=code, scheme_name=f'Axis Scheme {code} – Direct Growth', nav=10 + code / 7,
+                nav_date=date(2025, 4, 1), scheme_type='Open Ended Schemes',
+                scheme_category='Equity', fund_family=family,
+            )
+            for code in range(1, 1201)
+        )
+        Portfolio.objects.bulk_create(
+            Portfolio(user=self.user, mutual_fund=fund, units=fund.scheme_code / 3, invested_amount=1000)
+            for fund in funds
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('funds:user_portfolio')
+
+    def expected_bytes(self):
+        holdings = Portfolio.objects.filter(user=self.user).order_by('-purchase_date')
+        return FastJSONRenderer().render({'data': PortfolioReadSerializer(holdings).data, 'success': True})
+
+    def test_envelope_matches_full_render(self):
+        """Chunked rendering produces the same bytes as rendering everything at once."""
+        rows = [(f'Scheme {index}', index / 3, 100.0, 10.5) for index in range(7)]
+        for chunk_size in (1, 3, 7, 100):
+            streamed = b''.join(iter_json_envelope(
+                rows, PortfolioReadSerializer.to_representation, extra={'success': True}, chunk_size=chunk_size,
+            ))
+            expected = FastJSONRenderer().render({
+                'data': PortfolioReadSerializer(rows).data, 'success': True,
+            })
+            self.assertEqual(streamed, expected)
+        self.assertEqual(b''.join(iter_json_envelope([], PortfolioReadSerializer.to_representation)), b'{"data":[]}')
+
+    def test_portfolio_is_streamed(self):
+        """The portfolio endpoint streams the same document it used to render."""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b''.join(response.streaming_content), self.expected_bytes())
+
+    def test_portfolio_is_gzipped_when_accepted(self):
+        """Large streamed responses are gzip compressed incrementally."""
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), self.expected_bytes())
+        self.assertLess(len(body), len(self.expected_bytes()) / 3)
+
+    def test_query_errors_are_a_500_before_streaming(self):
+        """A database error while running the query is answered with the view's 500, not a truncated 200."""
+        with mock.patch.object(OpenLotReadSerializer, 'queryset') as queryset, self.assertLogs('funds', 'ERROR'):
+            queryset.return_value.iterator.return_value = map(raise_database_error, [None])
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertFalse(response.streaming)
+        self.assertFalse(response.data['success'])
+
+    def test_errors_after_the_first_chunk_abort_the_stream(self):
+        """Once streaming, a failure is logged and raised so the body ends as invalid JSON."""
+        rows = list(OpenLotReadSerializer.queryset(Portfolio.objects.filter(user=self.user)))
+        with mock.patch.object(OpenLotReadSerializer, 'queryset') as queryset:
+            queryset.return_value.iterator.return_value = chain(rows, map(raise_database_error, [None]))
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertLogs('core.streaming', 'ERROR'), self.assertRaises(OperationalError):
+            b''.join(response.streaming_content)
+
+    def test_small_responses_are_not_compressed(self):
+        """Bodies under the minimum length are sent as they are."""
+        response = self.client.get(reverse('funds:list_fund_families'), HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content)['count'], 1)
+
+    def test_negotiation(self):
+        """Accept-Encoding q-values decide between brotli and gzip."""
+        self.assertEqual(negotiate_encoding('gzip, br', brotli_available=True), 'br')
+        self.assertEqual(negotiate_encoding('gzip, br', brotli_available=False), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0.5, gzip;q=0.8', brotli_available=True), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0', brotli_available=False), None)
+        self.assertEqual(negotiate_encoding('*', brotli_available=False), 'gzip')
+        self.assertEqual(negotiate_encoding('identity', brotli_available=True), None)
+        self.assertEqual(negotiate_encoding('', brotli_available=True), None)
+
+
+class AsyncCompressionTestCase(SimpleTestCase):
+    @override_settings(DEBUG=True)
+    def test_asgi_handler_does_not_adapt_the_middleware(self):
+        """Under ASGI the middleware chain stays async: no middleware in use is wrapped in a thread."""
+        with self.assertLogs('django.request', 'DEBUG') as logs:
+            logging.getLogger('django.request').debug('loading middleware')
+            ASGIHandler()
+        adapted = {re.search(r'adapted for middleware (\S+)\.$', line)[1] for line in logs.output if 'adapted' in line}
+        unused = {re.search(r"MiddlewareNotUsed: '(\S+)'", line)[1] for line in logs.output if 'NotUsed' in line}
+        self.assertEqual(adapted - unused, set())
+
+    async def test_async_stream_is_compressed_lazily(self):
+        """Async streaming content is wrapped, not consumed, and decompresses to the original."""
+        produced = []
+
+        async def lines():
+            for index in range(3):
+                produced.append(index)
+                yield b'{"line":%d}\n' % index
+
+        async def view(request):
+            return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+
+        middleware = CompressionMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual((response['Content-Encoding'], produced), ('gzip', []))
+
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(gzip.decompress(body), b'{"line":0}\n{"line":1}\n{"line":2}\n')
@@ -0,0 +1,99 @@
+from datetime import date
+from unittest import mock
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from core import throttling
+from core.throttling import ScopedTokenBucketThrottle, take_token
+from funds.models import FundFamily, MutualFund
+import logging
+
+User = get_user_model()
+
+RATES = {'user': '1000/day', 'anon': '1000/day', 'read': '3/min', 'purchase': '2/min', 'login': '2/min'}
+
+
+@mock.patch.object(ScopedTokenBucketThrottle, 'THROTTLE_RATES', RATES)
+class ScopedThrottleTestCase(APITestCase):
+    def setUp(self):
+        # Buckets live in the cache without Redis; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        MutualFund.objects.create(
+            scheme_code=101, scheme_name='Axis Bluechip', nav=20.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+        )
+
+    def test_login_has_its_own_bucket(self):
+        """Repeated logins from one client are limited, with a Retry-After hint."""
+        url = reverse('accounts:login')
+        credentials = {'email': 'investor@example.com', 'password': 'wrong'}
+        codes = [self.client.post(url, credentials, format='json').status_code for _ in range(3)]
+        self.assertEqual(codes, [401, 401, 429])
+
+        response = self.client.post(url, credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_scopes_are_counted_separately(self):
+        """Exhausting the purchase quota leaves reads available."""
+        self.client.force_authenticate(self.user)
+        purchase = reverse('funds:purchase_fund')
+        data = {'scheme_code': 101, 'units': 1, 'invested_amount': 20}
+        codes = [self.client.post(purchase, data, format='json').status_code for _ in range(3)]
+        self.assertEqual(codes, [201, 201, 429])
+
+        portfolio = reverse('funds:user_portfolio')
+        codes = [self.client.get(portfolio).status_code for _ in range(4)]
+        self.assertEqual(codes, [200, 200, 200, 429])
+
+    async def test_async_views_share_the_read_quota(self):
+        """The ASGI read views draw on the same bucket as the DRF views and answer 429 the same way."""
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        portfolio = reverse('funds:async_user_portfolio')
+        codes = [(await self.async_client.get(portfolio, headers=headers)).status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 200])
+
+        response = await self.async_client.get(reverse('funds:async_list_fund_families'), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(response.json()['status_code'], 429)
+        response = await self.async_client.get(reverse('funds:user_portfolio'), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_bucket_state_does_not_grow(self):
+        """A client's bucket stays two numbers however many requests it makes."""
+        for _ in range(50):
+            take_token('throttle_test_client', 100, 60)
+        tokens, stamp = cache.get('throttle_test_client')
+        self.assertAlmostEqual(tokens, 50, places=0)
+
+    def test_tokens_refill_over_time(self):
+        """An empty bucket refills at capacity / duration tokens per second."""
+        with mock.patch.object(throttling.time, 'time', return_value=1000.0):
+            self.assertEqual(take_token('throttle_refill', 2, 60), (True, 0.0))
+            self.assertEqual(take_token('throttle_refill', 2, 60), (True, 0.0))
+            allowed, wait = take_token('throttle_refill', 2, 60)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30)
+        with mock.patch.object(throttling.time, 'time', return_value=1030.0):
+            self.assertTrue(take_token('throttle_refill', 2, 60)[0])
+
+    @override_settings(THROTTLE_REDIS_URL='redis://127.0.0.1:1/0')
+    def test_unreachable_redis_falls_back_to_the_cache(self):
+        """Checks keep working on local buckets and do not retry Redis on every request."""
+        self.addCleanup(setattr, throttling, '_redis_down_until', 0.0)
+        with mock.patch.object(throttling, '_take_redis', wraps=throttling._take_redis) as take_redis:
+            self.assertTrue(take_token('throttle_fallback', 5, 60)[0])
+            self.assertTrue(take_token('throttle_fallback', 5, 60)[0])
+        self.assertEqual(take_redis.call_count, 1)
+        self.assertIsNotNone(cache.get('throttle_fallback'))
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
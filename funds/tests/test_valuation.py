@@ -0,0 +1,98 @@
+import os
+import tempfile
+from datetime import date
+from rest_framework.test import APITestCase
+from rest_framework import status
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from funds.models import FundFamily, MutualFund, Portfolio, PortfolioValuation
+from funds.holdings import rebuild_holdings
+from funds.valuation import refresh_valuations, revalue_funds
+from funds import ingest
+import logging
+
+User = get_user_model()
+SNAPSHOT_PATH = os.path.join(tempfile.gettempdir(), 'test_valuation.snapshot')
+
+
+@override_settings(SCHEME_SNAPSHOT_PATH=SNAPSHOT_PATH)
+class PortfolioValuationTestCase(APITestCase):
+    def setUp(self):
+        # Throttle history lives in the cache; start every test from a clean slate
+        cache.clear()
+        logging.disable(logging.CRITICAL)
+        self.user = User.objects.create_user(email='investor@example.com', username='investor', password='Test1234')
+        self.other = User.objects.create_user(email='other@example.com', username='other', password='Test1234')
+        family = FundFamily.objects.create(name='Axis Mutual Fund')
+        self.equity = MutualFund.objects.create(
+            scheme_code=101, scheme_name='Axis Bluechip', nav=50.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Equity', fund_family=family,
+        )
+        self.debt = MutualFund.objects.create(
+            scheme_code=102, scheme_name='Axis Liquid', nav=10.0, nav_date=date(2025, 4, 1),
+            scheme_type='Open Ended Schemes', scheme_category='Debt', fund_family=family,
+        )
+        Portfolio.objects.create(user=self.user, mutual_fund=self.equity, units=2, invested_amount=90)
+        Portfolio.objects.create(user=self.user, mutual_fund=self.equity, units=1, invested_amount=45)
+        Portfolio.objects.create(user=self.user, mutual_fund=self.debt, units=5, invested_amount=50)
+        Portfolio.objects.create(user=self.other, mutual_fund=self.debt, units=1, invested_amount=10)
+
+    def test_summary_is_computed_once_then_read(self):
+        """The first summary materializes the valuation; later ones are one-row reads."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(reverse('funds:portfolio_summary'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data['data']
+        self.assertEqual(data['total_invested'], 185.0)
+        self.assertEqual(data['current_value'], 200.0)
+        self.assertEqual(data['gain'], 15.0)
+        self.assertEqual([holding['units'] for holding in data['holdings']], [3, 5])
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse('funds:portfolio_summary'))
+
+    def test_purchase_updates_valuation_incrementally(self):
+        """Buying folds the new units into the stored valuation."""
+        refresh_valuations([self.user.id])
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('funds:purchase_fund'),
+                                    {'scheme_code': 102, 'units': 5, 'invested_amount': 49}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        valuation = PortfolioValuation.objects.get(user=self.user)
+        self.assertEqual(valuation.total_invested, 234.0)
+        self.assertEqual(valuation.current_value, 250.0)
+        self.assertEqual(valuation.holdings[1]['units'], 10)
+
+    def test_revaluation_only_touches_affected_users(self):
+        """A NAV change of one scheme revalues only its holders."""
+        rebuild_holdings()
+        refresh_valuations([self.user.id, self.other.id])
+        MutualFund.objects.filter(pk=self.equity.pk).update(nav=60.0)
+
+        self.assertEqual(revalue_funds([self.equity.id]), 1)
+        self.assertEqual(PortfolioValuation.objects.get(user=self.user).current_value, 230.0)
+        self.assertEqual(PortfolioValuation.objects.get(user=self.other).current_value, 10.0)
+
+    def test_ingest_updates_changed_navs(self):
+        """Existing schemes get their new NAV instead of failing validation."""
+        feed = [
+            {'Scheme_Code': 101, 'Scheme_Name': 'Axis Bluechip', 'Net_Asset_Value': '55.5', 'Date': '02-Apr-2025',
+             'Scheme_Type': 'Open Ended Schemes', 'Scheme_Category': 'Equity', 'Mutual_Fund_Family': 'Axis Mutual Fund'},
+            {'Scheme_Code': 102, 'Scheme_Name': 'Axis Liquid', 'Net_Asset_Value': '10', 'Date': '01-Apr-2025',
+             'Scheme_Type': 'Open Ended Schemes', 'Scheme_Category': 'Debt', 'Mutual_Fund_Family': 'Axis Mutual Fund'},
+        ]
+        with self.captureOnCommitCallbacks() as callbacks:
+            created, updated, failed = ingest.save_feed(feed)
+
+        self.assertEqual((created, updated, failed), ([], ['Axis Bluechip'], []))
+        self.equity.refresh_from_db()
+        self.assertEqual((self.equity.nav, self.equity.nav_date), (55.5, date(2025, 4, 2)))
+        self.assertEqual(len(callbacks), 3)  # revaluation, NAV stream push and stats invalidation
+
+    def tearDown(self):
+        if os.path.exists(SNAPSHOT_PATH):
+            os.remove(SNAPSHOT_PATH)
+        logging.disable(logging.NOTSET)
@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Loaded by web requests or on first use only; a worker booting with any of them
+# has picked up an import of the view layer again
+HEAVY_MODULES = ('rest_framework.views', 'rest_framework.serializers', 'funds.views', 'requests', 'numpy')
+
+# Seconds; generous, as the suite also runs on slow shared CI machines
+STARTUP_BUDGET = 5.0
+TASK_IMPORT_BUDGET = 1.5
+
+# What `celery -A MutualFundBroker worker` does before taking messages
+WORKER_BOOT = """
+import json, sys, time
+started = time.perf_counter()
+from MutualFundBroker.celery import app
+app.loader.import_default_modules()  # django.setup() and the task modules
+app.finalize()
+booted = time.perf_counter()
+import funds.tasks
+print(json.dumps({
+    'seconds': booted - started,
+    'loaded': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+TASK_IMPORT = """
+import json, time
+import django
+django.setup()
+started = time.perf_counter()
+import funds.tasks
+print(json.dumps({'seconds': time.perf_counter() - started}))
+"""
+
+
+def run_python(code):
+    environment = {key: value for key, value in os.environ.items() if key != 'CELERY_SKIP_CHECKS'}
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=environment,
+        capture_output=True, text=True, check=True, timeout=60,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+class WorkerStartupTestCase(SimpleTestCase):
+    def test_worker_does_not_load_the_view_layer(self):
+        """Booting a worker imports every task module but not DRF views, requests or NumPy."""
+        boot = run_python(WORKER_BOOT)
+        self.assertEqual(boot['loaded'], [])
+        self.assertLess(boot['seconds'], STARTUP_BUDGET)
+
+    def test_task_modules_import_within_budget(self):
+        """The task modules import quickly once Django is set up."""
+        self.assertLess(run_python(TASK_IMPORT)['seconds'], TASK_IMPORT_BUDGET)
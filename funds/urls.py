@@ -1,11 +1,26 @@
 from django.urls import path
-from .views import FundFamilyListView, FetchFundsByFamilyView, BuyFundView, PortfolioView
+from .views import FundFamilyListView, FetchFundsByFamilyView, BuyFundView, PortfolioView, PortfolioSummaryView, FundStatsView
+from .views import AsyncFundFamilyListView, AsyncPortfolioView, CatalogueExportView, IngestRunView, NavStreamView
+from .views import RealizedGainsView, RedeemFundView, SipMandateCancelView, SipMandateView
 
 app_name = 'funds'
 
 urlpatterns = [
     path('api/v1/list-fund-families', FundFamilyListView.as_view(), name='list_fund_families'), # List all Fund Families
+    path('api/v1/fund-stats', FundStatsView.as_view(), name='fund_stats'),  # Aggregates per family and category
     path('api/v1/fetch-external-funds', FetchFundsByFamilyView.as_view(), name='fetch_external_funds'),  #Fetch funds from third-party API
+    path('api/v1/ingest-runs/<int:run_id>', IngestRunView.as_view(), name='ingest_run'),  # Status of a fund ingest
     path('api/v1/purchase-fund', BuyFundView.as_view(), name='purchase_fund'),  # Buy/invest in a fund
+    path('api/v1/redeem-fund', RedeemFundView.as_view(), name='redeem_fund'),  # Sell units, oldest purchases first
+    path('api/v1/sip-mandates', SipMandateView.as_view(), name='sip_mandates'),  # Monthly recurring purchases
+    path('api/v1/sip-mandates/<int:mandate_id>', SipMandateCancelView.as_view(), name='cancel_sip_mandate'),  # DELETE to cancel
     path('api/v1/user-portfolio', PortfolioView.as_view(), name='user_portfolio'),  # Get user's bought funds
+    path('api/v1/realized-gains', RealizedGainsView.as_view(), name='realized_gains'),  # Gains of past redemptions, for tax reports
+    path('api/v1/portfolio-summary', PortfolioSummaryView.as_view(), name='portfolio_summary'),  # Totals and per-scheme breakdown
+    path('api/v1/export-catalogue', CatalogueExportView.as_view(), name='export_catalogue'),  # Download the scheme catalogue
+
+    # Async (ASGI) variants of the read endpoints
+    path('api/v1/async/list-fund-families', AsyncFundFamilyListView.as_view(), name='async_list_fund_families'),
+    path('api/v1/async/user-portfolio', AsyncPortfolioView.as_view(), name='async_user_portfolio'),
+    path('api/v1/nav-stream', NavStreamView.as_view(), name='nav_stream'),  # Server-sent NAV updates
 ]
@@ -0,0 +1,116 @@
+"""
+Materialized portfolio valuations.
+
+``PortfolioValuation`` keeps one row per user with the totals and the
+per-scheme breakdown of their portfolio. Rows are recomputed in bulk after a
+NAV ingest, only for users holding a scheme whose NAV changed, and adjusted
+in place on purchase. Reading a summary is then a single-row lookup.
+"""
+from django.db import transaction
+from django.db.models import Sum
+
+from core.utils import get_logger
+
+from .holdings import REMAINING_COST, REMAINING_UNITS, holders_of
+from .models import Portfolio, PortfolioValuation
+
+logger = get_logger(__name__)
+
+# Users revalued per grouped query and per bulk upsert
+VALUATION_BATCH_SIZE = 500
+
+_UPDATE_FIELDS = ['total_invested', 'current_value', 'holdings', 'valued_at']
+
+
+def current_value(units, nav):
+    """Current value of a holding; shared with the read serializers."""
+    return round(units * nav, 2)
+
+
+def holding_entry(scheme_code, scheme_name, units, invested_amount, nav):
+    return {
+        'scheme_code': scheme_code,
+        'scheme_name': scheme_name,
+        'units': units,
+        'invested_amount': round(invested_amount, 2),
+        'nav': nav,
+        'current_value': current_value(units, nav),
+    }
+
+
+def apply_totals(valuation):
+    valuation.total_invested = round(sum(holding['invested_amount'] for holding in valuation.holdings), 2)
+    valuation.current_value = round(sum(holding['current_value'] for holding in valuation.holdings), 2)
+    return valuation
+
+
+def compute_valuations(user_ids):
+    """Unsaved ``PortfolioValuation`` objects for ``user_ids``, built from one grouped query."""
+    valuations = {user_id: PortfolioValuation(user_id=user_id, holdings=[]) for user_id in user_ids}
+    rows = (
+        Portfolio.objects.filter(user_id__in=list(valuations), is_open=True)
+        .values_list('user_id', 'mutual_fund__scheme_code', 'mutual_fund__scheme_name', 'mutual_fund__nav')
+        .annotate(total_units=Sum(REMAINING_UNITS), total_invested=Sum(REMAINING_COST))
+        .order_by('user_id', 'mutual_fund__scheme_code')
+    )
+    for user_id, scheme_code, scheme_name, nav, units, invested_amount in rows:
+        valuations[user_id].holdings.append(holding_entry(scheme_code, scheme_name, units, invested_amount, nav))
+    return [apply_totals(valuation) for valuation in valuations.values()]
+
+
+def refresh_valuations(user_ids, batch_size=VALUATION_BATCH_SIZE):
+    """Recompute and upsert the valuations of ``user_ids``; return how many were written."""
+    user_ids = sorted(set(user_ids))
+    for start in range(0, len(user_ids), batch_size):
+        PortfolioValuation.objects.bulk_create(
+            compute_valuations(user_ids[start:start + batch_size]),
+            update_conflicts=True, unique_fields=['user'], update_fields=_UPDATE_FIELDS,
+        )
+    return len(user_ids)
+
+
+def revalue_funds(mutual_fund_ids):
+    """Refresh the valuations affected by NAV changes of ``mutual_fund_ids``."""
+    count = refresh_valuations(holders_of(mutual_fund_ids))
+    logger.info("Revalued %s portfolios after NAV changes in %s schemes", count, len(mutual_fund_ids))
+    return count
+
+
+def schedule_revaluation(mutual_fund_ids):
+    """Queue the revaluation of ``mutual_fund_ids`` on the Celery workers."""
+    from .tasks import refresh_portfolio_valuations  # funds.tasks imports this module
+
+    refresh_portfolio_valuations.delay(list(mutual_fund_ids))
+
+
+def get_valuation(user):
+    """The user's valuation, computed on first access."""
+    valuation = PortfolioValuation.objects.filter(user=user).first()
+    if valuation is None:
+        refresh_valuations([user.id])
+        valuation = PortfolioValuation.objects.get(user=user)
+    return valuation
+
+
+def record_purchase(user_id, mutual_fund, units, invested_amount):
+    """Fold a new purchase into the user's valuation without re-reading the portfolio."""
+    with transaction.atomic():
+        valuation = PortfolioValuation.objects.select_for_update().filter(user_id=user_id).first()
+        if valuation is None:
+            # First valuation for this user; the purchase is already in Portfolio
+            refresh_valuations([user_id])
+            return
+
+        for index, holding in enumerate(valuation.holdings):
+            if holding['scheme_code'] == mutual_fund.scheme_code:
+                valuation.holdings[index] = holding_entry(
+                    mutual_fund.scheme_code, mutual_fund.scheme_name, holding['units'] + units,
+                    holding['invested_amount'] + invested_amount, mutual_fund.nav,
+                )
+                break
+        else:
+            valuation.holdings.append(holding_entry(
+                mutual_fund.scheme_code, mutual_fund.scheme_name, units, invested_amount, mutual_fund.nav,
+            ))
+            valuation.holdings.sort(key=lambda holding: holding['scheme_code'])
+        apply_totals(valuation).save(update_fields=_UPDATE_FIELDS)
@@ -1,20 +1,44 @@
+from datetime import date
+from itertools import chain, islice
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError as DRFValidationError
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
-from .models import FundFamily, MutualFund, Portfolio
-from .serializers import FundFamilySerializer, MutualFundSerializer, PortfolioSerializer
-import requests
-from core.utils import parse_date  # Utility function for parsing dates
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from accounts.BlacklistJWTMiddleware import BlacklistJWTAuthentication
+from core.db import catalogue_db
+from core.streaming import StreamingJSONResponse
+from .models import FundFamily, IngestRun, MutualFund, Portfolio, SchemeHolding, SipMandate
+from .holdings import REMAINING_COST, REMAINING_UNITS, add_holding
+from .lots import realized_gains, redeem
+from .ingest import request_ingest
+from .nav_stream import NavEventStream
+from .sip import next_run_date
+from .snapshot import lookup_scheme
+from .stats import get_stats
+from .valuation import get_valuation, record_purchase
+from .export import CONTENT_TYPES, EXPORT_FORMATS, FILE_EXTENSIONS, iter_export
+from .serializers import PortfolioSerializer
+from .serializers import FundFamilyReadSerializer, OpenLotReadSerializer
 from core.utils import get_logger  # Logger utility for tracking events
-import os
 
 # Initialize logger for this module. All log statements will be tagged under 'funds'.
 logger = get_logger('funds')
 
+# Rows fetched from the database and rendered per chunk when streaming a portfolio
+PORTFOLIO_CHUNK_SIZE = 500
+
 class FundFamilyListView(APIView):
     """
     API View to handle the listing of all Fund Families.
@@ -24,6 +48,7 @@ class FundFamilyListView(APIView):
 
 class FundFamilyListView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'read'
 
     def get(self, request):
         try:
@@ -34,8 +59,8 @@ class FundFamilyListView(APIView):
             if not page_size.isdigit() or int(page_size) <= 0:
                 page_size = 10  
             
-            # Order the queryset to avoid the warning
-            families = FundFamily.objects.all().order_by('id')
+            # Order the queryset to avoid the warning; read plain tuples for the fast serializer
+            families = FundFamilyReadSerializer.queryset(FundFamily.objects.using(catalogue_db()).order_by('id'))
 
             # Set up Pagination
             paginator = PageNumberPagination()
@@ -51,7 +76,7 @@ class FundFamilyListView(APIView):
                 }, status=status.HTTP_404_NOT_FOUND)
 
             # Serialize the paginated result
-            serializer = FundFamilySerializer(result_page, many=True)
+            serializer = FundFamilyReadSerializer(result_page)
 
             # Return paginated response with custom data
             response_data = paginator.get_paginated_response(serializer.data).data
@@ -60,7 +85,7 @@ class FundFamilyListView(APIView):
             return Response(response_data, status=status.HTTP_200_OK)
 
         except ObjectDoesNotExist as e:
-            logger.warning(f"Object not found: {e}")
+            logger.warning("Object not found: %s", e)
             return Response({
                 'error': 'FundFamily object not found.',
                 'success': False,
@@ -68,7 +93,7 @@ class FundFamilyListView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
         except ValueError as e:
-            logger.error(f"Value Error: {e}")
+            logger.error("Value Error: %s", e)
             return Response({
                 'error': 'Invalid value provided.',
                 'success': False,
@@ -76,7 +101,7 @@ class FundFamilyListView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
-            logger.exception(f"Unexpected error occurred: {e}")
+            logger.exception("Unexpected error occurred: %s", e)
             return Response({
                 'error': 'Internal server error. Please try again later.',
                 'success': False,
@@ -90,123 +115,84 @@ class FetchFundsByFamilyView(APIView):
     permission_classes = [IsAuthenticated]  # Only authenticated users can access this view
     def get(self, request):
         """
-        Handle GET request to fetch mutual fund data from a third-party API, 
-        save it to the database, and return the results.
-
-        The function performs the following tasks:
-        1. Fetches mutual fund data from a third-party API using the `fetch_funds_from_api` method.
-        2. Attempts to save the fetched funds into the local database using the `save_funds_to_db` method.
-        3. Returns a detailed response with the results of the operation:
-            - `created_funds`: List of mutual funds successfully saved to the database.
-            - `failed_funds`: List of mutual funds that failed to save, along with their validation errors.
-            - `message`: A message indicating the success of the operation.
-            - `success`: Boolean indicating whether the operation was successful or not.
+        Handle GET request to refresh the mutual fund catalogue from a third-party API.
+
+        The ingest itself runs in a Celery worker (see `funds.ingest`); this view
+        only requests it and returns immediately:
+        1. Starts a new ingest run, or attaches to the run already in progress, so
+           concurrent triggers never fetch and save the same data twice.
+        2. Returns the run ID, which can be polled at `ingest-runs/<run_id>`:
+            - `run_id`: ID of the ingest run serving this request.
+            - `status`: Current status of the run (`queued`, `running`, ...).
+            - `attached`: True when the run was already in progress.
+            - `message`: A message describing what happened.
+            - `success`: Boolean indicating whether the request was accepted.
 
         Expected Responses:
-            - 201 Created: If mutual funds are fetched and saved successfully.
-            - 400 Bad Request: If there are validation or input issues (e.g., failed API request or invalid data).
+            - 202 Accepted: The ingest was started or is already running.
             - 500 Internal Server Error: For any unexpected errors during the process.
         """
 
         try:
-            # Fetch mutual fund data from the API
-            data = self.fetch_funds_from_api()
-
-            # Save the fetched funds into the database
-            created_funds, failed_funds = self.save_funds_to_db(data)
+            run, started = request_ingest('api', user=request.user)
 
-            # Return a success response with details about created and failed funds
             return Response({
-                "message": "Funds fetched and saved successfully!",
-                "created_funds": created_funds,  # List of successfully created funds
-                "failed_funds": failed_funds,    # List of failed funds with validation errors
-                "success": True,  # Indicate successful execution
-            }, status=status.HTTP_201_CREATED)  # HTTP 201 indicates successful creation
-
-        except (ValueError, DRFValidationError) as error:
-            # Handle specific errors like failed API request or serializer validation errors
-            logger.error(f"Error: {error}")
-            return Response({
-                'error': str(error),
-                'success': False
-            }, status=status.HTTP_400_BAD_REQUEST)  # HTTP 400 for bad requests
+                "message": "Fund ingest started." if started else "A fund ingest is already in progress.",
+                "run_id": run.id,
+                "status": run.status,
+                "attached": not started,
+                "success": True,
+            }, status=status.HTTP_202_ACCEPTED)  # The work continues in the background
 
         except Exception as error:
             # Catch any other unforeseen errors and log them
-            logger.exception(f"Exception is: {error}")
+            logger.exception("Exception is: %s", error)
             return Response({
                 'error': f"{error}",
                 'success': False
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)  # HTTP 500 for server errors
 
 
+class IngestRunView(APIView):
+    """
+    API view to follow an ingest run started by `FetchFundsByFamilyView`.
+    """
 
-    def fetch_funds_from_api(self):
-        """
-        Function to call a third-party API and fetch mutual fund data.
-        Handles API request and response validation.
-        """
-        try:
-            # Send GET request to the third-party API using provided headers and parameters
-            response = requests.get(
-                os.getenv('RAPID_API_URL'),
-                headers={ 
-                    "x-rapidapi-key": os.getenv('RAPIDAPI_KEY'),
-                    "x-rapidapi-host": os.getenv('RAPIDAPI_HOST')
-                },
-                params={"Scheme_Type": "Open"}  # Fetching only open-ended mutual funds
-            )
-
-            # Check if the API response status is successful (HTTP 200)
-            if response.status_code != 200:
-                raise ValueError("Failed to fetch schemes from third-party API")
-
-            # Return the response as JSON if successful
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            # Catch any exceptions during the API request (network issues, etc.)
-            logger.error(f"Error in API request: {e}")
-            raise ValueError("API Request failed")  # Raise a value error to handle it in the main function
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'read'
 
-    def save_funds_to_db(self, data):
+    def get(self, request, run_id):
         """
-        Function to save fetched mutual fund data into the database.
-        It attempts to create records in the MutualFund table.
-        Returns a list of created funds and failed fund data.
+        Handle GET request to retrieve the status and results of an ingest run.
+
+        Response:
+            - `200 OK` with the run's `status`, timestamps and fund counts.
+            - `404 Not Found` if the run does not exist.
         """
-        created_funds = []  # List to store names of successfully created funds
-        failed_funds = []  # List to store funds that failed to be created (along with errors)
-
-        # Iterate over each fund item fetched from the API response
-        for item in data:
-            if item['Scheme_Type'] == 'Open Ended Schemes':
-                # Prepare data to be serialized into the MutualFund model
-                serializer = MutualFundSerializer(data={
-                    "scheme_code": item["Scheme_Code"],  # Unique identifier for each scheme
-                    "isin_growth": item.get("ISIN_Div_Payout_ISIN_Growth"),  # ISIN for Growth option
-                    "isin_reinvestment": item.get("ISIN_Div_Reinvestment"),  # ISIN for Dividend Reinvestment
-                    "scheme_name": item["Scheme_Name"],  # Name of the scheme
-                    "nav": float(item["Net_Asset_Value"]),  # NAV (Net Asset Value) of the scheme
-                    "nav_date": parse_date(item["Date"]),  # Parse the date for NAV
-                    "scheme_type": item["Scheme_Type"],  # Type of scheme (Open/Closed)
-                    "scheme_category": item["Scheme_Category"],  # Category of scheme (Equity/Debt)
-                    "fund_family_name": item["Mutual_Fund_Family"],  # Name of the fund family
-                })
-
-                # Validate the serializer data and save it to the database if valid
-                if serializer.is_valid():
-                    serializer.save()  # Save the mutual fund data to the database
-                    created_funds.append(item.get('Scheme_Name'))  # Add the name to created funds list
-                else:
-                    # If validation fails, store the errors along with the scheme name
-                    failed_funds.append({
-                        "scheme_name": item.get('Scheme_Name'),
-                        "errors": serializer.errors  # List the validation errors
-                    })
+        run = IngestRun.objects.filter(pk=run_id).first()
+        if run is None:
+            return Response({
+                'error': 'Ingest run not found.',
+                'success': False
+            }, status=status.HTTP_404_NOT_FOUND)
 
-        # Return both created and failed fund lists
-        return created_funds, failed_funds
+        return Response({
+            'data': {
+                'run_id': run.id,
+                'status': run.status,
+                'trigger': run.trigger,
+                'attached_requests': run.attached_requests,
+                'created_funds': run.created_funds,
+                'updated_funds': run.updated_funds,
+                'failed_funds': run.failed_funds,
+                'quarantined_funds': run.quarantined_funds,
+                'error': run.error,
+                'created_at': run.created_at,
+                'started_at': run.started_at,
+                'finished_at': run.finished_at,
+            },
+            'success': True
+        }, status=status.HTTP_200_OK)
 
 
 
@@ -234,6 +220,7 @@ class BuyFundView(APIView):
     """
 
     permission_classes = [IsAuthenticated]  # Ensures only authenticated users can access this endpoint
+    throttle_scope = 'purchase'
 
     def post(self, request):
         """
@@ -266,8 +253,14 @@ class BuyFundView(APIView):
                 raise ValueError("Units and Invested Amount must be greater than zero.")
             
             try:
-                # Retrieve the MutualFund object based on the scheme_code
-                mutual_fund = MutualFund.objects.get(scheme_code=scheme_code)
+                # Resolve the scheme from the mapped snapshot; schemes added since the
+                # last snapshot are read from the database
+                scheme = lookup_scheme(scheme_code)
+                if scheme is not None:
+                    mutual_fund = MutualFund(id=scheme.id, scheme_code=scheme.scheme_code, nav=scheme.nav,
+                                             nav_date=scheme.nav_date, scheme_name=scheme.scheme_name)
+                else:
+                    mutual_fund = MutualFund.objects.get(scheme_code=scheme_code)
             except MutualFund.DoesNotExist:
                 # If the mutual fund does not exist, return an error response
                 return Response({
@@ -275,13 +268,27 @@ class BuyFundView(APIView):
                     "success": False
                 }, status=status.HTTP_404_NOT_FOUND)  # Return 404 if the mutual fund is not found
 
-            # Create a new portfolio entry for the user
-            portfolio = Portfolio.objects.create(
-                user=request.user,  # The portfolio is tied to the authenticated user
-                mutual_fund=mutual_fund,  # The mutual fund the user is purchasing
-                units=units,  # Number of units being purchased
-                invested_amount=invested_amount  # Amount invested
-            )
+            try:
+                with transaction.atomic():
+                    # Create a new portfolio entry for the user
+                    portfolio = Portfolio.objects.create(
+                        user=request.user,  # The portfolio is tied to the authenticated user
+                        mutual_fund=mutual_fund,  # The mutual fund the user is purchasing
+                        units=units,  # Number of units being purchased
+                        invested_amount=invested_amount  # Amount invested
+                    )
+
+                    # Keep the holders index and the materialized valuation in step with the purchase
+                    add_holding(request.user.id, mutual_fund.id, units, invested_amount)
+                    record_purchase(request.user.id, mutual_fund, units, invested_amount)
+            except IntegrityError:
+                # The snapshot can still list a scheme deleted since it was written
+                if MutualFund.objects.filter(pk=mutual_fund.id).exists():
+                    raise
+                return Response({
+                    "error": "Mutual Fund not found.",
+                    "success": False
+                }, status=status.HTTP_404_NOT_FOUND)
 
             # Serialize the newly created portfolio object for the response
             serializer = PortfolioSerializer(portfolio)
@@ -294,7 +301,7 @@ class BuyFundView(APIView):
 
         except (ValueError, DRFValidationError) as error:
             # Handle validation errors and log them
-            logger.error(f"Validation Error: {error}")
+            logger.error("Validation Error: %s", error)
             return Response({
                 'error': str(error),
                 'success': False
@@ -302,7 +309,7 @@ class BuyFundView(APIView):
 
         except Exception as error:
             # Catch any other unforeseen errors, log them, and return a 500 response
-            logger.exception(f"Unexpected Error: {error}")
+            logger.exception("Unexpected Error: %s", error)
             return Response({
                 'error': f"Unexpected error occurred: {error}",
                 'success': False
@@ -310,6 +317,239 @@ class BuyFundView(APIView):
 
 
 
+class RedeemFundView(APIView):
+    """
+    API view to sell units of a mutual fund the user holds.
+
+    Units are taken from the user's purchases oldest first (FIFO, see
+    `funds.lots`) and sold at the scheme's latest NAV. The response carries
+    the proceeds, the realized gain and how much of each purchase was sold.
+
+    Expected Responses:
+        - 201 Created: The redemption was recorded.
+        - 400 Bad Request: Missing or invalid input, or more units than the user holds.
+        - 404 Not Found: If the specified mutual fund does not exist.
+        - 500 Internal Server Error: For unexpected server issues.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'purchase'
+
+    def post(self, request):
+        try:
+            scheme_code = request.data.get('scheme_code')
+            units = request.data.get('units')
+            if not scheme_code or not units:
+                return Response({
+                    "error": "Invalid redemption details. scheme_code and units are required."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                units = float(units)
+            except (TypeError, ValueError):
+                raise ValueError("Units must be a number.")
+            if not units > 0:
+                raise ValueError("Units must be greater than zero.")
+
+            try:
+                mutual_fund = MutualFund.objects.get(scheme_code=scheme_code)
+            except MutualFund.DoesNotExist:
+                return Response({
+                    "error": "Mutual Fund not found.",
+                    "success": False
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            redemption, realized = redeem(request.user.id, mutual_fund, units)
+
+            return Response({
+                'data': {
+                    'scheme_code': mutual_fund.scheme_code,
+                    'scheme_name': mutual_fund.scheme_name,
+                    'units': redemption.units,
+                    'nav': redemption.nav,
+                    'nav_date': redemption.nav_date,
+                    'amount': redemption.amount,
+                    'cost': redemption.cost,
+                    'realized_gain': redemption.realized_gain,
+                    'lots': [
+                        {
+                            'purchased_on': lot.purchased_on,
+                            'units': lot.units,
+                            'cost': lot.cost,
+                            'gain': lot.gain,
+                            'holding_days': lot.holding_days,
+                        }
+                        for lot in realized
+                    ],
+                },
+                'success': True
+            }, status=status.HTTP_201_CREATED)
+
+        except ValueError as error:
+            # Includes InsufficientUnits
+            logger.error("Validation Error: %s", error)
+            return Response({
+                'error': str(error),
+                'success': False
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        except Exception as error:
+            logger.exception("Unexpected Error: %s", error)
+            return Response({
+                'error': f"Unexpected error occurred: {error}",
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class RealizedGainsView(APIView):
+    """
+    API view for the realized gains of the user, for tax reports: per scheme
+    and term (short or long, split at `LONG_TERM_HOLDING_DAYS`), with totals.
+    Optional `from` and `to` query parameters (YYYY-MM-DD, inclusive) limit
+    the redemption dates, e.g. to a financial year.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'read'
+
+    def get(self, request):
+        try:
+            bounds = {}
+            for name in ('from', 'to'):
+                value = request.query_params.get(name)
+                if value:
+                    try:
+                        bounds[name] = date.fromisoformat(value)
+                    except ValueError:
+                        return Response({
+                            'error': f"{name} must be a date in YYYY-MM-DD format.",
+                            'success': False
+                        }, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({
+                'data': realized_gains(request.user.id, bounds.get('from'), bounds.get('to')),
+                'success': True
+            }, status=status.HTTP_200_OK)
+
+        except Exception as error:
+            logger.exception("Exception is :  %s", error)
+            return Response({
+                'error': f"{error}",
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class SipMandateView(APIView):
+    """
+    API view to list the user's active SIP mandates (GET) and to start one (POST).
+
+    A mandate buys `amount` rupees of the scheme every month on `day_of_month`
+    (1 to 28), at that day's NAV, through the daily scheduler (see `funds.sip`).
+    The first instalment is the next `day_of_month` after today.
+
+    Expected Responses:
+        - 200 OK: The list of mandates.
+        - 201 Created: The mandate was created.
+        - 400 Bad Request: Missing or invalid input.
+        - 404 Not Found: If the specified mutual fund does not exist.
+        - 500 Internal Server Error: For unexpected server issues.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'purchase'
+
+    @staticmethod
+    def mandate_data(mandate):
+        return {
+            'id': mandate.id,
+            'scheme_code': mandate.mutual_fund.scheme_code,
+            'scheme_name': mandate.mutual_fund.scheme_name,
+            'amount': mandate.amount,
+            'day_of_month': mandate.day_of_month,
+            'next_run_date': mandate.next_run_date,
+            'last_run_date': mandate.last_run_date,
+            'instalments': mandate.instalments,
+        }
+
+    def get(self, request):
+        mandates = SipMandate.objects.filter(user=request.user, is_active=True).select_related('mutual_fund')
+        return Response({
+            'data': [self.mandate_data(mandate) for mandate in mandates.order_by('id')],
+            'success': True
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        try:
+            scheme_code = request.data.get('scheme_code')
+            amount = request.data.get('amount')
+            day_of_month = request.data.get('day_of_month')
+            if not scheme_code or not amount or not day_of_month:
+                return Response({
+                    "error": "Invalid mandate details. scheme_code, amount and day_of_month are required."
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                amount = float(amount)
+                day_of_month = int(day_of_month)
+            except (TypeError, ValueError):
+                raise ValueError("Amount and day_of_month must be numbers.")
+            if not amount > 0:
+                raise ValueError("Amount must be greater than zero.")
+            if not 1 <= day_of_month <= 28:
+                raise ValueError("day_of_month must be between 1 and 28.")
+
+            try:
+                mutual_fund = MutualFund.objects.get(scheme_code=scheme_code)
+            except MutualFund.DoesNotExist:
+                return Response({
+                    "error": "Mutual Fund not found.",
+                    "success": False
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            mandate = SipMandate.objects.create(
+                user=request.user, mutual_fund=mutual_fund, amount=amount, day_of_month=day_of_month,
+                next_run_date=next_run_date(day_of_month, timezone.localdate()),
+            )
+            return Response({
+                'data': self.mandate_data(mandate),
+                'success': True
+            }, status=status.HTTP_201_CREATED)
+
+        except ValueError as error:
+            logger.error("Validation Error: %s", error)
+            return Response({
+                'error': str(error),
+                'success': False
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        except Exception as error:
+            logger.exception("Unexpected Error: %s", error)
+            return Response({
+                'error': f"Unexpected error occurred: {error}",
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SipMandateCancelView(APIView):
+    """
+    API view to cancel one of the user's SIP mandates. Instalments already
+    bought stay in the portfolio; 404 when the mandate is not an active one of the user.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'purchase'
+
+    def delete(self, request, mandate_id):
+        cancelled = SipMandate.objects.filter(id=mandate_id, user=request.user, is_active=True).update(
+            is_active=False, updated_at=timezone.now(),
+        )
+        if not cancelled:
+            return Response({
+                "error": "SIP mandate not found.",
+                "success": False
+            }, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class PortfolioView(APIView):
     """
     API view to retrieve and view the user's portfolio.
@@ -318,6 +558,7 @@ class PortfolioView(APIView):
     """
     
     permission_classes = [IsAuthenticated] 
+    throttle_scope = 'read'
     def get(self, request):
         """
         Handle GET request to retrieve the authenticated user's portfolio.
@@ -335,24 +576,345 @@ class PortfolioView(APIView):
                 - `500 Internal Server Error` if an unexpected error occurs.
         """
         try:
-            # Fetch the portfolio for the authenticated user
-            portfolio = Portfolio.objects.filter(user=request.user)
-            
-            # Serialize the portfolio data
-            serializer = PortfolioSerializer(portfolio, many=True)
-            
-            # Return a successful response with the serialized portfolio data
-            return Response({
-                'data': serializer.data,
-                'success': True
-            }, status=status.HTTP_200_OK) 
+            # Fetch the purchases the user still holds part of, newest first, with what
+            # is left of each after redemptions. The read serializer selects the fund
+            # columns in the same query.
+            portfolio = Portfolio.objects.filter(user=request.user).order_by('-purchase_date')
+            rows = OpenLotReadSerializer.queryset(portfolio).iterator(chunk_size=PORTFOLIO_CHUNK_SIZE)
+
+            # Run the query and read the first chunk here, so that a database error
+            # is still answered with the 500 below (see core.streaming for later errors)
+            first_chunk = list(islice(rows, PORTFOLIO_CHUNK_SIZE))
+
+            # Stream the serialized portfolio in chunks instead of building it in memory
+            return StreamingJSONResponse(
+                chain(first_chunk, rows), OpenLotReadSerializer.to_representation,
+                key='data', extra={'success': True}, chunk_size=PORTFOLIO_CHUNK_SIZE,
+                status=status.HTTP_200_OK,
+            )
 
         except Exception as error:
             # Log any unexpected errors that occur
-            logger.exception(f"Exception is :  {error}")
+            logger.exception("Exception is :  %s", error)
             
             # Return an error response with a 500 status code in case of any issues
             return Response({
                 'error': f"{error}",
                 'success': False
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR) 
+
+
+class PortfolioSummaryView(APIView):
+    """
+    API view to retrieve the totals of the user's portfolio.
+    Reads the precomputed valuation (see `funds.valuation`) instead of valuing
+    every holding on each request.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'read'
+
+    def get(self, request):
+        """
+        Handle GET request to retrieve the authenticated user's portfolio summary.
+
+        Response:
+            - A JSON object with:
+                - `data`: `total_invested`, `current_value`, `gain`, the per-scheme
+                  `holdings` breakdown and `valued_at`.
+                - `success`: Boolean indicating success (`True` or `False`).
+            - Status Code:
+                - `200 OK` if the summary is successfully retrieved.
+                - `500 Internal Server Error` if an unexpected error occurs.
+        """
+        try:
+            valuation = get_valuation(request.user)
+            return Response({
+                'data': {
+                    'total_invested': valuation.total_invested,
+                    'current_value': valuation.current_value,
+                    'gain': round(valuation.current_value - valuation.total_invested, 2),
+                    'holdings': valuation.holdings,
+                    'valued_at': valuation.valued_at,
+                },
+                'success': True
+            }, status=status.HTTP_200_OK)
+
+        except Exception as error:
+            logger.exception("Exception is :  %s", error)
+            return Response({
+                'error': f"{error}",
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+class FundStatsView(APIView):
+    """
+    API view to retrieve aggregate statistics per fund family and scheme category:
+    scheme counts, average NAV and platform AUM.
+    Served from the cache: only the ingest bumps the stats version, so AUM moved
+    by orders shows up within FUND_STATS_CACHE_TIMEOUT seconds.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'read'
+
+    def get(self, request):
+        """
+        Handle GET request to retrieve family and category statistics.
+
+        Response:
+            - A JSON object with:
+                - `data`: `families` (each with its `categories`), `categories`,
+                  `total_schemes` and `total_aum`.
+                - `success`: Boolean indicating success (`True` or `False`).
+            - Status Code:
+                - `200 OK` if the statistics are successfully retrieved.
+                - `500 Internal Server Error` if an unexpected error occurs.
+        """
+        try:
+            return Response({
+                'data': get_stats(),
+                'success': True
+            }, status=status.HTTP_200_OK)
+
+        except Exception as error:
+            logger.exception("Exception is :  %s", error)
+            return Response({
+                'error': f"{error}",
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+class CatalogueExportView(APIView):
+    """
+    API view to download the whole scheme catalogue.
+    The export is streamed straight from a database cursor, so it works for
+    any catalogue size with a fixed amount of memory per request.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'read'
+
+    def get(self, request):
+        """
+        Handle GET request to export all mutual funds with their fund family.
+
+        Query Parameters:
+            - `output`: `ndjson` (default), `csv` or `columnar` (binary row groups,
+              see `funds.export`). DRF reserves `format` for renderer selection.
+
+        Response:
+            - `200 OK` with the export as an attachment.
+            - `400 Bad Request` for an unknown format.
+        """
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'error': f"Invalid output format. Use one of: {', '.join(EXPORT_FORMATS)}.",
+                'success': False,
+                'status_code': status.HTTP_400_BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info("Catalogue export (%s) requested by user %s", export_format, request.user.id)
+        response = StreamingHttpResponse(iter_export(export_format), content_type=CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="catalogue.{FILE_EXTENSIONS[export_format]}"'
+        return response
+
+
+
+class AsyncAuthenticatedView(View):
+    """
+    Base class for the async read views served under ASGI.
+
+    Applies the same JWT + blacklist authentication and the same throttles
+    (`DEFAULT_THROTTLE_CLASSES` with the view's `throttle_scope`) as the DRF
+    views, but awaits the async ORM instead of holding a worker thread per
+    request. Responses keep the shape produced by the DRF views and exception handler.
+    """
+
+    authentication_class = BlacklistJWTAuthentication
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticator = self.authentication_class()
+        try:
+            user_auth_tuple = await authenticator.aauthenticate(request)
+        except APIException as error:
+            return self.unauthorized(request, authenticator, error.detail, error.status_code)
+
+        if user_auth_tuple is None:
+            return self.unauthorized(
+                request, authenticator, 'Authentication credentials were not provided.',
+                status.HTTP_401_UNAUTHORIZED,
+            )
+
+        request.user, request.auth = user_auth_tuple
+
+        # Buckets live in Redis or the cache, not the database, so the check
+        # need not run on the thread that owns the connection
+        throttled = await sync_to_async(self.check_throttles, thread_sensitive=False)(request)
+        if throttled is not None:
+            return self.throttled(throttled)
+        return await super().dispatch(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        """Like `APIView.check_throttles`, but returns the `Throttled` error instead of raising it."""
+        waits = [
+            throttle.wait() for throttle in (throttle_class() for throttle_class in self.throttle_classes)
+            if not throttle.allow_request(request, self)
+        ]
+        if not waits:
+            return None
+        durations = [wait for wait in waits if wait is not None]
+        return Throttled(wait=max(durations, default=None))
+
+    def throttled(self, error):
+        response = JsonResponse({
+            'detail': error.detail,
+            'success': False,
+            'status_code': error.status_code,
+        }, status=error.status_code)
+        if error.wait is not None:
+            response['Retry-After'] = '%d' % error.wait
+        return response
+
+    def unauthorized(self, request, authenticator, detail, status_code):
+        response = JsonResponse({
+            'detail': detail,
+            'success': False,
+            'status_code': status_code,
+        }, status=status_code)
+        response['WWW-Authenticate'] = authenticator.authenticate_header(request)
+        return response
+
+
+class AsyncFundFamilyListView(AsyncAuthenticatedView):
+    """
+    Async variant of `FundFamilyListView`, paginated the same way
+    (`page` and `page_size` query parameters).
+    """
+
+    throttle_scope = 'read'
+
+    async def get(self, request):
+        try:
+            # Invalid page_size falls back to the default value (10)
+            page_size = request.GET.get('page_size', '10')
+            page_size = int(page_size) if page_size.isdigit() and int(page_size) > 0 else 10
+
+            page = request.GET.get('page', '1')
+            page = int(page) if page.isdigit() else 0
+
+            count = await FundFamily.objects.using(catalogue_db()).acount()
+            offset = (page - 1) * page_size
+            results = []
+            if page > 0:
+                families = FundFamily.objects.using(catalogue_db()).order_by('id').values('id', 'name')[offset:offset + page_size]
+                results = [family async for family in families.aiterator()]
+
+            if not results:
+                return JsonResponse({
+                    'error': 'No fund families found.',
+                    'success': False,
+                    'status_code': status.HTTP_404_NOT_FOUND
+                }, status=status.HTTP_404_NOT_FOUND)
+
+            url = request.build_absolute_uri()
+            next_url = replace_query_param(url, 'page', page + 1) if offset + page_size < count else None
+            if page == 1:
+                previous_url = None
+            elif page == 2:
+                previous_url = remove_query_param(url, 'page')
+            else:
+                previous_url = replace_query_param(url, 'page', page - 1)
+
+            return JsonResponse({
+                'count': count,
+                'next': next_url,
+                'previous': previous_url,
+                'results': results,
+                'success': True,
+            }, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.exception("Unexpected error occurred: %s", e)
+            return JsonResponse({
+                'error': 'Internal server error. Please try again later.',
+                'success': False,
+                'status_code': status.HTTP_500_INTERNAL_SERVER_ERROR
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncPortfolioView(AsyncAuthenticatedView):
+    """
+    Async variant of `PortfolioView`. Returns the same fields, with what is
+    left of each open purchase, read in a single joined query.
+    """
+
+    throttle_scope = 'read'
+
+    async def get(self, request):
+        try:
+            # values() rather than values_list(): on Django 4.2 only the former
+            # is a lazy generator that aiterator() can drive off the event loop
+            holdings = (
+                Portfolio.objects.filter(user=request.user, is_open=True).order_by('-purchase_date')
+                .annotate(remaining_units=REMAINING_UNITS, remaining_cost=REMAINING_COST)
+                .values('mutual_fund__scheme_name', 'remaining_units', 'remaining_cost', 'mutual_fund__nav')
+            )
+            data = [
+                {
+                    'scheme_name': row['mutual_fund__scheme_name'],
+                    'units': row['remaining_units'],
+                    'invested_amount': row['remaining_cost'],
+                    'current_value': round(row['remaining_units'] * row['mutual_fund__nav'], 2),
+                    'nav': row['mutual_fund__nav'],
+                }
+                async for row in holdings.aiterator()
+            ]
+            return JsonResponse({
+                'data': data,
+                'success': True
+            }, status=status.HTTP_200_OK)
+
+        except Exception as error:
+            logger.exception("Exception is :  %s", error)
+            return JsonResponse({
+                'error': f"{error}",
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class NavStreamView(AsyncAuthenticatedView):
+    """
+    Server-sent events with the NAVs of the schemes the user holds, plus up
+    to `NAV_STREAM_MAX_SCHEMES` scheme codes listed in `?schemes=101,102`
+    (see `funds.nav_stream`). Serve it under ASGI: under WSGI every open
+    stream holds a worker thread.
+    """
+
+    throttle_scope = 'read'  # counted per connection
+
+    async def get(self, request):
+        watched = request.GET.get('schemes', '')
+        try:
+            scheme_codes = {int(code) for code in watched.split(',') if code.strip()}
+        except ValueError:
+            scheme_codes = None
+        if scheme_codes is None or len(scheme_codes) > settings.NAV_STREAM_MAX_SCHEMES:
+            return JsonResponse({
+                'error': f'schemes must be at most {settings.NAV_STREAM_MAX_SCHEMES} comma separated scheme codes.',
+                'success': False,
+                'status_code': status.HTTP_400_BAD_REQUEST
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        held = SchemeHolding.objects.filter(user=request.user, units__gt=0).values('mutual_fund__scheme_code')
+        scheme_codes.update([row['mutual_fund__scheme_code'] async for row in held.aiterator()])
+
+        response = StreamingHttpResponse(NavEventStream(scheme_codes), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the events
+        return response